@@ -0,0 +1,61 @@
+"""Shared fixtures for the pytest-benchmark suite.
+
+The application modules are imported from ``src/``, and Qt runs on the
+offscreen platform unless ``QT_QPA_PLATFORM`` is already set.
+Results are stored in ``benchmarks/.benchmarks`` regardless of the
+working directory. Pass ``--large`` to include the 1,000,000-row
+storage cases.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent / "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+#: Codes in a market-sized watchlist.
+UNIVERSE_SIZE = 4000
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption("--large", action="store_true", help="include 1M-row storage benchmarks")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("benchmark_storage", None) == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{ROOT / '.benchmarks'}"
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items) -> None:
+    if config.getoption("--large"):
+        return
+    skip = pytest.mark.skip(reason="needs --large")
+    for item in items:
+        if "large" in item.keywords:
+            item.add_marker(skip)
+
+
+def make_base_prices(n: int = UNIVERSE_SIZE, seed: int = 0) -> np.ndarray:
+    """Whole-yen base prices spanning roughly 50 to 100,000 JPY."""
+    rng = np.random.default_rng(seed)
+    return np.round(rng.lognormal(mean=7.3, sigma=1.1, size=n)).clip(1, None)
+
+
+@pytest.fixture(scope="session")
+def base_prices() -> np.ndarray:
+    return make_base_prices()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    yield app
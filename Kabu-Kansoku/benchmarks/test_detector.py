@@ -0,0 +1,62 @@
+"""Hit/close checks and event detection throughput over 4,000 codes."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from core.detector import classify_batch, is_close, is_close_batch, is_hit, is_hit_batch
+from core.event_detector import EventDetector
+from core.limit_rules import calculate_limits_batch
+from core.simulation import SimulatedDataSource, synthetic_codes
+
+
+@pytest.fixture(scope="module")
+def market(base_prices):
+    """Prices, with a tenth of the codes sitting at a limit."""
+    up, down = calculate_limits_batch(base_prices)
+    rng = np.random.default_rng(1)
+    prices = base_prices * rng.uniform(0.9, 1.1, size=len(base_prices))
+    at_limit = rng.random(len(base_prices)) < 0.1
+    prices[at_limit] = np.where(rng.random(at_limit.sum()) < 0.5, up[at_limit], down[at_limit])
+    return prices, up, down
+
+
+def test_is_hit_scalar(benchmark, market):
+    prices, up, down = (column.tolist() for column in market)
+    benchmark(lambda: [is_hit(p, u, d) for p, u, d in zip(prices, up, down)])
+
+
+def test_is_hit_batch(benchmark, market):
+    benchmark(is_hit_batch, *market)
+
+
+def test_is_close_scalar(benchmark, market):
+    prices, up, down = (column.tolist() for column in market)
+    benchmark(lambda: [is_close(p, u, d) for p, u, d in zip(prices, up, down)])
+
+
+def test_is_close_batch(benchmark, market):
+    benchmark(is_close_batch, *market)
+
+
+def test_classify_batch(benchmark, market):
+    prices, up, down = market
+    benchmark(classify_batch, prices * 1.01, prices * 0.99, prices, up, down)
+
+
+def test_event_detector(benchmark):
+    """One poll of 4,000 simulated codes through ``EventDetector.process``."""
+    source = SimulatedDataSource(seed=0, volatility=0.03)
+    codes = synthetic_codes(4000)
+    detector = EventDetector()
+    batches = [source.get_quotes(codes) for _ in range(50)]
+    limits = [calculate_limits_batch(batch.base_price) for batch in batches]
+    state = {"i": 0}
+
+    def poll():
+        i = state["i"] % len(batches)
+        state["i"] += 1
+        return detector.process(batches[i], *limits[i])
+
+    benchmark(poll)
@@ -0,0 +1,36 @@
+"""Quote ingestion for 4,000 codes in one process and sharded over workers.
+
+``DummyDataSource`` builds every quote in Python, so the in-process case
+is bound by one core; the sharded cases should approach a
+``processes``-fold speed-up on a machine with that many free cores.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from core.dummy_data_source import DummyDataSource
+from core.sharded_data_source import ShardedDataSource
+from core.simulation import synthetic_codes
+
+CODES = synthetic_codes(4000)
+
+
+def test_get_quotes_in_process(benchmark):
+    source = DummyDataSource(seed=0)
+    source.login()
+    batch = benchmark(source.get_quotes, CODES)
+    assert len(batch) == len(CODES)
+
+
+@pytest.mark.parametrize("processes", [1, 2, 4])
+def test_get_quotes_sharded(benchmark, processes):
+    source = ShardedDataSource(DummyDataSource, processes)
+    assert source.login()
+    try:
+        # The first call registers the codes with the workers
+        source.get_quotes(CODES)
+        batch = benchmark(source.get_quotes, CODES)
+        assert len(batch) == len(CODES)
+    finally:
+        source.close()
@@ -0,0 +1,26 @@
+"""Limit and tick lookups for a market-sized universe, scalar vs batch."""
+
+from __future__ import annotations
+
+from core.limit_rules import calculate_limits, calculate_limits_batch, tick_size, tick_size_batch
+
+
+def test_calculate_limits_scalar(benchmark, base_prices):
+    prices = base_prices.tolist()
+    benchmark(lambda: [calculate_limits(p) for p in prices])
+
+
+def test_calculate_limits_batch(benchmark, base_prices):
+    up, down = benchmark(calculate_limits_batch, base_prices)
+    # Both paths must agree on every code before their timings mean anything
+    expected = [calculate_limits(p) for p in base_prices.tolist()]
+    assert list(zip(up.tolist(), down.tolist())) == expected
+
+
+def test_tick_size_scalar(benchmark, base_prices):
+    prices = base_prices.tolist()
+    benchmark(lambda: [tick_size(p) for p in prices])
+
+
+def test_tick_size_batch(benchmark, base_prices):
+    benchmark(tick_size_batch, base_prices)
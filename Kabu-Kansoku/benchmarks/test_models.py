@@ -0,0 +1,75 @@
+"""Memory and build cost of one polling round's quotes, per representation.
+
+Compares the original per-code dict (with a ``datetime.now()`` inside),
+the slotted ``Quote`` model and the struct-of-arrays ``QuoteBatch``. Peak
+traced memory to hold the round is reported as ``peak_kib`` in
+``extra_info``.
+"""
+
+from __future__ import annotations
+
+import datetime
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from core.models import Quote, QuoteBatch
+
+
+def build_dicts(codes, prices):
+    """The original ``get_quote`` result shape, one dict per code."""
+    return {
+        code: {
+            "code": code,
+            "current_price": price,
+            "high": price,
+            "low": price,
+            "volume": 1000,
+            "timestamp": datetime.datetime.now(),
+            "base_price": price,
+        }
+        for code, price in zip(codes, prices)
+    }
+
+
+def build_quotes(codes, prices):
+    now = time.time()
+    return [
+        Quote(code, price, high=price, low=price, volume=1000, timestamp=now, base_price=price)
+        for code, price in zip(codes, prices)
+    ]
+
+
+def build_batch(codes, prices):
+    price = np.array(prices, dtype=np.float64)
+    return QuoteBatch(
+        codes=codes,
+        price=price,
+        high=price.copy(),
+        low=price.copy(),
+        volume=np.full(len(codes), 1000, dtype=np.int64),
+        timestamp=np.full(len(codes), time.time()),
+        base_price=price.copy(),
+    )
+
+
+@pytest.fixture(scope="module")
+def quote_round(base_prices):
+    codes = [str(1300 + i) for i in range(len(base_prices))]
+    return codes, base_prices.tolist()
+
+
+@pytest.mark.parametrize("build", [build_dicts, build_quotes, build_batch], ids=["dict", "Quote", "QuoteBatch"])
+def test_build_quote_round(benchmark, quote_round, build):
+    codes, prices = quote_round
+    tracemalloc.start()
+    try:
+        result = build(codes, prices)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    benchmark.extra_info["peak_kib"] = round(peak / 1024, 1)
+    benchmark(build, codes, prices)
@@ -0,0 +1,132 @@
+"""SQLite write and read paths at 10k, 100k and (with --large) 1M rows."""
+
+from __future__ import annotations
+
+import datetime
+from typing import List
+
+import numpy as np
+import pytest
+
+from core.models import DayResult, Event
+from storage.db import Database, HistoryQuery
+
+SIZES = [10_000, 100_000, pytest.param(1_000_000, marks=pytest.mark.large)]
+START = datetime.date(2020, 1, 1)
+
+
+def make_results(n: int, codes: int = 4000) -> List[DayResult]:
+    """``n`` daily results spread over ``n / codes`` days."""
+    rng = np.random.default_rng(0)
+    close = np.round(rng.lognormal(7.3, 1.1, n), 1).tolist()
+    flags = (rng.random((n, 4)) < 0.02).tolist()
+    return [
+        DayResult(
+            code=str(1000 + i % codes),
+            date=START + datetime.timedelta(days=i // codes),
+            base_price=close[i],
+            limit_up=close[i] + 100.0,
+            limit_down=max(close[i] - 100.0, 0.0),
+            high=close[i] + 1.0,
+            low=close[i] - 1.0,
+            close=close[i],
+            hit_up=flags[i][0],
+            hit_down=flags[i][1],
+            close_up=flags[i][2],
+            close_down=flags[i][3],
+        )
+        for i in range(n)
+    ]
+
+
+def make_events(n: int, codes: int = 4000) -> List[Event]:
+    start = datetime.datetime(2024, 1, 4, 9, 0)
+    types = ("hit_up", "release_up", "retouch_up", "hit_down", "release_down", "retouch_down")
+    return [
+        Event(
+            ts=start + datetime.timedelta(milliseconds=10 * i),
+            code=str(1000 + i % codes),
+            price=1000.0 + i % 500,
+            event_type=types[i % len(types)],
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "bench.db")
+
+
+@pytest.fixture
+def fresh_db(tmp_path):
+    """Factory for empty databases; write benchmarks need one per round."""
+    dbs: List[Database] = []
+
+    def create() -> Database:
+        dbs.append(Database(str(tmp_path / f"round{len(dbs)}.db")))
+        return dbs[-1]
+
+    yield create
+    for db in dbs:
+        db.close()
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_save_daily_many(benchmark, fresh_db, rows):
+    results = make_results(rows)
+    benchmark.pedantic(
+        lambda db: db.save_daily_many(results), setup=lambda: ((fresh_db(),), {}), rounds=3
+    )
+
+
+def test_save_daily_single_row(benchmark, db_path):
+    """Cost of one ``save_daily`` call (one transaction) on a 10k-row table."""
+    db = Database(db_path)
+    db.save_daily_many(make_results(10_000))
+    extra = iter(make_results(200_000)[10_000:])
+    benchmark(lambda: db.save_daily(next(extra)))
+    db.close()
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_save_events(benchmark, fresh_db, rows):
+    events = make_events(rows)
+    benchmark.pedantic(
+        lambda db: db.save_events(events), setup=lambda: ((fresh_db(),), {}), rounds=3
+    )
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_fetch_daily_results(benchmark, db_path, rows):
+    db = Database(db_path)
+    db.save_daily_many(make_results(rows))
+    fetched = benchmark.pedantic(lambda: list(db.fetch_daily_results(rows)), rounds=3)
+    assert len(fetched) == rows
+    db.close()
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_fetch_streaks(benchmark, db_path, rows):
+    db = Database(db_path)
+    db.save_daily_many(make_results(rows))
+    benchmark.pedantic(db.fetch_streaks, rounds=3)
+    db.close()
+
+
+@pytest.mark.parametrize("order_by", ["date", "code"])
+@pytest.mark.parametrize("rows", SIZES)
+def test_read_daily_page(benchmark, db_path, rows, order_by):
+    """One 1000-row History page read from the far end of the table."""
+    db = Database(db_path)
+    results = make_results(rows)
+    db.save_daily_many(results)
+    query = HistoryQuery(order_by=order_by)
+    last = min(results, key=lambda r: (r.date, r.code) if order_by == "date" else (r.code, r.date))
+    # Key just above the oldest row, so the page is the table's last
+    after = (last.date + datetime.timedelta(days=1), last.code)
+    if order_by == "code":
+        after = (last.date, last.code + "0")
+    page = benchmark(db.read_daily_page, query, after, 1000)
+    assert len(page.code) >= 1
+    db.close()
@@ -0,0 +1,68 @@
+"""Dashboard update path with 100, 1,000 and 4,000 codes.
+
+One tick is measured end to end on the GUI thread: ``QuotePoller.poll``
+fetches from ``DummyDataSource``, computes limits, flags and changed
+rows, then ``QuoteTableModel.apply_rows`` updates a shown ``MainWindow``
+and pending paint events are processed. The poller runs inline here
+instead of on its thread so the whole tick is timed.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from core.dummy_data_source import DummyDataSource
+from core.simulation import synthetic_codes
+
+
+@pytest.fixture
+def window(qapp, tmp_path):
+    from main import MainWindow
+
+    data_source = DummyDataSource(seed=0)
+    # Long interval: the window's own poller thread stays idle
+    window = MainWindow(data_source, update_interval=3600, db_path=str(tmp_path / "ui.db"))
+    window.show()
+    yield window
+    window.close()
+
+
+@pytest.mark.parametrize("codes", [100, 1000, 4000])
+def test_dashboard_tick(benchmark, qapp, window, codes):
+    from ui.poller import QuotePoller
+
+    window.add_codes(synthetic_codes(codes))
+    poller = QuotePoller(window.poller.data_source)
+    poller.set_codes(window.watchlist)
+    poller.rows_changed.connect(window.model.apply_rows)
+    poller.poll()
+    qapp.processEvents()
+
+    def tick():
+        poller.poll()
+        qapp.processEvents()
+
+    benchmark(tick)
+    assert window.model.rowCount() == codes
+
+
+@pytest.mark.parametrize("codes", [100, 1000, 4000])
+def test_apply_rows(benchmark, qapp, window, codes):
+    """Model update and repaint alone, for rows already computed."""
+    from ui.poller import QuotePoller
+
+    window.add_codes(synthetic_codes(codes))
+    poller = QuotePoller(window.poller.data_source)
+    poller.set_codes(window.watchlist)
+    batches = []
+    poller.rows_changed.connect(batches.append)
+    for _ in range(20):
+        poller.poll()
+    state = {"i": 0}
+
+    def apply():
+        window.model.apply_rows(batches[state["i"] % len(batches)])
+        state["i"] += 1
+        qapp.processEvents()
+
+    benchmark(apply)
@@ -7,32 +7,37 @@ implement the methods defined here.
 
 from __future__ import annotations
 
+import dataclasses
 import datetime
+import time
 from abc import ABC, abstractmethod
-from typing import Optional, Dict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict, Iterable, List
+
+from .metrics import METRICS
+from .models import Quote, QuoteBatch
 
 
 class DataSource(ABC):
     """Interface for quote providers used by the application."""
 
+    #: Upper bound on concurrent requests made by the default ``get_quotes``.
+    max_workers: int = 8
+    #: Seconds allowed for fetching a single code in ``get_quotes``.
+    quote_timeout: float = 5.0
+    #: Codes covered by one request in ``get_quotes``; the default
+    #: implementation sends one request per code. Request-rate limits
+    #: such as ``AdaptiveSchedule``'s are converted to codes with this.
+    codes_per_request: int = 1
+
     @abstractmethod
     def login(self) -> bool:
         """Perform login or other setup. Return True if successful."""
         raise NotImplementedError
 
     @abstractmethod
-    def get_quote(self, code: str) -> Optional[Dict[str, object]]:
-        """Return the latest quote information for a stock code.
-
-        A quote dict should contain at least:
-
-        - 'code': str
-        - 'current_price': float
-        - 'high': float (optional)
-        - 'low': float (optional)
-        - 'volume': int (optional)
-        - 'timestamp': datetime.datetime
-        """
+    def get_quote(self, code: str) -> Optional[Quote]:
+        """Return the latest quote for a stock code, or None if unavailable."""
         raise NotImplementedError
 
     @abstractmethod
@@ -40,6 +45,85 @@ class DataSource(ABC):
         """Return the base price used to compute limit up/down (usually the previous close)."""
         raise NotImplementedError
 
+    def get_quotes(
+        self,
+        codes: Iterable[str],
+        errors: Optional[Dict[str, Exception]] = None,
+        include_base_price: bool = True,
+    ) -> QuoteBatch:
+        """Return quotes for many codes at once as a ``QuoteBatch``.
+
+        The batch includes base prices, so callers do not need a second
+        call per code. Callers that cache base prices (see
+        ``core.limit_cache``) pass ``include_base_price=False`` to skip
+        that lookup. Codes that fail or time out are left out of the
+        batch (partial results); if an ``errors`` dict is given, the
+        exception for each such code is stored in it.
+
+        The default implementation fans ``get_quote``/``get_base_price``
+        out over a bounded thread pool of ``max_workers`` threads, giving
+        each code ``quote_timeout`` seconds once a worker picks it up.
+        Data sources that can fetch several codes per request should
+        override this method.
+        """
+        codes = list(dict.fromkeys(codes))
+        results: List[Quote] = []
+        if not codes:
+            return QuoteBatch.empty()
+        workers = max(1, min(self.max_workers, len(codes)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quote")
+        try:
+            start = time.monotonic()
+            futures = [
+                (code, executor.submit(self._fetch_one, code, include_base_price))
+                for code in codes
+            ]
+            for index, (code, future) in enumerate(futures):
+                # With a bounded pool, the n-th code cannot start before
+                # n // workers earlier waves have finished.
+                deadline = start + self.quote_timeout * (index // workers + 1)
+                try:
+                    quote = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    future.cancel()
+                    if errors is not None:
+                        errors[code] = TimeoutError(f"Timed out fetching {code}")
+                    continue
+                except Exception as ex:
+                    if errors is not None:
+                        errors[code] = ex
+                    continue
+                if quote:
+                    results.append(quote)
+        finally:
+            # Do not wait for requests that are stuck past their timeout.
+            executor.shutdown(wait=False, cancel_futures=True)
+        return QuoteBatch.from_quotes(results)
+
+    def _fetch_one(self, code: str, include_base_price: bool) -> Optional[Quote]:
+        """Fetch a quote and optionally its base price for ``get_quotes``."""
+        source = type(self).__name__
+        with METRICS.timer("get_quote", source):
+            quote = self.get_quote(code)
+        if not quote or not include_base_price:
+            return quote
+        with METRICS.timer("get_base_price", source):
+            base_price = self.get_base_price(code)
+        return dataclasses.replace(quote, base_price=base_price)
+
+    def get_base_prices(self, codes: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Return base prices for many codes, keyed by code.
+
+        The default implementation calls ``get_base_price`` for each code.
+        Data sources with a bulk endpoint should override it.
+        """
+        source = type(self).__name__
+        results: Dict[str, Optional[float]] = {}
+        for code in codes:
+            with METRICS.timer("get_base_price", source):
+                results[code] = self.get_base_price(code)
+        return results
+
     def get_daily_summary(
         self, code: str, date: datetime.date
     ) -> Optional[Dict[str, object]]:
@@ -1,8 +1,29 @@
-"""Functions for determining limit hit and close conditions."""
+"""Functions for determining limit hit and close conditions.
+
+Prices are compared in tick units: a price counts as being at a limit
+when it is within half a tick of it. This keeps the checks correct for
+float prices parsed from JSON, where exact ``==`` can fail.
+
+The ``*_batch`` variants take NumPy arrays (None/NaN prices never match)
+and return boolean masks, so a whole universe is checked in one pass.
+"""
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .limit_rules import tick_size, tick_size_batch
+
+
+class LimitFlags(NamedTuple):
+    """Boolean masks describing how prices relate to the limits."""
+
+    hit_up: np.ndarray
+    hit_down: np.ndarray
+    close_up: np.ndarray
+    close_down: np.ndarray
 
 
 def is_hit(price: Optional[float], limit_up: float, limit_down: float) -> bool:
@@ -14,11 +35,14 @@ def is_hit(price: Optional[float], limit_up: float, limit_down: float) -> bool:
     """
     if price is None:
         return False
-    return price >= limit_up or price <= limit_down
+    return (
+        price >= limit_up - tick_size(limit_up) / 2
+        or price <= limit_down + tick_size(limit_down) / 2
+    )
 
 
 def is_close(close_price: Optional[float], limit_up: float, limit_down: float) -> bool:
-    """Return True if the closing price is exactly at the limit.
+    """Return True if the closing price is at the limit.
 
     :param close_price: Closing price (may be None)
     :param limit_up: Upper limit price
@@ -26,4 +50,39 @@ def is_close(close_price: Optional[float], limit_up: float, limit_down: float) -
     """
     if close_price is None:
         return False
-    return close_price == limit_up or close_price == limit_down
\ No newline at end of file
+    return (
+        abs(close_price - limit_up) < tick_size(limit_up) / 2
+        or abs(close_price - limit_down) < tick_size(limit_down) / 2
+    )
+
+
+def _as_prices(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def is_hit_batch(prices, limit_up, limit_down) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (hit_up, hit_down) masks for arrays of prices and limits."""
+    prices, limit_up, limit_down = _as_prices(prices), _as_prices(limit_up), _as_prices(limit_down)
+    hit_up = prices >= limit_up - tick_size_batch(limit_up) / 2
+    hit_down = prices <= limit_down + tick_size_batch(limit_down) / 2
+    return hit_up, hit_down
+
+
+def is_close_batch(closes, limit_up, limit_down) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (close_up, close_down) masks for arrays of closes and limits."""
+    closes, limit_up, limit_down = _as_prices(closes), _as_prices(limit_up), _as_prices(limit_down)
+    close_up = np.abs(closes - limit_up) < tick_size_batch(limit_up) / 2
+    close_down = np.abs(closes - limit_down) < tick_size_batch(limit_down) / 2
+    return close_up, close_down
+
+
+def classify_batch(high, low, close, limit_up, limit_down) -> LimitFlags:
+    """Compute all four end-of-day flags in one vectorised pass.
+
+    ``hit_up`` is taken from the day's high and ``hit_down`` from the
+    day's low; the close flags come from the closing price.
+    """
+    hit_up, _ = is_hit_batch(high, limit_up, limit_down)
+    _, hit_down = is_hit_batch(low, limit_up, limit_down)
+    close_up, close_down = is_close_batch(close, limit_up, limit_down)
+    return LimitFlags(hit_up, hit_down, close_up, close_down)
@@ -3,47 +3,118 @@
 This class generates synthetic quotes using a simple random walk. It is
 useful for development and testing when access to a real API is not
 available. Prices are stored per code in an internal dictionary and
-updated on each call.
+updated on each call. For market-sized or reproducible load tests see
+``core.simulation``.
 """
 
 from __future__ import annotations
 
-import random
 import datetime
-from typing import Optional, Dict
+import random
+import time
+from typing import Optional, Dict, Iterable
+
+import numpy as np
 
 from .data_source_base import DataSource
+from .market_time import now_jst
+from .models import Quote, QuoteBatch
 
 
 class DummyDataSource(DataSource):
     """Generate synthetic quote data for testing the UI and logic."""
 
-    def __init__(self) -> None:
+    def __init__(self, seed: Optional[int] = None) -> None:
+        # Private generator so runs can be reproduced with a seed
+        self.random = random.Random(seed)
         # Store current synthetic price per code
         self.prices: Dict[str, float] = {}
+        # First synthetic price per code, used as the base price
+        self.base_prices: Dict[str, float] = {}
+        # Intraday range per code for get_daily_summary
+        self.highs: Dict[str, float] = {}
+        self.lows: Dict[str, float] = {}
 
     def login(self) -> bool:
         # Nothing to do for dummy
         return True
 
-    def get_quote(self, code: str) -> Optional[Dict[str, object]]:
+    def _price(self, code: str) -> float:
         # Initialize a random base price if not present
-        base_price = self.prices.get(code)
-        if base_price is None:
-            base_price = random.uniform(500.0, 2000.0)
+        price = self.prices.get(code)
+        if price is None:
+            price = self.random.uniform(500.0, 2000.0)
+            self.prices[code] = price
+            self.base_prices[code] = price
+        return price
+
+    def _step(self, code: str) -> float:
+        base_price = self._price(code)
         # Random walk step
-        delta = random.uniform(-10.0, 10.0)
+        delta = self.random.uniform(-10.0, 10.0)
         price = max(10.0, base_price + delta)
         self.prices[code] = price
-        return {
-            "code": code,
-            "current_price": price,
-            "high": price,
-            "low": price,
-            "volume": random.randint(1000, 100000),
-            "timestamp": datetime.datetime.now(),
-        }
+        self.highs[code] = max(price, self.highs.get(code, price))
+        self.lows[code] = min(price, self.lows.get(code, price))
+        return price
+
+    def restore_snapshot(self, snapshot) -> None:
+        """Continue the random walk from the prices in a ``core.snapshot.Snapshot``."""
+        for code, price, base, high, low in zip(
+            snapshot.codes,
+            snapshot.price.tolist(),
+            snapshot.base_price.tolist(),
+            snapshot.high.tolist(),
+            snapshot.low.tolist(),
+        ):
+            if np.isnan(price):
+                continue
+            self.prices[code] = price
+            self.base_prices[code] = price if np.isnan(base) else base
+            self.highs[code] = price if np.isnan(high) else high
+            self.lows[code] = price if np.isnan(low) else low
+
+    def get_quote(self, code: str) -> Optional[Quote]:
+        price = self._step(code)
+        return Quote(
+            code=code,
+            current_price=price,
+            high=price,
+            low=price,
+            volume=self.random.randint(1000, 100000),
+            timestamp=time.time(),
+        )
 
     def get_base_price(self, code: str) -> Optional[float]:
         # Use the initial synthetic price as the base price
-        return self.prices.get(code)
\ No newline at end of file
+        self._price(code)
+        return self.base_prices[code]
+
+    def get_daily_summary(self, code: str, date: datetime.date) -> Optional[Dict[str, object]]:
+        # Only the current synthetic session exists
+        if date != now_jst().date() or code not in self.highs:
+            return None
+        return {"high": self.highs[code], "low": self.lows[code], "close": self.prices[code]}
+
+    def get_quotes(
+        self,
+        codes: Iterable[str],
+        errors: Optional[Dict[str, Exception]] = None,
+        include_base_price: bool = True,
+    ) -> QuoteBatch:
+        # Everything is in memory, so fill the columns directly
+        codes = list(dict.fromkeys(codes))
+        price = np.array([self._step(code) for code in codes], dtype=np.float64)
+        if include_base_price:
+            base_price = np.array([self.base_prices[code] for code in codes], dtype=np.float64)
+        else:
+            base_price = np.full(len(codes), np.nan)
+        return QuoteBatch(
+            codes=codes,
+            price=price,
+            high=price.copy(),
+            low=price.copy(),
+            volume=np.array([self.random.randint(1000, 100000) for _ in codes], dtype=np.int64),
+            timestamp=np.full(len(codes), time.time()),
+            base_price=base_price,
+        )
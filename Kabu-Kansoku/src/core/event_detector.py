@@ -0,0 +1,135 @@
+"""Incremental detection of limit touches from polled quotes.
+
+``EventDetector`` keeps per-code intraday state (high, low and whether
+the price currently sits at either limit) in NumPy arrays, and turns
+each ``QuoteBatch`` into ``Event`` objects only when that state changes:
+
+- ``hit_up`` / ``hit_down``: the first touch of the day;
+- ``release_up`` / ``release_down``: the price left the limit;
+- ``retouch_up`` / ``retouch_down``: the limit was reached again.
+
+Repeated polls at the limit produce no events. State is reset when the
+JST trading day changes.
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .detector import is_hit_batch
+from .market_time import trading_day
+from .models import Event, QuoteBatch
+
+_INITIAL_CAPACITY = 256
+_STATE_ARRAYS = ("high", "low", "at_up", "at_down", "touched_up", "touched_down")
+
+
+class EventDetector:
+    """Track limit state per code and emit events on transitions."""
+
+    def __init__(self, clock: Callable[[], datetime.datetime] = datetime.datetime.now) -> None:
+        self.clock = clock
+        self.day: Optional[datetime.date] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all intraday state."""
+        self.index_of: Dict[str, int] = {}
+        self.high = np.full(_INITIAL_CAPACITY, np.nan)
+        self.low = np.full(_INITIAL_CAPACITY, np.nan)
+        # Price currently at the limit
+        self.at_up = np.zeros(_INITIAL_CAPACITY, dtype=np.bool_)
+        self.at_down = np.zeros(_INITIAL_CAPACITY, dtype=np.bool_)
+        # Limit touched at least once today
+        self.touched_up = np.zeros(_INITIAL_CAPACITY, dtype=np.bool_)
+        self.touched_down = np.zeros(_INITIAL_CAPACITY, dtype=np.bool_)
+
+    def state(self, codes: List[str]) -> Dict[str, np.ndarray]:
+        """Return high, low and limit flags aligned with ``codes`` (NaN/False if unseen)."""
+        idx = self._slots(codes)
+        return {name: getattr(self, name)[idx] for name in _STATE_ARRAYS}
+
+    def restore(self, day: datetime.date, codes: List[str], **state: np.ndarray) -> None:
+        """Replace all state with ``state`` (as returned by ``state``) for ``day``."""
+        self.reset()
+        self.day = day
+        idx = self._slots(codes)
+        for name in _STATE_ARRAYS:
+            getattr(self, name)[idx] = state[name]
+
+    def _slots(self, codes: List[str]) -> np.ndarray:
+        """Return state indices for ``codes``, allocating new ones as needed."""
+        for code in codes:
+            if code not in self.index_of:
+                self.index_of[code] = len(self.index_of)
+        needed = len(self.index_of)
+        if needed > len(self.high):
+            capacity = max(needed, len(self.high) * 2)
+            for name in _STATE_ARRAYS:
+                old = getattr(self, name)
+                new = np.full(capacity, np.nan) if old.dtype != np.bool_ else np.zeros(capacity, np.bool_)
+                new[: len(old)] = old
+                setattr(self, name, new)
+        return np.fromiter((self.index_of[code] for code in codes), dtype=np.intp, count=len(codes))
+
+    def process(
+        self, batch: QuoteBatch, limit_up: np.ndarray, limit_down: np.ndarray
+    ) -> List[Event]:
+        """Update state from one batch and return the events it caused.
+
+        ``limit_up``/``limit_down`` are aligned with ``batch.codes``. Rows
+        with a NaN price are ignored.
+        """
+        today = trading_day(self.clock())
+        if today != self.day:
+            self.reset()
+            self.day = today
+        if not len(batch):
+            return []
+        idx = self._slots(batch.codes)
+        price = batch.price
+        valid = ~np.isnan(price)
+
+        # The reported high/low also catches touches between two polls
+        high = np.fmax(self.high[idx], np.fmax(price, batch.high))
+        low = np.fmin(self.low[idx], np.fmin(price, batch.low))
+        self.high[idx] = high
+        self.low[idx] = low
+
+        now_up, now_down = is_hit_batch(price, limit_up, limit_down)
+        ever_up, _ = is_hit_batch(high, limit_up, limit_down)
+        _, ever_down = is_hit_batch(low, limit_up, limit_down)
+
+        events: List[Event] = []
+        for side, now_at, ever, at, touched, limit in (
+            ("up", now_up, ever_up, self.at_up, self.touched_up, limit_up),
+            ("down", now_down, ever_down, self.at_down, self.touched_down, limit_down),
+        ):
+            was_at = at[idx]
+            was_touched = touched[idx]
+            first = valid & (now_at | ever) & ~was_touched
+            retouch = valid & now_at & ~was_at & was_touched
+            release = valid & ~now_at & was_at
+            for mask, event_type in (
+                (first, f"hit_{side}"),
+                (retouch, f"retouch_{side}"),
+                (release, f"release_{side}"),
+            ):
+                for i in np.flatnonzero(mask).tolist():
+                    # A touch seen only in the high/low is recorded at the limit
+                    event_price = float(price[i]) if now_at[i] or mask is release else float(limit[i])
+                    events.append(
+                        Event(
+                            ts=datetime.datetime.fromtimestamp(batch.timestamp[i]),
+                            code=batch.codes[i],
+                            price=event_price,
+                            event_type=event_type,
+                        )
+                    )
+            at[idx] = np.where(valid, now_at, was_at)
+            touched[idx] = was_touched | first
+        events.sort(key=lambda e: e.ts)
+        return events
@@ -0,0 +1,164 @@
+"""End-of-day finalisation of daily results.
+
+After the close the finaliser fetches the day's high, low and close for
+every watched code, computes limits and hit/close flags in one
+vectorised pass and writes all ``DayResult`` rows in a single
+transaction.
+
+Fetched summaries are checkpointed in the database chunk by chunk, so a
+run interrupted halfway resumes from the staged rows instead of fetching
+everything again. Codes that already have a result for the day are
+skipped, which makes running the job twice harmless. Only codes passed
+to ``run`` are committed, even if an earlier run staged others. Fetch
+errors are collected in the report rather than printed. A run can be
+stopped between chunks; it then commits nothing and the next run
+resumes from the staged rows.
+"""
+
+from __future__ import annotations
+
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .data_source_base import DataSource
+from .detector import classify_batch
+from .limit_rules import calculate_limits_batch
+from .metrics import METRICS
+from .models import DayResult
+
+# (code, base_price, high, low, close)
+SummaryRow = Tuple[str, float, float, float, float]
+
+
+@dataclass(slots=True)
+class FinalizeReport:
+    """Outcome of one ``EndOfDayFinalizer.run`` call."""
+
+    date: datetime.date
+    written: int = 0
+    skipped: int = 0
+    missing: List[str] = field(default_factory=list)
+    #: Error message per code whose data could not be fetched.
+    errors: Dict[str, str] = field(default_factory=dict)
+    #: Results written by this run.
+    results: List[DayResult] = field(default_factory=list)
+    #: True if the run was stopped before committing.
+    interrupted: bool = False
+
+
+class EndOfDayFinalizer:
+    """Build and store ``DayResult`` rows for a watchlist.
+
+    ``db`` must provide ``finalized_codes``, ``stage_summaries``,
+    ``staged_summaries`` and ``commit_day`` (see ``storage.db.Database``).
+    """
+
+    def __init__(
+        self,
+        data_source: DataSource,
+        db,
+        max_workers: int = 8,
+        chunk_size: int = 200,
+    ) -> None:
+        self.data_source = data_source
+        self.db = db
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+
+    def run(
+        self,
+        codes: Iterable[str],
+        date: datetime.date,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> FinalizeReport:
+        """Finalise ``codes`` for ``date``; ``should_stop`` is polled between chunks."""
+        codes = list(dict.fromkeys(codes))
+        report = FinalizeReport(date)
+        done = self.db.finalized_codes(date)
+        staged = {row[0] for row in self.db.staged_summaries(date)}
+        report.skipped = sum(1 for code in codes if code in done)
+        pending = [code for code in codes if code not in done and code not in staged]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for start in range(0, len(pending), self.chunk_size):
+                if should_stop is not None and should_stop():
+                    report.interrupted = True
+                    return report
+                chunk = pending[start:start + self.chunk_size]
+                rows = self._fetch_chunk(executor, chunk, date, report)
+                if rows:
+                    self.db.stage_summaries(date, rows)
+        # Earlier runs may have staged codes that are no longer watched
+        wanted = set(codes) - done
+        staged_rows = [row for row in self.db.staged_summaries(date) if row[0] in wanted]
+        results = self._build_results(staged_rows, date)
+        self.db.commit_day(date, results)
+        report.written = len(results)
+        report.results = results
+        return report
+
+    def _fetch_chunk(
+        self,
+        executor: ThreadPoolExecutor,
+        chunk: List[str],
+        date: datetime.date,
+        report: FinalizeReport,
+    ) -> List[SummaryRow]:
+        try:
+            base_prices = self.data_source.get_base_prices(chunk)
+        except Exception as ex:
+            report.missing.extend(chunk)
+            report.errors.update(dict.fromkeys(chunk, f"Base price: {ex}"))
+            return []
+        summaries = executor.map(lambda code: self._summary(code, date, report.errors), chunk)
+        rows: List[SummaryRow] = []
+        for code, summary in zip(chunk, summaries):
+            base = base_prices.get(code)
+            if base is None or summary is None or None in (
+                summary.get("high"), summary.get("low"), summary.get("close")
+            ):
+                report.missing.append(code)
+                continue
+            rows.append((code, base, summary["high"], summary["low"], summary["close"]))
+        return rows
+
+    def _summary(
+        self, code: str, date: datetime.date, errors: Dict[str, str]
+    ) -> Optional[Dict[str, object]]:
+        try:
+            with METRICS.timer("get_daily_summary", type(self.data_source).__name__):
+                return self.data_source.get_daily_summary(code, date)
+        except Exception as ex:
+            # Each code is fetched by one worker thread, so keys never collide
+            errors[code] = f"Daily summary: {ex}"
+            return None
+
+    @staticmethod
+    def _build_results(rows: List[SummaryRow], date: datetime.date) -> List[DayResult]:
+        if not rows:
+            return []
+        codes = [row[0] for row in rows]
+        columns = list(zip(*rows))[1:]
+        base, high, low, close = (np.array(column, dtype=np.float64) for column in columns)
+        limit_up, limit_down = calculate_limits_batch(base)
+        flags = classify_batch(high, low, close, limit_up, limit_down)
+        return [
+            DayResult(
+                code=code,
+                date=date,
+                base_price=float(base[i]),
+                limit_up=float(limit_up[i]),
+                limit_down=float(limit_down[i]),
+                high=float(high[i]),
+                low=float(low[i]),
+                close=float(close[i]),
+                hit_up=bool(flags.hit_up[i]),
+                hit_down=bool(flags.hit_down[i]),
+                close_up=bool(flags.close_up[i]),
+                close_down=bool(flags.close_down[i]),
+            )
+            for i, code in enumerate(codes)
+        ]
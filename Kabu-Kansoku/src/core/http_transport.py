@@ -0,0 +1,137 @@
+"""HTTP client construction and retry helpers for broker data sources.
+
+Clients created here share one tuned configuration: a bounded
+keep-alive connection pool, explicit timeouts, and HTTP/2 when the
+optional ``h2`` package is installed (the protocol is still negotiated
+with the server, so HTTP/1.1-only servers keep working). Requests that
+fail with a transport error or a retryable status are retried with
+jittered exponential backoff.
+
+Pass an ``httpx.MockTransport`` as ``transport`` to run against a local
+handler instead of the network.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+DEFAULT_TIMEOUT = httpx.Timeout(connect=5.0, read=10.0, write=10.0, pool=5.0)
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=32,
+    max_keepalive_connections=16,
+    keepalive_expiry=60.0,
+)
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def http2_available() -> bool:
+    """Return True if httpx can speak HTTP/2 (requires the ``h2`` package)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_client(transport: Optional[httpx.BaseTransport] = None) -> httpx.Client:
+    """Return a pooled, keep-alive ``httpx.Client``."""
+    return httpx.Client(
+        http2=transport is None and http2_available(),
+        timeout=DEFAULT_TIMEOUT,
+        limits=DEFAULT_LIMITS,
+        transport=transport,
+    )
+
+
+def create_async_client(
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    """Return a pooled, keep-alive ``httpx.AsyncClient``."""
+    return httpx.AsyncClient(
+        http2=transport is None and http2_available(),
+        timeout=DEFAULT_TIMEOUT,
+        limits=DEFAULT_LIMITS,
+        transport=transport,
+    )
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How many times to try a request and how long to wait in between."""
+
+    attempts: int = 3
+    backoff: float = 0.5  # seconds, doubled after each failure
+    max_backoff: float = 8.0
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Return the wait before retry number ``attempt`` (starting at 1).
+
+        Uses "full jitter": a random delay up to the exponential backoff,
+        or the server's ``Retry-After`` seconds if it sent one.
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return random.uniform(0.0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+
+DEFAULT_RETRY = RetryPolicy()
+
+
+def _should_retry(response: httpx.Response) -> bool:
+    return response.status_code in RETRY_STATUSES
+
+
+def request_with_retry(
+    client: httpx.Client,
+    method: str,
+    url: str,
+    retry: RetryPolicy = DEFAULT_RETRY,
+    **kwargs,
+) -> httpx.Response:
+    """Send a request, retrying transport errors and retryable statuses.
+
+    The last response is returned after the final attempt (callers still
+    call ``raise_for_status``); the last transport error is re-raised.
+    """
+    for attempt in range(1, retry.attempts + 1):
+        try:
+            response = client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            if attempt == retry.attempts:
+                raise
+            time.sleep(retry.delay(attempt))
+            continue
+        if not _should_retry(response) or attempt == retry.attempts:
+            return response
+        response.close()
+        time.sleep(retry.delay(attempt, response))
+    raise ValueError("RetryPolicy.attempts must be at least 1")
+
+
+async def async_request_with_retry(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    retry: RetryPolicy = DEFAULT_RETRY,
+    **kwargs,
+) -> httpx.Response:
+    """Async counterpart of ``request_with_retry``."""
+    for attempt in range(1, retry.attempts + 1):
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            if attempt == retry.attempts:
+                raise
+            await asyncio.sleep(retry.delay(attempt))
+            continue
+        if not _should_retry(response) or attempt == retry.attempts:
+            return response
+        await response.aclose()
+        await asyncio.sleep(retry.delay(attempt, response))
+    raise ValueError("RetryPolicy.attempts must be at least 1")
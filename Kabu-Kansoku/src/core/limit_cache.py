@@ -0,0 +1,133 @@
+"""Per-session cache of base prices and daily limits.
+
+Base prices change only once per trading day, so the cache fetches them
+in bulk the first time a code is seen and memoises the
+``(limit_up, limit_down)`` pair for each ``(code, base_price)``. All
+entries are dropped when the JST calendar date changes.
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .data_source_base import DataSource
+from .limit_rules import calculate_limits_batch
+from .market_time import trading_day
+from .metrics import METRICS
+
+
+class LimitCache:
+    """Cache base prices and limits between a data source and the dashboard."""
+
+    def __init__(
+        self,
+        data_source: DataSource,
+        clock: Callable[[], datetime.datetime] = datetime.datetime.now,
+    ) -> None:
+        self.data_source = data_source
+        self.clock = clock
+        self.day: Optional[datetime.date] = None
+        self._base_prices: Dict[str, Optional[float]] = {}
+        self._limits: Dict[Tuple[str, float], Tuple[float, float]] = {}
+        # Counters, reset on day rollover
+        self.base_price_calls = 0
+        self.base_price_codes = 0
+        self.limit_hits = 0
+        self.limit_misses = 0
+
+    def clear(self) -> None:
+        """Drop all cached values and reset the counters."""
+        self._base_prices.clear()
+        self._limits.clear()
+        self.base_price_calls = 0
+        self.base_price_codes = 0
+        self.limit_hits = 0
+        self.limit_misses = 0
+
+    def _check_day(self) -> None:
+        today = trading_day(self.clock())
+        if today != self.day:
+            self.clear()
+            self.day = today
+
+    def base_prices(self, codes: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Return base prices, fetching the codes not yet cached in one call.
+
+        A code for which the data source has no base price is cached as
+        None so it is not requested again on every tick.
+        """
+        self._check_day()
+        codes = list(codes)
+        missing = [code for code in dict.fromkeys(codes) if code not in self._base_prices]
+        if missing:
+            with METRICS.timer("get_base_prices", type(self.data_source).__name__):
+                fetched = self.data_source.get_base_prices(missing)
+            self.base_price_calls += 1
+            self.base_price_codes += len(missing)
+            for code in missing:
+                self._base_prices[code] = fetched.get(code)
+        return {code: self._base_prices[code] for code in codes}
+
+    def cached_base_prices(self) -> Dict[str, Optional[float]]:
+        """Return today's base prices fetched so far, keyed by code."""
+        self._check_day()
+        return dict(self._base_prices)
+
+    def seed(self, base_prices: Dict[str, Optional[float]]) -> None:
+        """Pre-load today's base prices, e.g. from a snapshot, so they are not fetched."""
+        self._check_day()
+        self._base_prices.update(base_prices)
+
+    def limits(
+        self, codes: Sequence[str], prices: Sequence[float]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (limit_up, limit_down) arrays aligned with ``codes``.
+
+        ``prices`` are the current prices. Codes without a base price fall
+        back to the current price, as the dashboard has always done; those
+        limits change with the price and are not memoised.
+        """
+        known = self.base_prices(codes)
+        bases = np.empty(len(codes), dtype=np.float64)
+        up = np.empty(len(codes), dtype=np.float64)
+        down = np.empty(len(codes), dtype=np.float64)
+        compute: List[int] = []
+        for i, (code, price) in enumerate(zip(codes, prices)):
+            base = known[code]
+            if not base:
+                bases[i] = price
+                compute.append(i)
+                continue
+            cached = self._limits.get((code, base))
+            if cached is None:
+                self.limit_misses += 1
+                bases[i] = base
+                compute.append(i)
+            else:
+                self.limit_hits += 1
+                up[i], down[i] = cached
+        if compute:
+            with METRICS.timer("calculate_limits"):
+                new_up, new_down = calculate_limits_batch(bases[compute])
+            up[compute] = new_up
+            down[compute] = new_down
+            for i, limit_up, limit_down in zip(compute, new_up.tolist(), new_down.tolist()):
+                base = known[codes[i]]
+                if base:
+                    self._limits[(codes[i], base)] = (limit_up, limit_down)
+        return up, down
+
+    def stats(self) -> Dict[str, object]:
+        """Return counters for monitoring the cache."""
+        lookups = self.limit_hits + self.limit_misses
+        return {
+            "day": self.day,
+            "base_price_calls": self.base_price_calls,
+            "base_price_codes": self.base_price_codes,
+            "limit_hits": self.limit_hits,
+            "limit_misses": self.limit_misses,
+            "limit_hit_rate": self.limit_hits / lookups if lookups else 0.0,
+        }
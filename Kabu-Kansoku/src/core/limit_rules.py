@@ -12,8 +12,11 @@ References:
 
 from __future__ import annotations
 
+from bisect import bisect_left
 from typing import Tuple
 
+import numpy as np
+
 
 # Simplified limit table: (threshold, limit)
 # Rows are interpreted as: if base_price <= threshold, then the limit value is limit.
@@ -38,19 +41,70 @@ _LIMIT_TABLE = [
 ]
 
 
+# Simplified tick size table (呼値の単位) for ordinary issues: (threshold, tick).
+# Same "price <= threshold" interpretation as _LIMIT_TABLE. TOPIX100 issues
+# use finer ticks, which are not modelled here.
+_TICK_TABLE = [
+    (3000, 1),
+    (5000, 5),
+    (30000, 10),
+    (50000, 50),
+    (300000, 100),
+    (500000, 500),
+    (3_000_000, 1000),
+    (5_000_000, 5000),
+    (30_000_000, 10000),
+    (50_000_000, 50000),
+    (float("inf"), 100000),
+]
+
+# Lookup arrays derived from _LIMIT_TABLE. bisect_left/searchsorted(side="left")
+# return the first row whose threshold is >= base_price, matching the
+# "base_price <= threshold" rule above.
+_THRESHOLDS = [threshold for threshold, _ in _LIMIT_TABLE]
+_LIMITS = [limit for _, limit in _LIMIT_TABLE]
+_THRESHOLD_ARRAY = np.array(_THRESHOLDS, dtype=np.float64)
+_LIMIT_ARRAY = np.array(_LIMITS, dtype=np.float64)
+_TICK_THRESHOLDS = [threshold for threshold, _ in _TICK_TABLE]
+_TICKS = [tick for _, tick in _TICK_TABLE]
+_TICK_THRESHOLD_ARRAY = np.array(_TICK_THRESHOLDS, dtype=np.float64)
+_TICK_ARRAY = np.array(_TICKS, dtype=np.float64)
+
+
 def calculate_limits(base_price: float) -> Tuple[float, float]:
     """Compute the daily upper and lower price limits given a base price.
 
     :param base_price: The base price (previous close or specified base).
     :return: (limit_up, limit_down)
     """
-    limit_value = None
-    for threshold, limit in _LIMIT_TABLE:
-        if base_price <= threshold:
-            limit_value = limit
-            break
-    if limit_value is None:
-        limit_value = _LIMIT_TABLE[-1][1]
+    index = bisect_left(_THRESHOLDS, base_price)
+    limit_value = _LIMITS[min(index, len(_LIMITS) - 1)]
     limit_up = base_price + limit_value
     limit_down = max(0.0, base_price - limit_value)
-    return limit_up, limit_down
\ No newline at end of file
+    return limit_up, limit_down
+
+
+def calculate_limits_batch(base_prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorised ``calculate_limits`` for an array of base prices.
+
+    :param base_prices: Array of base prices.
+    :return: (limit_up, limit_down) as float64 arrays of the same shape.
+    """
+    base = np.asarray(base_prices, dtype=np.float64)
+    index = np.searchsorted(_THRESHOLD_ARRAY, base, side="left")
+    limit_value = _LIMIT_ARRAY[np.minimum(index, len(_LIMIT_ARRAY) - 1)]
+    limit_up = base + limit_value
+    limit_down = np.maximum(0.0, base - limit_value)
+    return limit_up, limit_down
+
+
+def tick_size(price: float) -> float:
+    """Return the tick size (minimum price increment) at ``price``."""
+    index = bisect_left(_TICK_THRESHOLDS, price)
+    return float(_TICKS[min(index, len(_TICKS) - 1)])
+
+
+def tick_size_batch(prices: np.ndarray) -> np.ndarray:
+    """Vectorised ``tick_size`` for an array of prices."""
+    index = np.searchsorted(_TICK_THRESHOLD_ARRAY, np.asarray(prices, dtype=np.float64), side="left")
+    return _TICK_ARRAY[np.minimum(index, len(_TICK_ARRAY) - 1)]
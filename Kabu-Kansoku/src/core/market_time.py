@@ -0,0 +1,38 @@
+"""Time helpers for the Tokyo market.
+
+All trading-day boundaries in the application use Japan Standard Time,
+regardless of the local time zone of the machine running it.
+"""
+
+from __future__ import annotations
+
+import datetime
+
+JST = datetime.timezone(datetime.timedelta(hours=9), "JST")
+
+
+def now_jst() -> datetime.datetime:
+    """Return the current time as an aware JST datetime."""
+    return datetime.datetime.now(JST)
+
+
+def trading_day(now: datetime.datetime) -> datetime.date:
+    """Return the JST calendar date for an aware or naive local datetime."""
+    return now.astimezone(JST).date()
+
+
+def end_of_trading_day(now: datetime.datetime) -> datetime.datetime:
+    """Return the next JST midnight after ``now``."""
+    return datetime.datetime.combine(
+        trading_day(now) + datetime.timedelta(days=1), datetime.time(), JST
+    )
+
+
+# The cash session closes at 15:30 JST; leave a margin for closing prices to settle.
+SETTLEMENT_TIME = datetime.time(15, 45)
+
+
+def after_close(now: datetime.datetime) -> bool:
+    """Return True once the day's closing prices are final (weekdays only)."""
+    local = now.astimezone(JST)
+    return local.weekday() < 5 and local.time() >= SETTLEMENT_TIME
@@ -0,0 +1,181 @@
+"""Latency histograms for the hot path.
+
+Stages such as fetching quotes, computing limits, writing to SQLite and
+patching the table model record their durations in a shared
+``Metrics`` registry, keyed by stage and (where it matters) data source:
+
+    with METRICS.timer("get_quotes", source="TachibanaDataSource"):
+        ...
+
+Histograms use fixed log-spaced buckets (ten per decade from 10 µs to
+100 s), so recording is a bisect and an increment under a lock and
+memory does not grow with the number of samples. Percentiles are
+interpolated within a bucket, i.e. accurate to about ±12%.
+
+A snapshot can be exported as Prometheus text exposition format or as
+JSON lines.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+#: Upper bucket bounds in seconds: 10 per decade from 1e-5 to 1e2.
+BUCKETS = [10.0 ** (exponent / 10) for exponent in range(-50, 21)]
+# Bounds exported to Prometheus (every fifth: 10 µs, 31.6 µs, 100 µs, ...)
+_EXPORTED = BUCKETS[::5]
+
+
+class LatencyHistogram:
+    """Thread-safe histogram of durations in seconds."""
+
+    def __init__(self) -> None:
+        # One extra bucket for values above the last bound
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Approximate the ``q`` quantile (0..1); NaN when empty."""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            largest = self.max
+        if count == 0:
+            return math.nan
+        rank = q * count
+        seen = 0
+        for index, bucket in enumerate(counts):
+            if bucket and seen + bucket >= rank:
+                upper = BUCKETS[index] if index < len(BUCKETS) else largest
+                lower = BUCKETS[index - 1] if index > 0 else 0.0
+                # Geometric interpolation inside the bucket, capped at the max seen
+                fraction = (rank - seen) / bucket
+                value = lower * (upper / lower) ** fraction if lower > 0 else upper * fraction
+                return min(value, largest)
+            seen += bucket
+        return largest
+
+    def cumulative(self) -> Tuple[List[int], int, float]:
+        """Cumulative counts at each exported bound, total count and sum."""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            total = self.total
+        cumulative = []
+        running = 0
+        position = 0
+        for bound in _EXPORTED:
+            while position < len(BUCKETS) and BUCKETS[position] <= bound:
+                running += counts[position]
+                position += 1
+            cumulative.append(running)
+        return cumulative, count, total
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Registry of ``LatencyHistogram`` objects keyed by (stage, source)."""
+
+    def __init__(self) -> None:
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str, source: str = "") -> LatencyHistogram:
+        key = (stage, source)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def observe(self, stage: str, seconds: float, source: str = "") -> None:
+        self.histogram(stage, source).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, source: str = "") -> Iterator[None]:
+        """Record the duration of the ``with`` block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, source)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def _items(self) -> List[Tuple[Tuple[str, str], LatencyHistogram]]:
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """Per (stage, source): count, mean, p50/p95/p99 and max in milliseconds."""
+        rows = []
+        for (stage, source), histogram in self._items():
+            count = histogram.count
+            rows.append(
+                {
+                    "stage": stage,
+                    "source": source,
+                    "count": count,
+                    "mean_ms": histogram.total / count * 1000.0 if count else math.nan,
+                    "p50_ms": histogram.quantile(0.50) * 1000.0,
+                    "p95_ms": histogram.quantile(0.95) * 1000.0,
+                    "p99_ms": histogram.quantile(0.99) * 1000.0,
+                    "max_ms": histogram.max * 1000.0,
+                }
+            )
+        return rows
+
+    def to_prometheus(self, name: str = "kabu_stage_seconds") -> str:
+        """Return all histograms in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {name} Duration of hot-path stages.",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage, source), histogram in self._items():
+            labels = f'stage="{_label(stage)}",source="{_label(source)}"'
+            cumulative, count, total = histogram.cumulative()
+            for bound, value in zip(_EXPORTED, cumulative):
+                lines.append(f'{name}_bucket{{{labels},le="{bound:.6g}"}} {value}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {total!r}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self, ts: Optional[float] = None) -> str:
+        """Return the snapshot as one JSON object per line, stamped with ``ts``."""
+        ts = time.time() if ts is None else ts
+        lines = []
+        for row in self.snapshot():
+            # JSON has no NaN; empty histograms report null
+            for key, value in row.items():
+                if isinstance(value, float) and math.isnan(value):
+                    row[key] = None
+            lines.append(json.dumps({"ts": ts, **row}))
+        return "".join(line + "\n" for line in lines)
+
+
+#: Registry shared by the application's hot-path stages.
+METRICS = Metrics()
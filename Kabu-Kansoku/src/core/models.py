@@ -1,17 +1,122 @@
 """Data models used by the application.
 
-The dataclasses defined here represent the results of daily trading and
-other domain objects. They can be extended as needed.
+The dataclasses defined here represent quotes, the results of daily
+trading and other domain objects. They can be extended as needed.
+
+All of them use ``__slots__`` because they are created in large numbers
+while polling: a slotted instance has no per-instance ``__dict__``.
+``QuoteBatch`` goes further and stores a whole polling round as parallel
+NumPy arrays instead of one object per code.
 """
 
 from __future__ import annotations
 
 import datetime
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass(slots=True)
+class Quote:
+    """Latest quote for one code.
+
+    ``timestamp`` is POSIX time (``time.time()``) rather than a datetime,
+    which keeps quote creation cheap; for the same reason the class is not
+    frozen, since frozen dataclasses set every field through
+    ``object.__setattr__``. ``base_price`` is only filled in when the data
+    source was asked for it.
+    """
+
+    code: str
+    current_price: float
+    high: Optional[float] = None
+    low: Optional[float] = None
+    volume: int = 0
+    timestamp: float = 0.0
+    base_price: Optional[float] = None
+
+
+def _float_column(values: Iterable[Optional[float]]) -> np.ndarray:
+    """Return a float64 array with None mapped to NaN."""
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+@dataclass(slots=True)
+class QuoteBatch:
+    """Quotes for many codes as a struct of arrays.
+
+    Row ``i`` of every array belongs to ``codes[i]``. Missing prices are
+    NaN.
+    """
+
+    codes: List[str]
+    price: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    volume: np.ndarray
+    timestamp: np.ndarray
+    base_price: np.ndarray
 
+    @classmethod
+    def empty(cls) -> "QuoteBatch":
+        return cls.from_quotes([])
 
-@dataclass
+    @classmethod
+    def from_quotes(cls, quotes: Sequence[Quote]) -> "QuoteBatch":
+        return cls(
+            codes=[q.code for q in quotes],
+            price=np.array([q.current_price for q in quotes], dtype=np.float64),
+            high=_float_column(q.high for q in quotes),
+            low=_float_column(q.low for q in quotes),
+            volume=np.array([q.volume for q in quotes], dtype=np.int64),
+            timestamp=np.array([q.timestamp for q in quotes], dtype=np.float64),
+            base_price=_float_column(q.base_price for q in quotes),
+        )
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def quote(self, i: int) -> Quote:
+        """Materialise row ``i`` as a ``Quote``."""
+
+        def opt(value: float) -> Optional[float]:
+            return None if np.isnan(value) else float(value)
+
+        return Quote(
+            code=self.codes[i],
+            current_price=float(self.price[i]),
+            high=opt(self.high[i]),
+            low=opt(self.low[i]),
+            volume=int(self.volume[i]),
+            timestamp=float(self.timestamp[i]),
+            base_price=opt(self.base_price[i]),
+        )
+
+    def take(self, rows) -> "QuoteBatch":
+        """Return a new batch with the given rows (indices or boolean mask)."""
+        rows = np.asarray(rows)
+        rows = np.flatnonzero(rows) if rows.dtype == np.bool_ else rows.astype(np.int64)
+        return QuoteBatch(
+            codes=[self.codes[i] for i in rows.tolist()],
+            price=self.price[rows],
+            high=self.high[rows],
+            low=self.low[rows],
+            volume=self.volume[rows],
+            timestamp=self.timestamp[rows],
+            base_price=self.base_price[rows],
+        )
+
+    def get(self, code: str) -> Optional[Quote]:
+        """Return the quote for ``code``, or None if it is not in the batch."""
+        try:
+            return self.quote(self.codes.index(code))
+        except ValueError:
+            return None
+
+
+@dataclass(slots=True)
 class DayResult:
     code: str
     date: datetime.date
@@ -27,9 +132,20 @@ class DayResult:
     close_down: bool
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Event:
     ts: datetime.datetime
     code: str
     price: float
-    event_type: str  # e.g. "hit_up", "hit_down"
\ No newline at end of file
+    event_type: str  # "hit_up", "release_up", "retouch_up" or the "_down" variants
+
+
+@dataclass(slots=True)
+class Streaks:
+    """Consecutive-day counts (連続) of each flag, ending at the latest result."""
+
+    code: str
+    hit_up: int
+    hit_down: int
+    close_up: int
+    close_down: int
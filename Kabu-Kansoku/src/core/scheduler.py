@@ -0,0 +1,298 @@
+"""Polling schedules for large watchlists.
+
+Polling every code at one fixed interval makes the request volume grow
+with the size of the watchlist. The schedules here poll codes near a
+limit often and far-away codes rarely:
+
+- ``TieredSchedule`` sorts codes into a few priority tiers, each polled
+  at its own interval;
+- ``AdaptiveSchedule`` gives every code its own next poll time derived
+  from its distance to the limit, and caps the request rate globally.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class Tier(NamedTuple):
+    """Codes whose distance ratio is at most ``max_distance`` are polled every ``interval`` seconds."""
+
+    name: str
+    max_distance: float
+    interval: float
+
+
+#: Default tiers. Distances are fractions of half the limit band, so 0.2
+#: means the price has moved 80% of the way from the base to a limit.
+DEFAULT_TIERS = (
+    Tier("near", 0.2, 5.0),
+    Tier("mid", 0.5, 30.0),
+    Tier("far", math.inf, 120.0),
+)
+
+
+def distance_ratio(price, limit_up, limit_down) -> np.ndarray:
+    """Distance to the nearest limit as a fraction of half the limit band.
+
+    0 means the price is at a limit and 1 that it is at the middle of the
+    band (normally the base price). NaN prices give NaN.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    limit_up = np.asarray(limit_up, dtype=np.float64)
+    limit_down = np.asarray(limit_down, dtype=np.float64)
+    half_band = (limit_up - limit_down) / 2.0
+    distance = np.minimum(limit_up - price, price - limit_down)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.maximum(distance, 0.0) / half_band
+
+
+class Schedule(ABC):
+    """Decides which codes the poller fetches on each tick."""
+
+    @property
+    @abstractmethod
+    def tick_interval(self) -> float:
+        """Seconds between calls to ``due``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_codes(self, codes: Iterable[str]) -> None:
+        """Replace the scheduled codes; new codes are due immediately."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Return the codes to fetch now."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, codes: Sequence[str], ratios: np.ndarray) -> None:
+        """Reschedule ``codes`` from their latest ``distance_ratio`` values."""
+        raise NotImplementedError
+
+    def set_codes_per_request(self, codes_per_request: int) -> None:
+        """Take the data source's batch size into account; ignored by default."""
+
+
+class TieredSchedule(Schedule):
+    """Assign codes to tiers and report which codes are due for polling.
+
+    New codes start in the first tier so they are fetched on the next
+    tick; after that ``update`` moves each code to the tier matching its
+    latest distance ratio. Tiers must be ordered by ``max_distance`` and
+    the last one should have ``max_distance=math.inf``.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[Tier] = DEFAULT_TIERS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not tiers:
+            raise ValueError("at least one tier is required")
+        self.tiers = tuple(tiers)
+        self.clock = clock
+        self.codes: List[str] = []
+        self.index_of: Dict[str, int] = {}
+        self.tier = np.zeros(0, dtype=np.int8)
+        self._bounds = np.array([tier.max_distance for tier in self.tiers[:-1]])
+        self._next_due = [0.0] * len(self.tiers)
+
+    @property
+    def tick_interval(self) -> float:
+        """Interval at which ``due`` should be called: the fastest tier's."""
+        return min(tier.interval for tier in self.tiers)
+
+    def set_codes(self, codes: Iterable[str]) -> None:
+        """Replace the scheduled codes, keeping the tiers of known ones."""
+        codes = list(dict.fromkeys(codes))
+        tier = np.zeros(len(codes), dtype=np.int8)
+        for i, code in enumerate(codes):
+            old = self.index_of.get(code)
+            if old is not None:
+                tier[i] = self.tier[old]
+        self.codes = codes
+        self.index_of = {code: i for i, code in enumerate(codes)}
+        self.tier = tier
+        if 0 in tier:
+            # Fetch new codes on the next tick
+            self._next_due[0] = 0.0
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Return codes in tiers whose interval has elapsed, and restart those tiers."""
+        now = self.clock() if now is None else now
+        due_tiers = [i for i, next_due in enumerate(self._next_due) if next_due <= now]
+        for i in due_tiers:
+            self._next_due[i] = now + self.tiers[i].interval
+        if not due_tiers:
+            return []
+        mask = np.isin(self.tier, due_tiers)
+        return [self.codes[i] for i in np.flatnonzero(mask).tolist()]
+
+    def update(self, codes: Sequence[str], ratios: np.ndarray) -> None:
+        """Move ``codes`` to the tiers matching their distance ratios.
+
+        Codes with a NaN ratio (no price this tick) keep their tier.
+        """
+        indices = np.array([self.index_of.get(code, -1) for code in codes], dtype=np.int64)
+        ratios = np.asarray(ratios, dtype=np.float64)
+        keep = (indices >= 0) & ~np.isnan(ratios)
+        new_tier = np.searchsorted(self._bounds, ratios[keep], side="left")
+        self.tier[indices[keep]] = new_tier
+
+    def counts(self) -> Dict[str, int]:
+        """Number of codes per tier name."""
+        counts = np.bincount(self.tier, minlength=len(self.tiers))
+        return {tier.name: int(count) for tier, count in zip(self.tiers, counts)}
+
+
+class AdaptiveSchedule(Schedule):
+    """Poll each code at an interval set by its distance to the limit.
+
+    A code at a limit is polled every ``min_interval`` seconds, one at the
+    middle of the band every ``max_interval`` seconds, with the interval
+    growing geometrically in between. Next-due times are kept in a heap.
+
+    At most ``max_requests_per_second`` requests of ``codes_per_request``
+    codes are issued on average (a token bucket allowing one second of
+    burst). Codes beyond the budget stay queued, earliest due first, and
+    are counted in ``throttled``. ``codes_per_request`` must match the
+    data source (``DataSource.codes_per_request``); the poller sets it
+    once the data source is ready.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        max_requests_per_second: float = 10.0,
+        codes_per_request: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("need 0 < min_interval <= max_interval")
+        if max_requests_per_second <= 0:
+            raise ValueError("request budget must be positive")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_requests_per_second = max_requests_per_second
+        self.set_codes_per_request(codes_per_request)
+        self.clock = clock
+        self.codes: List[str] = []
+        # Entries are (due time, sequence, code); an entry is stale once the
+        # code has been pushed again or removed, i.e. when its sequence is
+        # no longer the code's latest.
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = 0
+        self._latest: Dict[str, int] = {}
+        self.due_at: Dict[str, float] = {}
+        self.interval_of: Dict[str, float] = {}
+        self._tokens = max_requests_per_second
+        self._refilled: Optional[float] = None
+        self.throttled = 0
+
+    @property
+    def tick_interval(self) -> float:
+        return self.min_interval
+
+    def set_codes_per_request(self, codes_per_request: int) -> None:
+        if codes_per_request < 1:
+            raise ValueError("request budget must be positive")
+        self.codes_per_request = codes_per_request
+
+    def interval(self, ratios) -> np.ndarray:
+        """Poll interval for each distance ratio."""
+        ratios = np.clip(np.asarray(ratios, dtype=np.float64), 0.0, 1.0)
+        return self.min_interval * (self.max_interval / self.min_interval) ** ratios
+
+    def _push(self, code: str, due: float) -> None:
+        self.due_at[code] = due
+        self._sequence += 1
+        self._latest[code] = self._sequence
+        heapq.heappush(self._heap, (due, self._sequence, code))
+
+    def set_codes(self, codes: Iterable[str]) -> None:
+        codes = list(dict.fromkeys(codes))
+        keep = set(codes)
+        for code in [code for code in self.due_at if code not in keep]:
+            del self.due_at[code]
+            del self._latest[code]
+            self.interval_of.pop(code, None)
+        for code in codes:
+            if code not in self.due_at:
+                self._push(code, 0.0)
+        self.codes = codes
+        self._compact()
+
+    def _compact(self) -> None:
+        """Drop stale heap entries once they outnumber the live ones."""
+        if len(self._heap) <= 2 * len(self.due_at) + 64:
+            return
+        self._heap = [entry for entry in self._heap if self._latest.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
+
+    def _refill(self, now: float) -> None:
+        if self._refilled is not None:
+            elapsed = max(0.0, now - self._refilled)
+            self._tokens = min(
+                self.max_requests_per_second,
+                self._tokens + elapsed * self.max_requests_per_second,
+            )
+        self._refilled = now
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Pop due codes within the request budget, earliest due first.
+
+        Returned codes are provisionally rescheduled at their current
+        interval so a failed fetch does not drop them; ``update`` replaces
+        that with a time based on the new price.
+        """
+        now = self.clock() if now is None else now
+        self._refill(now)
+        budget = int(self._tokens) * self.codes_per_request
+        result: List[str] = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, sequence, code = heap[0]
+            if self._latest.get(code) != sequence:
+                heapq.heappop(heap)
+                continue
+            if len(result) == budget:
+                break
+            heapq.heappop(heap)
+            result.append(code)
+        if heap and heap[0][0] <= now and len(result) == budget:
+            self.throttled += sum(1 for due in self.due_at.values() if due <= now) - len(result)
+        self._tokens -= math.ceil(len(result) / self.codes_per_request)
+        for code in result:
+            self._push(code, now + self.interval_of.get(code, self.min_interval))
+        return result
+
+    def update(self, codes: Sequence[str], ratios: np.ndarray, now: Optional[float] = None) -> None:
+        """Set the next poll of ``codes`` from their distance ratios.
+
+        Codes with a NaN ratio keep their previous interval.
+        """
+        now = self.clock() if now is None else now
+        intervals = self.interval(ratios)
+        for code, ratio, interval in zip(codes, np.asarray(ratios).tolist(), intervals.tolist()):
+            if code not in self.due_at:
+                continue
+            if math.isnan(ratio):
+                interval = self.interval_of.get(code, self.min_interval)
+            self.interval_of[code] = interval
+            self._push(code, now + interval)
+        self._compact()
+
+    def counts(self) -> Dict[str, int]:
+        """Number of scheduled codes and of codes currently overdue."""
+        now = self.clock()
+        overdue = sum(1 for due in self.due_at.values() if due <= now)
+        return {"scheduled": len(self.due_at), "overdue": overdue}
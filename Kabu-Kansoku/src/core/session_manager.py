@@ -0,0 +1,260 @@
+"""Caching and refresh of the Tachibana virtual URL (仮想URL).
+
+The virtual URL returned by login is valid for the trading day. The
+``SessionManager`` keeps the current one in memory and in a
+``SessionStore`` so that a restart on the same day skips login, and
+re-authenticates in a background thread shortly before it expires so
+that polling does not stall on an interactive login. A session inside
+the refresh margin is still handed out until it actually expires; a
+failed background refresh is retried with exponential backoff a limited
+number of times.
+
+Two stores are provided: ``KeyringSessionStore`` keeps the session in
+the OS keychain (encrypted by the platform) and is the default.
+``FileSessionStore`` is an opt-in for systems without a keyring backend;
+it writes the virtual URL as **plaintext** JSON, protected only by
+owner-only file permissions.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .market_time import now_jst
+
+
+@dataclass(frozen=True)
+class VirtualSession:
+    """A virtual URL and the time at which it stops being valid."""
+
+    virtual_url: str
+    expires_at: datetime.datetime
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"virtual_url": self.virtual_url, "expires_at": self.expires_at.isoformat()}
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> "VirtualSession":
+        data = json.loads(text)
+        return cls(
+            virtual_url=data["virtual_url"],
+            expires_at=datetime.datetime.fromisoformat(data["expires_at"]),
+        )
+
+
+class SessionStore(ABC):
+    """Persistent storage for a ``VirtualSession``."""
+
+    @abstractmethod
+    def load(self) -> Optional[VirtualSession]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self, session: VirtualSession) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class KeyringSessionStore(SessionStore):
+    """Store the session in the OS keyring next to the credentials.
+
+    ``keyring`` is imported on first use to keep application start-up fast.
+    """
+
+    def __init__(self, service: str = "tachibana", key: str = "session") -> None:
+        self.service = service
+        self.key = key
+
+    def load(self) -> Optional[VirtualSession]:
+        import keyring
+
+        text = keyring.get_password(self.service, self.key)
+        return VirtualSession.from_json(text) if text else None
+
+    def save(self, session: VirtualSession) -> None:
+        import keyring
+
+        keyring.set_password(self.service, self.key, session.to_json())
+
+    def clear(self) -> None:
+        import keyring
+        import keyring.errors
+
+        try:
+            keyring.delete_password(self.service, self.key)
+        except keyring.errors.PasswordDeleteError:
+            pass
+
+
+class FileSessionStore(SessionStore):
+    """Store the session in a plaintext JSON file with owner-only permissions.
+
+    The file is not encrypted: anyone who can read it can use the virtual
+    URL until it expires. Use it only where no keyring backend exists.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def load(self) -> Optional[VirtualSession]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return VirtualSession.from_json(f.read())
+        except FileNotFoundError:
+            return None
+
+    def save(self, session: VirtualSession) -> None:
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(session.to_json())
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class SessionManager:
+    """Hand out a valid virtual session, logging in only when needed.
+
+    :param authenticate: Performs the actual login and returns a session.
+    :param store: Where sessions are persisted across restarts (optional).
+    :param refresh_margin: How long before expiry to refresh proactively.
+    :param retry_delay: Delay before the first retry of a failed
+        background refresh; doubled for each further retry.
+    :param max_retries: Background refresh attempts after the first
+        failure before giving up until the next login.
+    """
+
+    def __init__(
+        self,
+        authenticate: Callable[[], VirtualSession],
+        store: Optional[SessionStore] = None,
+        refresh_margin: datetime.timedelta = datetime.timedelta(minutes=15),
+        clock: Callable[[], datetime.datetime] = now_jst,
+        retry_delay: float = 30.0,
+        max_retries: int = 5,
+    ) -> None:
+        self.authenticate = authenticate
+        self.store = store
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.session: Optional[VirtualSession] = None
+        self.logins = 0
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._failures = 0
+
+    def _usable(self, session: Optional[VirtualSession]) -> bool:
+        return session is not None and self.clock() < session.expires_at - self.refresh_margin
+
+    def _valid(self, session: Optional[VirtualSession]) -> bool:
+        return session is not None and self.clock() < session.expires_at
+
+    def current(self) -> Optional[VirtualSession]:
+        """Return the in-memory session if it has not expired, without blocking."""
+        session = self.session
+        return session if self._valid(session) else None
+
+    def get(self) -> VirtualSession:
+        """Return a session that has not expired, logging in only if there is none.
+
+        A session inside the refresh margin is returned as is; replacing
+        it early is left to the background refresh.
+        """
+        with self._lock:
+            if self._valid(self.session):
+                return self.session
+            if self.session is None and self.store is not None:
+                try:
+                    stored = self.store.load()
+                except Exception as ex:
+                    print(f"Could not load cached session: {ex}")
+                    stored = None
+                if self._valid(stored):
+                    self._set(stored)
+                    return stored
+            return self.refresh()
+
+    def refresh(self) -> VirtualSession:
+        """Log in again and replace the current session."""
+        with self._lock:
+            session = self.authenticate()
+            self.logins += 1
+            self._failures = 0
+            self._set(session)
+            if self.store is not None:
+                try:
+                    self.store.save(session)
+                except Exception as ex:
+                    print(f"Could not cache session: {ex}")
+            return session
+
+    def invalidate(self, stale: Optional[VirtualSession] = None) -> None:
+        """Forget the current session, e.g. after the server rejected it.
+
+        With ``stale``, do nothing unless that session is still the current
+        one, so callers that saw the same rejection log in only once.
+        """
+        with self._lock:
+            if stale is not None and self.session is not stale:
+                return
+            self.session = None
+            self._cancel_timer()
+            if self.store is not None:
+                try:
+                    self.store.clear()
+                except Exception as ex:
+                    print(f"Could not clear cached session: {ex}")
+
+    def close(self) -> None:
+        """Stop the proactive refresh timer."""
+        with self._lock:
+            self._cancel_timer()
+
+    def _set(self, session: VirtualSession) -> None:
+        self.session = session
+        self._cancel_timer()
+        due = (session.expires_at - self.refresh_margin - self.clock()).total_seconds()
+        # Already inside the margin: a new login would be no better, so the
+        # session is used until it expires and ``get`` logs in then
+        if due > 0:
+            self._schedule(due)
+
+    def _schedule(self, delay: float) -> None:
+        self._timer = threading.Timer(delay, self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception as ex:
+            with self._lock:
+                self._cancel_timer()
+                self._failures += 1
+                if self._failures > self.max_retries:
+                    print(f"Proactive session refresh failed, giving up: {ex}")
+                    return
+                delay = self.retry_delay * 2 ** (self._failures - 1)
+                print(f"Proactive session refresh failed, retrying in {delay:.0f}s: {ex}")
+                self._schedule(delay)
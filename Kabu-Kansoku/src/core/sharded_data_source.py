@@ -0,0 +1,464 @@
+"""Multi-process quote ingestion.
+
+``ShardedDataSource`` spreads codes over worker processes, each running
+its own data source built from a picklable factory (a class such as
+``DummyDataSource`` or ``TachibanaDataSource``, or a
+``functools.partial``). Response parsing and quote construction then run
+in parallel instead of sharing one interpreter's GIL.
+
+Quote values come back through ``multiprocessing.shared_memory``: one
+block holds a column per ``QuoteBatch`` field plus ``wanted`` and
+``status`` bytes, with one row (slot) per code. The coordinator marks the
+slots it wants, each worker fills in the slots of its own codes, and the
+pipes carry only short commands, acknowledgements and error messages.
+"""
+
+from __future__ import annotations
+
+import datetime
+import itertools
+import multiprocessing
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .data_source_base import DataSource
+from .metrics import METRICS
+from .models import Quote, QuoteBatch
+
+# Shared columns in block order; 8-byte columns first keep every column aligned
+_COLUMNS = (
+    ("price", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("timestamp", np.float64),
+    ("base_price", np.float64),
+    ("volume", np.int64),
+    ("wanted", np.int8),
+    ("status", np.int8),
+)
+
+# Values of the status column
+_MISSING = 0
+_OK = 1
+_FAILED = 2
+
+_INITIAL_CAPACITY = 4096
+
+
+class SharedQuoteColumns:
+    """Quote columns laid out back to back in one shared memory block."""
+
+    def __init__(self, capacity: int, name: Optional[str] = None) -> None:
+        """Create a block for ``capacity`` codes, or attach to block ``name``."""
+        size = capacity * sum(np.dtype(dtype).itemsize for _, dtype in _COLUMNS)
+        self.capacity = capacity
+        self.shm = SharedMemory(name=name, create=name is None, size=size)
+        self.name = self.shm.name
+        offset = 0
+        for column, dtype in _COLUMNS:
+            array = np.ndarray(capacity, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            offset += array.nbytes
+            setattr(self, column, array)
+        if name is None:
+            self.wanted[:] = 0
+            self.status[:] = _MISSING
+
+    def close(self, unlink: bool = False) -> None:
+        # The arrays export the buffer; drop them before closing the mapping
+        for column, _ in _COLUMNS:
+            setattr(self, column, None)
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker_main(factory: Callable[[], DataSource], conn: Connection) -> None:
+    """Serve commands from the coordinator until told to stop."""
+    data_source: Optional[DataSource] = None
+    columns: Optional[SharedQuoteColumns] = None
+    slot_of: Dict[str, int] = {}
+    codes: List[str] = []
+    slots = np.empty(0, dtype=np.int64)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        command = message[0]
+        if command == "stop":
+            break
+        if command == "attach":
+            if columns is not None:
+                columns.close()
+            columns = SharedQuoteColumns(message[2], message[1])
+            continue
+        if command == "add":
+            for slot, code in message[1]:
+                slot_of[code] = slot
+                codes.append(code)
+            slots = np.fromiter((slot_of[code] for code in codes), dtype=np.int64, count=len(codes))
+            continue
+        seq = message[1]
+        try:
+            if command == "login":
+                if data_source is None:
+                    data_source = factory()
+                payload: object = bool(data_source.login())
+            elif command == "fetch":
+                payload = _fetch(data_source, columns, codes, slots, slot_of, message[2])
+            elif command == "base_prices":
+                payload = data_source.get_base_prices(message[2])
+            elif command == "summary":
+                payload = data_source.get_daily_summary(message[2], message[3])
+            else:
+                raise ValueError(f"Unknown command {command!r}")
+        except Exception as ex:
+            conn.send(("error", seq, f"{type(ex).__name__}: {ex}"))
+            continue
+        conn.send(("ok", seq, payload))
+    if data_source is not None and hasattr(data_source, "close"):
+        data_source.close()
+    if columns is not None:
+        columns.close()
+
+
+def _fetch(
+    data_source: DataSource,
+    columns: SharedQuoteColumns,
+    codes: List[str],
+    slots: np.ndarray,
+    slot_of: Dict[str, int],
+    include_base_price: bool,
+) -> Tuple[Dict[str, str], float]:
+    """Fetch this worker's wanted codes into their slots; return errors and seconds taken."""
+    started = time.perf_counter()
+    wanted = np.flatnonzero(columns.wanted[slots])
+    errors: Dict[str, Exception] = {}
+    batch = data_source.get_quotes([codes[i] for i in wanted.tolist()], errors, include_base_price)
+    rows = np.fromiter((slot_of[code] for code in batch.codes), dtype=np.int64, count=len(batch))
+    columns.price[rows] = batch.price
+    columns.high[rows] = batch.high
+    columns.low[rows] = batch.low
+    columns.timestamp[rows] = batch.timestamp
+    columns.base_price[rows] = batch.base_price
+    columns.volume[rows] = batch.volume
+    columns.status[rows] = _OK
+    for code in errors:
+        columns.status[slot_of[code]] = _FAILED
+    return {code: str(ex) for code, ex in errors.items()}, time.perf_counter() - started
+
+
+class _Worker:
+    """Coordinator-side handle of one worker process."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.conn: Optional[Connection] = None
+        self.codes: List[Tuple[int, str]] = []
+        # Sequence number of an unanswered fetch, if any
+        self.busy: Optional[int] = None
+
+
+class ShardedDataSource(DataSource):
+    """Fetch quotes through several worker processes, each with its own data source.
+
+    Codes are assigned to the worker with the fewest codes the first time
+    they are requested and stay there. Workers are started by ``login``
+    with the ``spawn`` method, so they are safe to create from Qt
+    threads, and are restarted if they exit. A worker that has not
+    answered within ``timeout`` seconds has its codes reported as errors
+    for that call and is skipped until it catches up.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], DataSource],
+        processes: Optional[int] = None,
+        timeout: float = 30.0,
+    ) -> None:
+        """``factory`` must be picklable; it is called once in each worker."""
+        self.factory = factory
+        # Each worker batches requests like the sources it builds
+        self.codes_per_request = getattr(factory, "codes_per_request", DataSource.codes_per_request)
+        self.processes = processes or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(i) for i in range(self.processes)]
+        self._columns: Optional[SharedQuoteColumns] = None
+        self._codes: List[str] = []
+        self._slot_of: Dict[str, int] = {}
+        # Worker index per slot
+        self._owner = np.empty(0, dtype=np.int64)
+        self._seq = itertools.count(1)
+        # Pipes are not thread-safe; callers such as the finalizer use threads
+        self._lock = threading.Lock()
+
+    def login(self) -> bool:
+        with self._lock:
+            if self._columns is None:
+                self._columns = SharedQuoteColumns(_INITIAL_CAPACITY)
+            for worker in self._workers:
+                if worker.process is None or not worker.process.is_alive():
+                    self._start(worker)
+            seq = next(self._seq)
+            for worker in self._workers:
+                worker.conn.send(("login", seq))
+            deadline = time.monotonic() + self.timeout
+            ok = True
+            for worker in self._workers:
+                try:
+                    ok = self._reply(worker, seq, deadline) is True and ok
+                except Exception as ex:
+                    print(f"Quote worker {worker.index} login failed: {ex}", file=sys.stderr)
+                    ok = False
+            return ok
+
+    def _start(self, worker: _Worker) -> None:
+        if worker.conn is not None:
+            worker.conn.close()
+        parent, child = self._context.Pipe()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(self.factory, child),
+            name=f"quote-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        child.close()
+        worker.conn = parent
+        worker.busy = None
+        parent.send(("attach", self._columns.name, self._columns.capacity))
+        if worker.codes:
+            parent.send(("add", worker.codes))
+
+    def _restart_dead(self) -> None:
+        """Replace workers that exited and log their data sources in again."""
+        dead = [w for w in self._workers if w.process is not None and not w.process.is_alive()]
+        if not dead:
+            return
+        seq = next(self._seq)
+        for worker in dead:
+            print(
+                f"Restarting quote worker {worker.index} (exit code {worker.process.exitcode})",
+                file=sys.stderr,
+            )
+            self._start(worker)
+            worker.conn.send(("login", seq))
+        for worker in dead:
+            try:
+                self._reply(worker, seq)
+            except Exception as ex:
+                print(f"Quote worker {worker.index} login failed: {ex}", file=sys.stderr)
+
+    def _reply(self, worker: _Worker, seq: int, deadline: Optional[float] = None):
+        """Wait for the answer to ``seq`` and return its payload.
+
+        Raises TimeoutError at ``deadline`` (``time.monotonic()``; default
+        ``timeout`` seconds from now) and RuntimeError if the worker
+        reported an error or exited.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                ready = worker.conn.poll(max(0.0, deadline - time.monotonic()))
+                if ready:
+                    status, reply_seq, payload = worker.conn.recv()
+            except (EOFError, OSError) as ex:
+                raise RuntimeError(f"Quote worker {worker.index} exited") from ex
+            if not ready:
+                raise TimeoutError(f"Quote worker {worker.index} did not answer in time")
+            if reply_seq == worker.busy:
+                worker.busy = None
+            if reply_seq != seq:
+                # Late answer to a call that already timed out
+                continue
+            if status == "error":
+                raise RuntimeError(f"Quote worker {worker.index}: {payload}")
+            return payload
+
+    def _drain(self, worker: _Worker) -> bool:
+        """Discard late answers without waiting; return True once the worker is idle."""
+        try:
+            while worker.busy is not None and worker.conn.poll(0):
+                if worker.conn.recv()[1] == worker.busy:
+                    worker.busy = None
+        except (EOFError, OSError):
+            pass
+        return worker.busy is None
+
+    def _register(self, codes: List[str]) -> np.ndarray:
+        """Return the slot of every code, assigning new codes to workers."""
+        new = [code for code in codes if code not in self._slot_of]
+        if new:
+            if len(self._codes) + len(new) > self._columns.capacity:
+                self._grow(len(self._codes) + len(new))
+            added: Dict[int, List[Tuple[int, str]]] = {}
+            owners = []
+            for code in new:
+                worker = min(self._workers, key=lambda w: len(w.codes))
+                slot = len(self._codes)
+                self._codes.append(code)
+                self._slot_of[code] = slot
+                worker.codes.append((slot, code))
+                added.setdefault(worker.index, []).append((slot, code))
+                owners.append(worker.index)
+            self._owner = np.concatenate([self._owner, np.array(owners, dtype=np.int64)])
+            for index, pairs in added.items():
+                self._workers[index].conn.send(("add", pairs))
+        return np.fromiter((self._slot_of[code] for code in codes), dtype=np.int64, count=len(codes))
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._columns.capacity
+        while capacity < needed:
+            capacity *= 2
+        old = self._columns
+        self._columns = SharedQuoteColumns(capacity)
+        for worker in self._workers:
+            worker.conn.send(("attach", self._columns.name, capacity))
+        # Workers keep their own mapping of the old block until they re-attach
+        old.close(unlink=True)
+
+    def get_quotes(
+        self,
+        codes: Iterable[str],
+        errors: Optional[Dict[str, Exception]] = None,
+        include_base_price: bool = True,
+    ) -> QuoteBatch:
+        """Fetch ``codes`` from all workers in parallel; see ``DataSource.get_quotes``."""
+        codes = list(dict.fromkeys(codes))
+        if not codes:
+            return QuoteBatch.empty()
+        with self._lock:
+            self._restart_dead()
+            slots = self._register(codes)
+            columns = self._columns
+            columns.wanted[:] = 0
+            columns.wanted[slots] = 1
+            columns.status[slots] = _MISSING
+            seq = next(self._seq)
+            asked = []
+            # Exception per worker whose codes get no quotes this call
+            failures: Dict[int, Exception] = {}
+            for worker in self._workers:
+                if not self._drain(worker):
+                    failures[worker.index] = TimeoutError(
+                        f"Quote worker {worker.index} is still busy with an earlier call"
+                    )
+                    continue
+                worker.conn.send(("fetch", seq, include_base_price))
+                worker.busy = seq
+                asked.append(worker)
+            # Workers run in parallel, so they share one deadline
+            deadline = time.monotonic() + self.timeout
+            for worker in asked:
+                try:
+                    worker_errors, seconds = self._reply(worker, seq, deadline)
+                except Exception as ex:
+                    failures[worker.index] = ex
+                    continue
+                METRICS.observe("shard_fetch", seconds, f"worker{worker.index}")
+                if errors is not None:
+                    for code, message in worker_errors.items():
+                        errors[code] = RuntimeError(message)
+            lost = np.zeros(len(slots), dtype=np.bool_)
+            if failures:
+                owners = self._owner[slots]
+                lost = np.isin(owners, list(failures))
+                if errors is not None:
+                    for slot, owner in zip(slots[lost].tolist(), owners[lost].tolist()):
+                        errors[self._codes[slot]] = failures[owner]
+            rows = slots[(columns.status[slots] == _OK) & ~lost]
+            return QuoteBatch(
+                codes=[self._codes[slot] for slot in rows.tolist()],
+                price=columns.price[rows],
+                high=columns.high[rows],
+                low=columns.low[rows],
+                volume=columns.volume[rows],
+                timestamp=columns.timestamp[rows],
+                base_price=columns.base_price[rows],
+            )
+
+    def get_quote(self, code: str) -> Optional[Quote]:
+        return self.get_quotes([code], include_base_price=False).get(code)
+
+    def get_base_price(self, code: str) -> Optional[float]:
+        return self.get_base_prices([code])[code]
+
+    def get_base_prices(self, codes: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Ask every worker for the base prices of its own codes, in parallel.
+
+        Codes whose worker fails or times out map to None.
+        """
+        codes = list(dict.fromkeys(codes))
+        base_prices: Dict[str, Optional[float]] = dict.fromkeys(codes)
+        if not codes:
+            return base_prices
+        with self._lock:
+            self._restart_dead()
+            owners = self._owner[self._register(codes)].tolist()
+            by_worker: Dict[int, List[str]] = {}
+            for code, owner in zip(codes, owners):
+                by_worker.setdefault(owner, []).append(code)
+            seq = next(self._seq)
+            asked = []
+            for index, worker_codes in by_worker.items():
+                worker = self._workers[index]
+                if not self._drain(worker):
+                    print(f"Quote worker {index} is still busy with an earlier call", file=sys.stderr)
+                    continue
+                worker.conn.send(("base_prices", seq, worker_codes))
+                worker.busy = seq
+                asked.append(worker)
+            deadline = time.monotonic() + self.timeout
+            for worker in asked:
+                try:
+                    base_prices.update(self._reply(worker, seq, deadline))
+                except Exception as ex:
+                    print(f"Base prices from quote worker {worker.index} failed: {ex}", file=sys.stderr)
+        return base_prices
+
+    def get_daily_summary(
+        self, code: str, date: datetime.date
+    ) -> Optional[Dict[str, object]]:
+        """Ask the worker that owns ``code`` for its daily summary."""
+        with self._lock:
+            self._restart_dead()
+            slot = self._register([code])[0]
+            worker = self._workers[self._owner[slot]]
+            if not self._drain(worker):
+                raise TimeoutError(f"Quote worker {worker.index} is still busy with an earlier call")
+            seq = next(self._seq)
+            worker.conn.send(("summary", seq, code, date))
+            return self._reply(worker, seq)
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory; safe to repeat."""
+        with self._lock:
+            for worker in self._workers:
+                if worker.process is None:
+                    continue
+                try:
+                    worker.conn.send(("stop",))
+                except OSError:
+                    pass
+            for worker in self._workers:
+                if worker.process is None:
+                    continue
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join()
+                worker.conn.close()
+                worker.process = None
+                worker.conn = None
+            if self._columns is not None:
+                self._columns.close(unlink=True)
+                self._columns = None
@@ -0,0 +1,453 @@
+"""Reproducible market simulation for load testing without the broker.
+
+- ``SimulatedDataSource``: a seeded, vectorised random walk for any
+  number of codes. Prices move on the exchange tick grid and stay inside
+  each code's daily limits. ``LimitStorm`` scenarios pin many codes to a
+  limit at once.
+- ``ReplayDataSource``: plays back a quote stream recorded with
+  ``QuoteRecorder``, one recorded frame per poll or in scaled real time.
+- ``FaultInjectingDataSource``: wraps any data source and adds latency,
+  per-code errors and whole-call failures.
+
+With the same seed and the same sequence of calls, every run produces
+the same quotes, so polling, detection and storage can be load-tested
+reproducibly.
+"""
+
+from __future__ import annotations
+
+import csv
+import datetime
+import json
+import math
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, TextIO
+
+import numpy as np
+
+from .data_source_base import DataSource
+from .limit_rules import calculate_limits_batch, tick_size_batch
+from .market_time import now_jst
+from .models import Quote, QuoteBatch
+
+_INITIAL_CAPACITY = 256
+_STATE_ARRAYS = (
+    "base", "price", "high", "low", "limit_up", "limit_down", "volume", "pinned", "pin_side"
+)
+
+
+class LimitStorm(NamedTuple):
+    """Pin a random ``fraction`` of codes to a limit from poll ``at_step`` on.
+
+    Pinned codes stay at the limit for ``duration`` polls, then resume
+    their random walk. ``up_share`` of them go to the upper limit.
+    """
+
+    at_step: int
+    fraction: float = 0.2
+    duration: int = 10
+    up_share: float = 0.5
+
+
+def synthetic_codes(count: int, first: int = 1000) -> List[str]:
+    """Return ``count`` four-digit-style codes for generated universes."""
+    return [str(first + i) for i in range(count)]
+
+
+def _on_ticks(prices: np.ndarray) -> np.ndarray:
+    ticks = tick_size_batch(prices)
+    return np.round(prices / ticks) * ticks
+
+
+class SimulatedDataSource(DataSource):
+    """Seeded geometric random walk over many codes.
+
+    Each ``get_quotes`` call advances the requested codes by one step
+    with log-returns drawn from N(0, ``volatility``). New codes get a
+    log-uniform base price between ``min_price`` and ``max_price``.
+    """
+
+    # One in-memory call answers any number of codes
+    codes_per_request = sys.maxsize
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        volatility: float = 0.01,
+        min_price: float = 100.0,
+        max_price: float = 20000.0,
+        scenarios: Sequence[LimitStorm] = (),
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.rng = np.random.default_rng(seed)
+        self.volatility = volatility
+        self.min_price = min_price
+        self.max_price = max_price
+        self.scenarios = sorted(scenarios, key=lambda scenario: scenario.at_step)
+        self.clock = clock
+        self.steps = 0
+        self.codes: List[str] = []
+        self.index_of: Dict[str, int] = {}
+        self.base = np.empty(_INITIAL_CAPACITY)
+        self.price = np.empty(_INITIAL_CAPACITY)
+        self.high = np.empty(_INITIAL_CAPACITY)
+        self.low = np.empty(_INITIAL_CAPACITY)
+        self.limit_up = np.empty(_INITIAL_CAPACITY)
+        self.limit_down = np.empty(_INITIAL_CAPACITY)
+        self.volume = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        # Polls left at a limit (storm) and which one: +1 up, -1 down
+        self.pinned = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)
+        self.pin_side = np.zeros(_INITIAL_CAPACITY, dtype=np.int8)
+
+    def login(self) -> bool:
+        return True
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.base)
+        while capacity < needed:
+            capacity *= 2
+        for name in _STATE_ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def _indices(self, codes: Sequence[str]) -> np.ndarray:
+        """Return array indices for ``codes``, initialising new ones."""
+        new = [code for code in dict.fromkeys(codes) if code not in self.index_of]
+        if new:
+            first = len(self.codes)
+            last = first + len(new)
+            if last > len(self.base):
+                self._grow(last)
+            for i, code in enumerate(new, first):
+                self.index_of[code] = i
+                self.codes.append(code)
+            log_range = (math.log(self.min_price), math.log(self.max_price))
+            base = _on_ticks(np.exp(self.rng.uniform(*log_range, size=len(new))))
+            up, down = calculate_limits_batch(base)
+            self.base[first:last] = base
+            self.price[first:last] = base
+            self.high[first:last] = base
+            self.low[first:last] = base
+            self.limit_up[first:last] = up
+            self.limit_down[first:last] = down
+        return np.array([self.index_of[code] for code in codes], dtype=np.int64)
+
+    def storm(self, fraction: float = 0.2, duration: int = 10, up_share: float = 0.5) -> List[str]:
+        """Pin a random ``fraction`` of the known codes to a limit; return them."""
+        count = len(self.codes)
+        chosen = self.rng.choice(count, size=int(round(count * fraction)), replace=False)
+        up = self.rng.random(len(chosen)) < up_share
+        self.pinned[chosen] = duration
+        self.pin_side[chosen] = np.where(up, 1, -1)
+        return [self.codes[i] for i in chosen.tolist()]
+
+    def step(self, indices: np.ndarray) -> None:
+        """Advance the given codes by one random-walk step."""
+        shocks = self.rng.standard_normal(len(indices)) * self.volatility
+        price = self.price[indices] * np.exp(shocks)
+        up = self.limit_up[indices]
+        down = self.limit_down[indices]
+        price = np.clip(_on_ticks(price), down, up)
+        pinned = self.pinned[indices] > 0
+        price = np.where(pinned, np.where(self.pin_side[indices] > 0, up, down), price)
+        self.pinned[indices] = np.maximum(self.pinned[indices] - 1, 0)
+        self.price[indices] = price
+        self.high[indices] = np.maximum(self.high[indices], price)
+        self.low[indices] = np.minimum(self.low[indices], price)
+        self.volume[indices] += self.rng.integers(0, 5000, size=len(indices))
+
+    def get_quotes(
+        self,
+        codes: Iterable[str],
+        errors: Optional[Dict[str, Exception]] = None,
+        include_base_price: bool = True,
+    ) -> QuoteBatch:
+        codes = list(dict.fromkeys(codes))
+        indices = self._indices(codes)
+        while self.scenarios and self.scenarios[0].at_step <= self.steps:
+            scenario = self.scenarios.pop(0)
+            self.storm(scenario.fraction, scenario.duration, scenario.up_share)
+        self.steps += 1
+        self.step(indices)
+        return QuoteBatch(
+            codes=codes,
+            price=self.price[indices],
+            high=self.high[indices],
+            low=self.low[indices],
+            volume=self.volume[indices],
+            timestamp=np.full(len(codes), self.clock()),
+            base_price=self.base[indices] if include_base_price else np.full(len(codes), np.nan),
+        )
+
+    def get_quote(self, code: str) -> Optional[Quote]:
+        return self.get_quotes([code]).quote(0)
+
+    def get_base_price(self, code: str) -> Optional[float]:
+        return float(self.base[self._indices([code])[0]])
+
+    def get_base_prices(self, codes: Iterable[str]) -> Dict[str, Optional[float]]:
+        codes = list(codes)
+        return dict(zip(codes, self.base[self._indices(codes)].tolist()))
+
+    def get_daily_summary(self, code: str, date: datetime.date) -> Optional[Dict[str, object]]:
+        index = self.index_of.get(code)
+        if index is None or date != now_jst().date():
+            return None
+        return {
+            "high": float(self.high[index]),
+            "low": float(self.low[index]),
+            "close": float(self.price[index]),
+        }
+
+
+class QuoteRecorder:
+    """Append quote batches to a JSON lines file for ``ReplayDataSource``.
+
+    Each line holds one quote: ``ts`` (POSIX seconds), ``code``, ``price``,
+    ``high``, ``low``, ``volume`` and ``base_price`` (null when unknown).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.stream: TextIO = open(path, "a", encoding="utf-8")
+
+    def write(self, batch: QuoteBatch) -> None:
+        def opt(value: float) -> Optional[float]:
+            return None if math.isnan(value) else value
+
+        lines = []
+        for code, price, high, low, volume, ts, base in zip(
+            batch.codes,
+            batch.price.tolist(),
+            batch.high.tolist(),
+            batch.low.tolist(),
+            batch.volume.tolist(),
+            batch.timestamp.tolist(),
+            batch.base_price.tolist(),
+        ):
+            record = {
+                "ts": ts,
+                "code": code,
+                "price": opt(price),
+                "high": opt(high),
+                "low": opt(low),
+                "volume": volume,
+                "base_price": opt(base),
+            }
+            lines.append(json.dumps(record) + "\n")
+        self.stream.writelines(lines)
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+def _read_records(path: str) -> List[Dict[str, object]]:
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _number(value: object) -> float:
+    return math.nan if value in (None, "") else float(value)
+
+
+class ReplayDataSource(DataSource):
+    """Play back a recorded quote stream.
+
+    Records sharing a timestamp form a frame. With ``speed=None`` each
+    ``get_quotes`` call applies the next frame; otherwise frames are
+    applied as recorded time passes, ``speed`` times faster than the
+    wall clock. Codes not yet seen in the stream are omitted from the
+    results. ``finished`` turns True after the last frame.
+    """
+
+    codes_per_request = sys.maxsize
+
+    def __init__(
+        self,
+        path: str,
+        speed: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        records = sorted(_read_records(path), key=lambda record: float(record["ts"]))
+        self.speed = speed
+        self.clock = clock
+        self.codes: List[str] = []
+        self.index_of: Dict[str, int] = {}
+        code_index = []
+        for record in records:
+            code = str(record["code"])
+            if code not in self.index_of:
+                self.index_of[code] = len(self.codes)
+                self.codes.append(code)
+            code_index.append(self.index_of[code])
+        self._code = np.array(code_index, dtype=np.int64)
+        self._ts = np.array([float(r["ts"]) for r in records])
+        self._price = np.array([_number(r.get("price")) for r in records])
+        self._high = np.array([_number(r.get("high")) for r in records])
+        self._low = np.array([_number(r.get("low")) for r in records])
+        volume = np.array([_number(r.get("volume")) for r in records])
+        # A missing volume counts as zero; NaN cannot be stored as an integer
+        self._volume = np.nan_to_num(volume, nan=0.0).astype(np.int64)
+        self._base = np.array([_number(r.get("base_price")) for r in records])
+        # Frame boundaries: first record of each distinct timestamp
+        self._frames = np.flatnonzero(np.r_[True, np.diff(self._ts) > 0]).tolist() + [len(records)]
+        self._frame = 0
+        self._started: Optional[float] = None
+        count = len(self.codes)
+        self.price = np.full(count, np.nan)
+        self.high = np.full(count, np.nan)
+        self.low = np.full(count, np.nan)
+        self.volume = np.zeros(count, dtype=np.int64)
+        self.timestamp = np.full(count, np.nan)
+        self.base = np.full(count, np.nan)
+
+    @property
+    def finished(self) -> bool:
+        return self._frame >= len(self._frames) - 1
+
+    def login(self) -> bool:
+        return True
+
+    def _apply(self, frame: int) -> None:
+        rows = slice(self._frames[frame], self._frames[frame + 1])
+        codes = self._code[rows]
+        self.price[codes] = self._price[rows]
+        self.high[codes] = self._high[rows]
+        self.low[codes] = self._low[rows]
+        self.volume[codes] = self._volume[rows]
+        self.timestamp[codes] = self._ts[rows]
+        self.base[codes] = self._base[rows]
+
+    def advance(self) -> None:
+        """Apply the frames due now (see the class docstring)."""
+        if self.finished:
+            return
+        if self.speed is None:
+            self._apply(self._frame)
+            self._frame += 1
+            return
+        now = self.clock()
+        if self._started is None:
+            self._started = now
+        replay_time = self._ts[0] + (now - self._started) * self.speed
+        while not self.finished and self._ts[self._frames[self._frame]] <= replay_time:
+            self._apply(self._frame)
+            self._frame += 1
+
+    def get_quotes(
+        self,
+        codes: Iterable[str],
+        errors: Optional[Dict[str, Exception]] = None,
+        include_base_price: bool = True,
+    ) -> QuoteBatch:
+        self.advance()
+        codes = [code for code in dict.fromkeys(codes) if code in self.index_of]
+        indices = np.array([self.index_of[code] for code in codes], dtype=np.int64)
+        known = ~np.isnan(self.price[indices])
+        indices = indices[known]
+        return QuoteBatch(
+            codes=[code for code, ok in zip(codes, known.tolist()) if ok],
+            price=self.price[indices],
+            high=self.high[indices],
+            low=self.low[indices],
+            volume=self.volume[indices],
+            timestamp=self.timestamp[indices],
+            base_price=self.base[indices] if include_base_price else np.full(len(indices), np.nan),
+        )
+
+    def get_quote(self, code: str) -> Optional[Quote]:
+        batch = self.get_quotes([code])
+        return batch.quote(0) if len(batch) else None
+
+    def get_base_price(self, code: str) -> Optional[float]:
+        index = self.index_of.get(code)
+        if index is None or np.isnan(self.base[index]):
+            return None
+        return float(self.base[index])
+
+    def get_base_prices(self, codes: Iterable[str]) -> Dict[str, Optional[float]]:
+        return {code: self.get_base_price(code) for code in codes}
+
+
+class InjectedFault(Exception):
+    """Error raised or recorded by ``FaultInjectingDataSource``."""
+
+
+class FaultInjectingDataSource(DataSource):
+    """Add latency and failures to another data source.
+
+    Every call sleeps ``latency`` seconds plus uniform jitter in
+    ``[0, jitter]``, and fails outright with probability
+    ``failure_rate``. In ``get_quotes`` each code is additionally dropped
+    and reported in ``errors`` with probability ``error_rate``.
+    """
+
+    def __init__(
+        self,
+        inner: DataSource,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.inner = inner
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.failure_rate = failure_rate
+        self.rng = np.random.default_rng(seed)
+        self.sleep = sleep
+
+    def _inject(self) -> None:
+        delay = self.latency + (self.rng.uniform(0.0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            self.sleep(delay)
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            raise InjectedFault("injected failure")
+
+    def login(self) -> bool:
+        return self.inner.login()
+
+    def get_quotes(
+        self,
+        codes: Iterable[str],
+        errors: Optional[Dict[str, Exception]] = None,
+        include_base_price: bool = True,
+    ) -> QuoteBatch:
+        self._inject()
+        batch = self.inner.get_quotes(codes, errors, include_base_price)
+        if not self.error_rate:
+            return batch
+        failed = self.rng.random(len(batch)) < self.error_rate
+        if errors is not None:
+            for i in np.flatnonzero(failed).tolist():
+                errors[batch.codes[i]] = InjectedFault("injected error")
+        return batch.take(~failed)
+
+    def get_quote(self, code: str) -> Optional[Quote]:
+        self._inject()
+        return self.inner.get_quote(code)
+
+    def get_base_price(self, code: str) -> Optional[float]:
+        self._inject()
+        return self.inner.get_base_price(code)
+
+    def get_base_prices(self, codes: Iterable[str]) -> Dict[str, Optional[float]]:
+        self._inject()
+        return self.inner.get_base_prices(codes)
+
+    def get_daily_summary(self, code: str, date: datetime.date) -> Optional[Dict[str, object]]:
+        self._inject()
+        return self.inner.get_daily_summary(code, date)
+
+    def close(self) -> None:
+        if hasattr(self.inner, "close"):
+            self.inner.close()
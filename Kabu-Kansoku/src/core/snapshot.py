@@ -0,0 +1,127 @@
+"""Compact snapshots of intraday monitoring state for fast restarts.
+
+A ``Snapshot`` holds, for every watched code, the last polled price and
+limits, the base price, the time of the last change and the
+``EventDetector`` state (intraday high/low and limit flags), together
+with the trading day it belongs to.
+
+The file is an 8-byte magic, a JSON header describing the columns, and
+the raw NumPy columns aligned to 8 bytes. ``write_snapshot`` replaces
+the previous file atomically; ``read_snapshot`` reads the file in one
+call and takes the columns straight from the buffer with
+``np.frombuffer``, so a market-wide snapshot loads in a few
+milliseconds.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import struct
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+_MAGIC = b"KKSNAP01"
+_ALIGN = 8
+
+#: Float columns, NaN where unknown; ``updated`` is a POSIX timestamp.
+FLOAT_COLUMNS = ("price", "limit_up", "limit_down", "base_price", "high", "low", "updated")
+#: Event detector flags.
+BOOL_COLUMNS = ("at_up", "at_down", "touched_up", "touched_down")
+
+
+@dataclass
+class Snapshot:
+    """Monitoring state of one trading day; row ``i`` belongs to ``codes[i]``."""
+
+    day: datetime.date
+    taken: float  # POSIX time the snapshot was made
+    codes: List[str]
+    price: np.ndarray
+    limit_up: np.ndarray
+    limit_down: np.ndarray
+    base_price: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    updated: np.ndarray
+    at_up: np.ndarray
+    at_down: np.ndarray
+    touched_up: np.ndarray
+    touched_down: np.ndarray
+
+    @classmethod
+    def empty(cls, day: datetime.date, codes: List[str], taken: float) -> "Snapshot":
+        """Return a snapshot of ``codes`` with every value unknown."""
+        n = len(codes)
+        floats = {name: np.full(n, np.nan) for name in FLOAT_COLUMNS}
+        flags = {name: np.zeros(n, dtype=np.bool_) for name in BOOL_COLUMNS}
+        return cls(day=day, taken=taken, codes=list(codes), **floats, **flags)
+
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGN
+
+
+def write_snapshot(path: str, snapshot: Snapshot) -> int:
+    """Write ``snapshot`` to ``path`` atomically; return the file size in bytes."""
+    columns = [("codes", np.array(snapshot.codes, dtype=np.str_))]
+    for names, dtype in ((FLOAT_COLUMNS, np.float64), (BOOL_COLUMNS, np.bool_)):
+        columns += [(name, np.asarray(getattr(snapshot, name), dtype=dtype)) for name in names]
+    layout = []
+    offset = 0
+    for name, column in columns:
+        layout.append([name, column.dtype.str, offset])
+        offset += column.nbytes + _padding(column.nbytes)
+    header = json.dumps(
+        {
+            "day": snapshot.day.isoformat(),
+            "taken": snapshot.taken,
+            "count": len(snapshot.codes),
+            "columns": layout,
+        }
+    ).encode()
+    header += b" " * _padding(len(_MAGIC) + 4 + len(header))
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for _, column in columns:
+            f.write(np.ascontiguousarray(column).tobytes())
+            f.write(b"\0" * _padding(column.nbytes))
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+def read_snapshot(path: str) -> Optional[Snapshot]:
+    """Return the snapshot stored at ``path``, or None if there is none.
+
+    Raises ValueError if the file is not a snapshot.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if data[: len(_MAGIC)] != _MAGIC:
+        raise ValueError(f"{path} is not a snapshot file")
+    start = len(_MAGIC) + 4
+    (length,) = struct.unpack("<I", data[len(_MAGIC) : start])
+    header = json.loads(data[start : start + length])
+    base = start + length
+    count = header["count"]
+    # Read-only views of ``data``; nothing is copied
+    columns = {
+        name: np.frombuffer(data, dtype=np.dtype(dtype), count=count, offset=base + offset)
+        for name, dtype, offset in header["columns"]
+    }
+    return Snapshot(
+        day=datetime.date.fromisoformat(header["day"]),
+        taken=header["taken"],
+        codes=columns.pop("codes").tolist(),
+        **columns,
+    )
@@ -0,0 +1,50 @@
+"""Timing of application start-up stages.
+
+``StartupProfile`` records how long each named stage took and when it
+started relative to the profile's creation. Stages may be recorded from
+any thread, e.g. the data source being imported and logged in on the
+poller thread while the window is already shown.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+
+class StartupProfile:
+    """Collect ``(name, offset, duration)`` records in seconds."""
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.stages: List[Tuple[str, float, float]] = []
+        self._lock = threading.Lock()
+
+    def _add(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            self.stages.append((name, start - self.origin, end - start))
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body of the ``with`` block as stage ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, start, time.perf_counter())
+
+    def mark(self, name: str) -> None:
+        """Record a point in time, such as the first shown frame."""
+        now = time.perf_counter()
+        self._add(name, now, now)
+
+    def report(self) -> str:
+        """Return the stages as a table ordered by start time."""
+        lines = [f"{'start ms':>9} {'took ms':>9}  stage"]
+        with self._lock:
+            stages = sorted(self.stages, key=lambda stage: stage[1])
+        for name, offset, duration in stages:
+            lines.append(f"{offset * 1000:9.1f} {duration * 1000:9.1f}  {name}")
+        return "\n".join(lines)
@@ -1,10 +1,14 @@
-"""Skeleton implementation of the Tachibana Securities e‑branch API data source.
+"""Tachibana Securities e‑branch API data source.
 
-This class demonstrates the structure of a data source that authenticates
-against the Tachibana API, retrieves a virtual endpoint (仮想URL), and
-uses it to fetch quotes. The exact request and response formats should
-follow the official API specification. At the moment, methods contain
-TODO markers where integration details need to be filled in.
+The data sources authenticate against the Tachibana API, obtain a
+virtual endpoint (仮想URL) through ``core.session_manager``, and fetch
+quotes, base prices and daily summaries with CLMMfdsGetMarketPrice
+requests of up to 120 codes over a pooled, retrying HTTP client (see
+``core.http_transport``). ``AsyncTachibanaDataSource`` sends the chunks
+concurrently. The login request itself is still a placeholder
+(``_placeholder_login``); request and response fields should be checked
+against the official API specification. Pass an ``httpx.MockTransport``
+as ``transport`` to run against a local handler.
 
 Usage of this data source requires the user to set environment variables
 or OS keyring entries as described in the README. Sensitive credentials
@@ -14,37 +18,174 @@ should never be stored in code or committed to version control.
 from __future__ import annotations
 
 import os
+import json
+import time
+import asyncio
 import datetime
-from typing import Optional, Dict
-import httpx
-import keyring
+from typing import TYPE_CHECKING, Optional, Dict, Iterable, List
 
 from .data_source_base import DataSource
+from .http_transport import (
+    DEFAULT_RETRY,
+    RetryPolicy,
+    async_request_with_retry,
+    create_async_client,
+    create_client,
+    request_with_retry,
+)
+from .market_time import end_of_trading_day, now_jst
+from .metrics import METRICS
+from .models import Quote, QuoteBatch
+from .session_manager import KeyringSessionStore, SessionManager, SessionStore, VirtualSession
+
+if TYPE_CHECKING:
+    import httpx
+
+# CLMMfdsGetMarketPrice accepts at most this many codes per request.
+_MARKET_PRICE_CHUNK = 120
+# Columns requested from the market price endpoint:
+# current price, high, low, volume and previous close (base price).
+_MARKET_PRICE_COLUMNS = "pDPP,pDHP,pDLP,pDV,pPRP"
+
+
+def _to_float(value: object) -> Optional[float]:
+    """Convert an API price field to float; empty strings mean no value."""
+    if value in (None, ""):
+        return None
+    return float(value)
+
+
+def _load_credentials(target: object) -> None:
+    """Set credential attributes on ``target`` from environment or keyring.
+
+    Called from ``login`` rather than the constructor: keyring reads can
+    block on the OS keychain, and importing keyring is itself slow.
+    """
+    target.user_id = os.getenv("TACHIBANA_USER_ID")
+    target.password = os.getenv("TACHIBANA_PASSWORD")
+    target.second_password = os.getenv("TACHIBANA_SECOND_PASSWORD")
+    target.tel_pass = os.getenv("TACHIBANA_TEL_PASS")
+    target.account_code = os.getenv("TACHIBANA_ACCOUNT_CODE")
+    credentials = (target.user_id, target.password, target.second_password, target.tel_pass)
+    if all(credentials) and target.account_code:
+        return
+    import keyring
+
+    # If not in environment, try keyring (service names are arbitrary examples)
+    if not target.user_id:
+        target.user_id = keyring.get_password("tachibana", "user_id")
+    if not target.password:
+        target.password = keyring.get_password("tachibana", "password")
+    if not target.second_password:
+        target.second_password = keyring.get_password("tachibana", "second_password")
+    if not target.tel_pass:
+        target.tel_pass = keyring.get_password("tachibana", "tel_pass")
+    if not target.account_code:
+        target.account_code = keyring.get_password("tachibana", "account_code")
+
+
+def _market_price_url(virtual_url: str, codes: List[str], columns: str) -> str:
+    """Build a CLMMfdsGetMarketPrice request URL for up to 120 codes.
+
+    Requests are encoded as JSON in the query string of the virtual URL.
+    Field names follow the e‑branch API specification and should be
+    checked against it when the login flow is implemented.
+    """
+    payload = {
+        "sCLMID": "CLMMfdsGetMarketPrice",
+        "sTargetIssueCode": ",".join(codes),
+        "sTargetColumn": columns,
+        "sJsonOfmt": "4",
+    }
+    return f"{virtual_url}?{json.dumps(payload)}"
+
+
+class SessionExpiredError(Exception):
+    """The server rejected the virtual URL; a new login is required."""
+
+
+def _parse_market_prices(response: httpx.Response) -> List[Dict[str, object]]:
+    if response.status_code in (401, 403):
+        raise SessionExpiredError(f"HTTP {response.status_code}")
+    response.raise_for_status()
+    data = response.json()
+    # p_errno "2" signals an invalid session; check against the API specification
+    if str(data.get("p_errno", "0")) == "2":
+        raise SessionExpiredError(data.get("p_err", "session expired"))
+    return data.get("aCLMMfdsMarketPrice", [])
+
+
+def _placeholder_login() -> VirtualSession:
+    """Stand-in for the real login request shared by both data sources.
+
+    TODO: send a login request to the API using the credentials, e.g.
+    response = session.post("https://example.com/login", data={...}),
+    and read the virtual URL from the response.
+    """
+    return VirtualSession(
+        virtual_url="https://example.com/virtual",
+        expires_at=end_of_trading_day(now_jst()),
+    )
+
+
+def _quotes_from_rows(rows: List[Dict[str, object]], chunk: List[str]) -> List[Quote]:
+    """Convert market price rows for ``chunk`` into quotes."""
+    now = time.time()
+    results: List[Quote] = []
+    for row in rows:
+        code = str(row.get("sIssueCode", ""))
+        price = _to_float(row.get("pDPP"))
+        if code not in chunk or price is None:
+            continue
+        results.append(
+            Quote(
+                code=code,
+                current_price=price,
+                high=_to_float(row.get("pDHP")),
+                low=_to_float(row.get("pDLP")),
+                volume=int(_to_float(row.get("pDV")) or 0),
+                timestamp=now,
+                base_price=_to_float(row.get("pPRP")),
+            )
+        )
+    return results
+
+
+def _chunks(codes: Iterable[str]) -> List[List[str]]:
+    codes = list(dict.fromkeys(codes))
+    return [
+        codes[start:start + _MARKET_PRICE_CHUNK]
+        for start in range(0, len(codes), _MARKET_PRICE_CHUNK)
+    ]
 
 
 class TachibanaDataSource(DataSource):
     """Fetch quotes via the Tachibana Securities e‑branch API (仮想URL方式)。"""
 
-    def __init__(self) -> None:
+    codes_per_request = _MARKET_PRICE_CHUNK
+
+    def __init__(
+        self,
+        transport: Optional[httpx.BaseTransport] = None,
+        retry: RetryPolicy = DEFAULT_RETRY,
+        session_store: Optional[SessionStore] = None,
+    ) -> None:
         self.session: Optional[httpx.Client] = None
         self.virtual_url: Optional[str] = None
-        # Cache credentials from environment or keyring
-        self.user_id: Optional[str] = os.getenv("TACHIBANA_USER_ID")
-        self.password: Optional[str] = os.getenv("TACHIBANA_PASSWORD")
-        self.second_password: Optional[str] = os.getenv("TACHIBANA_SECOND_PASSWORD")
-        self.tel_pass: Optional[str] = os.getenv("TACHIBANA_TEL_PASS")
-        self.account_code: Optional[str] = os.getenv("TACHIBANA_ACCOUNT_CODE")
-        # If not in environment, try keyring (service names are arbitrary examples)
-        if not self.user_id:
-            self.user_id = keyring.get_password("tachibana", "user_id")
-        if not self.password:
-            self.password = keyring.get_password("tachibana", "password")
-        if not self.second_password:
-            self.second_password = keyring.get_password("tachibana", "second_password")
-        if not self.tel_pass:
-            self.tel_pass = keyring.get_password("tachibana", "tel_pass")
-        if not self.account_code:
-            self.account_code = keyring.get_password("tachibana", "account_code")
+        # Optional transport override, e.g. httpx.MockTransport in tests
+        self.transport = transport
+        self.retry = retry
+        # Virtual URL cache; defaults to the OS keyring
+        self.sessions = SessionManager(
+            self._authenticate,
+            session_store if session_store is not None else KeyringSessionStore(),
+        )
+        # Credentials from environment or keyring, read on first login
+        self.user_id: Optional[str] = None
+        self.password: Optional[str] = None
+        self.second_password: Optional[str] = None
+        self.tel_pass: Optional[str] = None
+        self.account_code: Optional[str] = None
 
     def login(self) -> bool:
         """Authenticate and obtain the virtual URL for subsequent requests.
@@ -54,62 +195,252 @@ class TachibanaDataSource(DataSource):
         authentication via phone. After successful login, this method
         should store the virtual URL and initialize an HTTP client session.
 
+        A virtual URL cached earlier on the same trading day is reused
+        without logging in again (see ``core.session_manager``).
+        """
+        if self.session is None:
+            self.session = create_client(self.transport)
+        self.virtual_url = self.sessions.get().virtual_url
+        return True
+
+    def _authenticate(self) -> VirtualSession:
+        """Perform the actual login request; called by the session manager.
+
         TODO: implement login according to the official API specification.
         """
-        # Example stub: open a session and set a placeholder URL
-        self.session = httpx.Client()
-        # Here you would send a login request to the API using self.user_id etc.
-        # For example:
-        # response = self.session.post("https://example.com/login", data={...})
-        # response.raise_for_status()
-        # self.virtual_url = response.json().get("virtual_url")
+        _load_credentials(self)
         # For now we assign a dummy URL. Replace this with real login logic.
-        self.virtual_url = "https://example.com/virtual"
-        return True
+        return _placeholder_login()
+
+    def get_quote(self, code: str) -> Optional[Quote]:
+        """Return the latest quote for ``code``, or None if the server has none.
+
+        Raises the request's error if fetching failed.
+        """
+        errors: Dict[str, Exception] = {}
+        quote = self.get_quotes([code], errors).get(code)
+        if code in errors:
+            raise errors[code]
+        return quote
 
-    def get_quote(self, code: str) -> Optional[Dict[str, object]]:
-        """Return the latest quote for the given code using the virtual URL.
+    def get_quotes(
+        self,
+        codes: Iterable[str],
+        errors: Optional[Dict[str, Exception]] = None,
+        include_base_price: bool = True,
+    ) -> QuoteBatch:
+        """Return quotes for many codes using one request per chunk.
 
-        TODO: send a request to the Tachibana API to retrieve quote data.
-        The actual path and parameters depend on the API definition. Make
-        sure to handle network errors and authentication expiration.
+        The market price endpoint returns the previous close together with
+        the current price, so the base price comes from the same request
+        and ``include_base_price`` makes no difference to the cost.
+        A failing chunk is recorded in ``errors`` for each of its codes and
+        the remaining chunks are still fetched.
         """
         if not self.session or not self.virtual_url:
             raise RuntimeError("Not logged in")
-        # Example request (needs to be replaced with API-specific logic)
+        results: List[Quote] = []
+        for chunk in _chunks(codes):
+            try:
+                rows = self._fetch_market_prices(chunk)
+            except Exception as ex:
+                if errors is not None:
+                    for code in chunk:
+                        errors[code] = ex
+                continue
+            results.extend(_quotes_from_rows(rows, chunk))
+        return QuoteBatch.from_quotes(results)
+
+    def get_base_prices(self, codes: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Return previous closes for many codes, one request per chunk."""
+        if not self.session or not self.virtual_url:
+            raise RuntimeError("Not logged in")
+        results: Dict[str, Optional[float]] = {}
+        for chunk in _chunks(codes):
+            for row in self._fetch_market_prices(chunk, "pPRP"):
+                code = str(row.get("sIssueCode", ""))
+                if code in chunk:
+                    results[code] = _to_float(row.get("pPRP"))
+        return results
+
+    def _fetch_market_prices(
+        self, codes: List[str], columns: str = _MARKET_PRICE_COLUMNS
+    ) -> List[Dict[str, object]]:
+        """Send one CLMMfdsGetMarketPrice request for up to 120 codes.
+
+        If the server reports the session as expired, log in again and
+        retry the request once.
+        """
         try:
-            # resp = self.session.get(f"{self.virtual_url}/price", params={"code": code})
-            # resp.raise_for_status()
-            # result = resp.json()
-            # Parse result into dict with current_price etc.
-            # Placeholder data until implemented
-            now = datetime.datetime.now()
-            return {
-                "code": code,
-                "current_price": 0.0,
-                "high": 0.0,
-                "low": 0.0,
-                "volume": 0,
-                "timestamp": now,
-            }
-        except Exception as ex:
-            print(f"Error fetching quote for {code}: {ex}")
-            return None
+            return self._request_market_prices(codes, columns)
+        except SessionExpiredError:
+            self.sessions.invalidate()
+        return self._request_market_prices(codes, columns)
+
+    def _request_market_prices(self, codes: List[str], columns: str) -> List[Dict[str, object]]:
+        self.virtual_url = self.sessions.get().virtual_url
+        url = _market_price_url(self.virtual_url, codes, columns)
+        with METRICS.timer("market_price_request", type(self).__name__):
+            response = request_with_retry(self.session, "GET", url, self.retry)
+        return _parse_market_prices(response)
+
+    def close(self) -> None:
+        """Close the HTTP session and stop the session refresh timer."""
+        self.sessions.close()
+        if self.session is not None:
+            self.session.close()
+            self.session = None
 
     def get_base_price(self, code: str) -> Optional[float]:
-        """Return the base price for limit calculation.
+        """Return the previous close for limit calculation, or None if unknown."""
+        return self.get_base_prices([code]).get(code)
 
-        TODO: query the API for the previous day's close or base price.
-        The Tachibana API may provide a separate endpoint or field for
-        this value. Until implemented, return None so that the caller
-        falls back to using the current price.
+    def get_daily_summary(self, code: str, date: datetime.date) -> Optional[Dict[str, object]]:
+        """Return day summary (high, low, close) for the given date.
+
+        The market price endpoint only knows about the current session,
+        so summaries are available for today's JST trading day; after the
+        close its current price is the closing price. Other dates return
+        None.
         """
+        if not self.session or not self.virtual_url:
+            raise RuntimeError("Not logged in")
+        if date != now_jst().date():
+            return None
+        for row in self._fetch_market_prices([code], "pDHP,pDLP,pDPP"):
+            if str(row.get("sIssueCode", "")) == code:
+                return {
+                    "high": _to_float(row.get("pDHP")),
+                    "low": _to_float(row.get("pDLP")),
+                    "close": _to_float(row.get("pDPP")),
+                }
         return None
 
-    def get_daily_summary(self, code: str, date: datetime.date) -> Optional[Dict[str, object]]:
-        """Return day summary (high, low, close) for the given date.
 
-        TODO: implement this using the API's daily summary endpoint if
-        available. If not implemented, return None.
+class AsyncTachibanaDataSource:
+    """``asyncio`` variant of ``TachibanaDataSource`` built on ``httpx.AsyncClient``.
+
+    Chunks of a ``get_quotes`` call are sent concurrently, up to
+    ``max_concurrency`` requests in flight, over one pooled client (multiplexed
+    on a single connection when HTTP/2 is negotiated). It does not derive
+    from ``DataSource`` because its methods are coroutines.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        retry: RetryPolicy = DEFAULT_RETRY,
+        max_concurrency: int = 16,
+        session_store: Optional[SessionStore] = None,
+    ) -> None:
+        self.session: Optional[httpx.AsyncClient] = None
+        self.virtual_url: Optional[str] = None
+        self.transport = transport
+        self.retry = retry
+        self.sessions = SessionManager(
+            self._authenticate,
+            session_store if session_store is not None else KeyringSessionStore(),
+        )
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.user_id: Optional[str] = None
+        self.password: Optional[str] = None
+        self.second_password: Optional[str] = None
+        self.tel_pass: Optional[str] = None
+        self.account_code: Optional[str] = None
+
+    async def login(self) -> bool:
+        """Authenticate (or reuse a cached virtual URL) without blocking the loop."""
+        if self.session is None:
+            self.session = create_async_client(self.transport)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        session = await asyncio.to_thread(self.sessions.get)
+        self.virtual_url = session.virtual_url
+        return True
+
+    def _authenticate(self) -> VirtualSession:
+        """Log in; runs in a worker thread via the session manager."""
+        _load_credentials(self)
+        return _placeholder_login()
+
+    async def get_quotes(
+        self,
+        codes: Iterable[str],
+        errors: Optional[Dict[str, Exception]] = None,
+        include_base_price: bool = True,
+    ) -> QuoteBatch:
+        """Return quotes for many codes, fetching all chunks concurrently.
+
+        Same result and error conventions as ``DataSource.get_quotes``.
         """
-        return None
\ No newline at end of file
+        if not self.session or not self.virtual_url:
+            raise RuntimeError("Not logged in")
+
+        async def fetch(chunk: List[str]) -> List[Quote]:
+            try:
+                rows = await self._fetch_market_prices(chunk)
+            except Exception as ex:
+                if errors is not None:
+                    for code in chunk:
+                        errors[code] = ex
+                return []
+            return _quotes_from_rows(rows, chunk)
+
+        results: List[Quote] = []
+        for quotes in await asyncio.gather(*(fetch(chunk) for chunk in _chunks(codes))):
+            results.extend(quotes)
+        return QuoteBatch.from_quotes(results)
+
+    async def get_base_prices(self, codes: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Return previous closes for many codes, fetching chunks concurrently."""
+        if not self.session or not self.virtual_url:
+            raise RuntimeError("Not logged in")
+        chunks = _chunks(codes)
+        responses = await asyncio.gather(
+            *(self._fetch_market_prices(chunk, "pPRP") for chunk in chunks)
+        )
+        results: Dict[str, Optional[float]] = {}
+        for chunk, rows in zip(chunks, responses):
+            for row in rows:
+                code = str(row.get("sIssueCode", ""))
+                if code in chunk:
+                    results[code] = _to_float(row.get("pPRP"))
+        return results
+
+    async def _fetch_market_prices(
+        self, codes: List[str], columns: str = _MARKET_PRICE_COLUMNS
+    ) -> List[Dict[str, object]]:
+        """Send one request, logging in again and retrying once on expiry.
+
+        Concurrent chunks rejected with the same session invalidate it only
+        once, so a single login serves all of their retries. Session
+        manager calls run in a worker thread: they take a lock and may
+        touch the keyring.
+        """
+        session = await self._session()
+        try:
+            return await self._request_market_prices(session, codes, columns)
+        except SessionExpiredError:
+            await asyncio.to_thread(self.sessions.invalidate, session)
+        return await self._request_market_prices(await self._session(), codes, columns)
+
+    async def _session(self) -> VirtualSession:
+        return self.sessions.current() or await asyncio.to_thread(self.sessions.get)
+
+    async def _request_market_prices(
+        self, session: VirtualSession, codes: List[str], columns: str
+    ) -> List[Dict[str, object]]:
+        self.virtual_url = session.virtual_url
+        url = _market_price_url(self.virtual_url, codes, columns)
+        async with self._semaphore:
+            # Timed once a slot is free, so queueing on the semaphore is excluded
+            with METRICS.timer("market_price_request", type(self).__name__):
+                response = await async_request_with_retry(self.session, "GET", url, self.retry)
+        return _parse_market_prices(response)
+
+    async def aclose(self) -> None:
+        """Close the HTTP session and stop the session refresh timer."""
+        self.sessions.close()
+        if self.session is not None:
+            await self.session.aclose()
+            self.session = None
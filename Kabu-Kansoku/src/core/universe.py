@@ -0,0 +1,151 @@
+"""Code master ("universe") loading.
+
+A universe is the set of listed codes the application may watch, read
+from a code master file such as the JPX listed-issues list exported to
+CSV, or a Parquet file with the same columns. Column names may be given
+in English (``code``, ``name``, ``market``) or as in the JPX file
+(``コード``, ``銘柄名``, ``市場・商品区分``); only the code column is
+required. CSV files are read as UTF-8 (with or without a BOM) and, if
+that fails, as cp932, the encoding JPX publishes its lists in.
+
+Reading Parquet requires ``pyarrow``, which is imported only when a
+Parquet file is loaded.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+_CODE_COLUMNS = ("code", "Code", "コード")
+_NAME_COLUMNS = ("name", "Name", "銘柄名")
+_MARKET_COLUMNS = ("market", "Market", "市場・商品区分")
+# Tried in order when no CSV encoding is given
+_CSV_ENCODINGS = ("utf-8-sig", "cp932")
+
+
+@dataclass(slots=True)
+class Universe:
+    """Listed codes with names and markets, indexed by code."""
+
+    codes: List[str]
+    names: List[str]
+    markets: List[str]
+    index_of: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.index_of = {code: i for i, code in enumerate(self.codes)}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Sequence[str]]) -> "Universe":
+        """Build a universe from (code, name, market) tuples; first code wins."""
+        codes: List[str] = []
+        names: List[str] = []
+        markets: List[str] = []
+        seen = set()
+        for code, name, market in records:
+            code = _normalize_code(code)
+            if not code or code in seen:
+                continue
+            seen.add(code)
+            codes.append(code)
+            names.append(name or "")
+            markets.append(market or "")
+        return cls(codes, names, markets)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self.index_of
+
+    def name(self, code: str) -> Optional[str]:
+        index = self.index_of.get(code)
+        return None if index is None else self.names[index]
+
+    def select(self, markets: Iterable[str]) -> "Universe":
+        """Return the codes listed on any of ``markets`` (substring match)."""
+        markets = list(markets)
+        return Universe.from_records(
+            record
+            for record in zip(self.codes, self.names, self.markets)
+            if any(market in record[2] for market in markets)
+        )
+
+
+def _normalize_code(value: object) -> str:
+    # Spreadsheet exports sometimes turn 7203 into 7203.0
+    code = str(value if value is not None else "").strip()
+    return code[:-2] if code.endswith(".0") else code
+
+
+def _pick(columns: Sequence[str], candidates: Sequence[str]) -> Optional[str]:
+    for candidate in candidates:
+        if candidate in columns:
+            return candidate
+    return None
+
+
+def _columns(path: str, columns: Sequence[str]) -> tuple:
+    code = _pick(columns, _CODE_COLUMNS)
+    if code is None:
+        raise ValueError(f"{path}: no code column (expected one of {', '.join(_CODE_COLUMNS)})")
+    return code, _pick(columns, _NAME_COLUMNS), _pick(columns, _MARKET_COLUMNS)
+
+
+def load_csv(path: str, encoding: Optional[str] = None) -> Universe:
+    """Read a code master CSV with a header row.
+
+    Without an ``encoding``, UTF-8 is tried first and then cp932.
+    """
+    if encoding is not None:
+        return _read_csv(path, encoding)
+    for candidate in _CSV_ENCODINGS[:-1]:
+        try:
+            return _read_csv(path, candidate)
+        except UnicodeDecodeError:
+            pass
+    return _read_csv(path, _CSV_ENCODINGS[-1])
+
+
+def _read_csv(path: str, encoding: str) -> Universe:
+    with open(path, newline="", encoding=encoding) as f:
+        reader = csv.DictReader(f)
+        code, name, market = _columns(path, reader.fieldnames or [])
+        return Universe.from_records(
+            (row[code], row[name] if name else "", row[market] if market else "")
+            for row in reader
+        )
+
+
+def load_parquet(path: str) -> Universe:
+    """Read a code master Parquet file (requires ``pyarrow``)."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as ex:
+        raise RuntimeError("Reading Parquet code masters requires pyarrow") from ex
+    table = pq.read_table(path)
+    code, name, market = _columns(path, table.column_names)
+    count = table.num_rows
+
+    def column(label: Optional[str]) -> List[str]:
+        if label is None:
+            return [""] * count
+        return ["" if value is None else str(value) for value in table.column(label).to_pylist()]
+
+    return Universe.from_records(zip(column(code), column(name), column(market)))
+
+
+def load_universe(path: str, encoding: Optional[str] = None) -> Universe:
+    """Load a code master by file extension (``.csv`` or ``.parquet``).
+
+    ``encoding`` applies to CSV files only; see ``load_csv``.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return load_csv(path, encoding)
+    if extension in (".parquet", ".pq"):
+        return load_parquet(path)
+    raise ValueError(f"Unsupported code master format: {path}")
@@ -0,0 +1,337 @@
+"""Headless monitoring loop for servers.
+
+``Monitor`` runs the same poll → limits → event detection pipeline as
+the GUI, but on an ``asyncio`` event loop without importing Qt. Ticks
+are scheduled at a fixed rate; a tick that overruns the interval makes
+the loop skip the missed slots instead of queueing them. Detected events
+go to an ``EventSink`` (JSON lines or SQLite) and per-stage latencies
+are summarised periodically on stderr; the same timings also feed the
+shared ``core.metrics.METRICS`` histograms, which can be written to a
+Prometheus text or JSON lines file at every report.
+
+With a snapshot path, the last quotes, limits and event detector state
+are written every ``snapshot_interval`` seconds and at exit (see
+``core.snapshot``); a snapshot from the same trading day is loaded at
+start-up, so a restarted monitor does not report today's first touches
+again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import json
+import sys
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, TextIO
+
+import numpy as np
+
+from core.event_detector import EventDetector
+from core.limit_rules import calculate_limits_batch
+from core.market_time import trading_day
+from core.metrics import METRICS
+from core.models import Event, QuoteBatch
+from core.snapshot import Snapshot, read_snapshot, write_snapshot
+from storage.event_log import EventLog, event_json
+
+#: Stages timed on every tick, in pipeline order.
+STAGES = ("fetch", "detect", "store", "total")
+
+
+class TickStats:
+    """Rolling per-stage latency samples over the last ``window`` ticks."""
+
+    def __init__(self, window: int = 1000) -> None:
+        self.samples: Dict[str, Deque[float]] = {stage: deque(maxlen=window) for stage in STAGES}
+        self.ticks = 0
+        self.overruns = 0
+        self.failed_codes = 0
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    def summary(self) -> Dict[str, object]:
+        """Return tick counters and p50/p95/p99/max in milliseconds per stage."""
+        result: Dict[str, object] = {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "failed_codes": self.failed_codes,
+        }
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.fromiter(samples, dtype=np.float64) * 1000.0
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result[stage] = {
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(float(values.max()), 3),
+            }
+        return result
+
+
+class EventSink:
+    """Destination for detected events."""
+
+    def write(self, events: List[Event]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesSink(EventSink):
+    """Write one JSON object per event to a text stream."""
+
+    def __init__(self, stream: TextIO = sys.stdout) -> None:
+        self.stream = stream
+
+    def write(self, events: List[Event]) -> None:
+        for event in events:
+            self.stream.write(event_json(event) + "\n")
+        self.stream.flush()
+
+
+class EventLogSink(EventSink):
+    """Append events to a JSON lines file (``storage.event_log.EventLog``)."""
+
+    def __init__(self, path: str) -> None:
+        self.log = EventLog(path)
+
+    def write(self, events: List[Event]) -> None:
+        self.log.write(events)
+
+    def close(self) -> None:
+        self.log.close()
+
+
+class TeeSink(EventSink):
+    """Write events to several sinks in turn."""
+
+    def __init__(self, *sinks: EventSink) -> None:
+        self.sinks = sinks
+
+    def write(self, events: List[Event]) -> None:
+        for sink in self.sinks:
+            sink.write(events)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+class DatabaseSink(EventSink):
+    """Hand events to a write-behind ``DatabaseWriter``."""
+
+    def __init__(self, path: str) -> None:
+        # Imported here so JSON-only runs never touch SQLite
+        from storage.writer import DatabaseWriter
+
+        self.writer = DatabaseWriter(path)
+
+    def write(self, events: List[Event]) -> None:
+        self.writer.save_events(events)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class Monitor:
+    """Poll a data source on a fixed interval and report limit events.
+
+    ``data_source`` may be a ``DataSource`` (called in a worker thread)
+    or an object with coroutine methods such as
+    ``AsyncTachibanaDataSource``.
+    """
+
+    def __init__(
+        self,
+        data_source,
+        codes: List[str],
+        sink: EventSink,
+        interval: float = 1.0,
+        stats_interval: float = 10.0,
+        stats_stream: TextIO = sys.stderr,
+        recorder=None,
+        metrics_path: Optional[str] = None,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: float = 30.0,
+    ) -> None:
+        """``recorder`` (e.g. ``core.simulation.QuoteRecorder``) receives every fetched batch.
+
+        ``metrics_path`` ending in ``.prom`` is rewritten with Prometheus
+        text at each report; any other path gets a JSON lines snapshot
+        appended.
+        """
+        self.data_source = data_source
+        self.codes = list(dict.fromkeys(codes))
+        self.sink = sink
+        self.interval = interval
+        self.stats_interval = stats_interval
+        self.stats_stream = stats_stream
+        self.recorder = recorder
+        self.metrics_path = metrics_path
+        self.source = type(getattr(data_source, "inner", data_source)).__name__
+        self.detector = EventDetector()
+        self.stats = TickStats()
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        # Last values per watched code, kept only when snapshots are written
+        self._state: Optional[Snapshot] = None
+        self._row: Dict[str, int] = {}
+        if snapshot_path:
+            today = trading_day(datetime.datetime.now())
+            self._state = Snapshot.empty(today, self.codes, 0.0)
+            self._row = {code: i for i, code in enumerate(self.codes)}
+        self._async = asyncio.iscoroutinefunction(getattr(data_source, "get_quotes", None))
+
+    async def _call(self, name: str, *args, **kwargs):
+        method = getattr(self.data_source, name)
+        if self._async:
+            return await method(*args, **kwargs)
+        return await asyncio.to_thread(method, *args, **kwargs)
+
+    async def run(self, ticks: Optional[int] = None) -> TickStats:
+        """Run until cancelled, or for ``ticks`` ticks if given."""
+        await self._call("login")
+        if self.snapshot_path:
+            self.restore_snapshot(self.snapshot_path)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        last_report = last_snapshot = start
+        slot = 0
+        try:
+            while ticks is None or self.stats.ticks < ticks:
+                await self.tick()
+                now = loop.time()
+                if self.stats_interval and now - last_report >= self.stats_interval:
+                    self.report()
+                    last_report = now
+                if self.snapshot_path and now - last_snapshot >= self.snapshot_interval:
+                    self.save_snapshot(self.snapshot_path)
+                    last_snapshot = now
+                # Next slot on the fixed-rate grid; skip slots already missed
+                next_slot = int((now - start) / self.interval) + 1
+                if next_slot > slot + 1:
+                    self.stats.overruns += next_slot - slot - 1
+                slot = next_slot
+                await asyncio.sleep(max(0.0, start + slot * self.interval - loop.time()))
+        finally:
+            self.report()
+            if self.snapshot_path:
+                self.save_snapshot(self.snapshot_path)
+            self.sink.close()
+            if self.recorder is not None:
+                self.recorder.close()
+            await self._close_source()
+        return self.stats
+
+    async def _close_source(self) -> None:
+        if hasattr(self.data_source, "aclose"):
+            await self.data_source.aclose()
+        elif hasattr(self.data_source, "close"):
+            self.data_source.close()
+
+    async def tick(self) -> List[Event]:
+        """Fetch, detect and store once."""
+        started = time.perf_counter()
+        errors: Dict[str, Exception] = {}
+        try:
+            batch: QuoteBatch = await self._call("get_quotes", self.codes, errors)
+        except Exception as ex:
+            print(f"Error fetching quotes: {ex}", file=sys.stderr)
+            self.stats.failed_codes += len(self.codes)
+            self.stats.ticks += 1
+            return []
+        if self.recorder is not None:
+            self.recorder.write(batch)
+        fetched = time.perf_counter()
+        self.stats.failed_codes += len(errors)
+        # The previous close arrives with the quote; without one, the
+        # current price stands in so the row is still tracked
+        base = np.where(np.isnan(batch.base_price), batch.price, batch.base_price)
+        limit_up, limit_down = calculate_limits_batch(base)
+        events = self.detector.process(batch, limit_up, limit_down)
+        if self._state is not None:
+            self._remember(batch, base, limit_up, limit_down)
+        detected = time.perf_counter()
+        if events:
+            self.sink.write(events)
+        stored = time.perf_counter()
+        self.stats.record("fetch", fetched - started)
+        self.stats.record("detect", detected - fetched)
+        self.stats.record("store", stored - detected)
+        self.stats.record("total", stored - started)
+        METRICS.observe("get_quotes", fetched - started, self.source)
+        METRICS.observe("detect", detected - fetched)
+        METRICS.observe("store", stored - detected)
+        METRICS.observe("tick", stored - started, self.source)
+        self.stats.ticks += 1
+        return events
+
+    def _remember(
+        self, batch: QuoteBatch, base: np.ndarray, limit_up: np.ndarray, limit_down: np.ndarray
+    ) -> None:
+        state = self._state
+        rows = np.fromiter((self._row[code] for code in batch.codes), dtype=np.intp, count=len(batch))
+        state.price[rows] = batch.price
+        state.base_price[rows] = base
+        state.limit_up[rows] = limit_up
+        state.limit_down[rows] = limit_down
+        state.updated[rows] = batch.timestamp
+
+    def restore_snapshot(self, path: str) -> bool:
+        """Load today's detector state and last quotes from ``path``; False if unusable."""
+        try:
+            snapshot = read_snapshot(path)
+        except (OSError, ValueError) as ex:
+            print(f"Could not read snapshot: {ex}", file=sys.stderr)
+            return False
+        if snapshot is None or snapshot.day != trading_day(datetime.datetime.now()):
+            return False
+        self.detector.restore(
+            snapshot.day,
+            snapshot.codes,
+            **{name: getattr(snapshot, name) for name in ("high", "low", "at_up", "at_down", "touched_up", "touched_down")},
+        )
+        if self._state is not None:
+            pairs = [(self._row[code], i) for i, code in enumerate(snapshot.codes) if code in self._row]
+            if pairs:
+                rows, source = (np.array(column, dtype=np.intp) for column in zip(*pairs))
+                for name in ("price", "base_price", "limit_up", "limit_down", "updated"):
+                    getattr(self._state, name)[rows] = getattr(snapshot, name)[source]
+        # Simulated sources carry on from the saved prices
+        inner = getattr(self.data_source, "inner", self.data_source)
+        if hasattr(inner, "restore_snapshot"):
+            inner.restore_snapshot(snapshot)
+        return True
+
+    def save_snapshot(self, path: str) -> None:
+        state = self._state
+        if state is None:
+            return
+        state.day = self.detector.day or state.day
+        state.taken = time.time()
+        for name, values in self.detector.state(self.codes).items():
+            setattr(state, name, values)
+        try:
+            write_snapshot(path, state)
+        except OSError as ex:
+            print(f"Error writing snapshot to {path}: {ex}", file=sys.stderr)
+
+    def report(self) -> None:
+        self.stats_stream.write(json.dumps({"stats": self.stats.summary()}) + "\n")
+        self.stats_stream.flush()
+        if self.metrics_path:
+            self.write_metrics(self.metrics_path)
+
+    def write_metrics(self, path: str) -> None:
+        prometheus = path.endswith(".prom")
+        try:
+            with open(path, "w" if prometheus else "a", encoding="utf-8") as f:
+                f.write(METRICS.to_prometheus() if prometheus else METRICS.to_json_lines())
+        except OSError as ex:
+            print(f"Error writing metrics to {path}: {ex}", file=sys.stderr)
@@ -0,0 +1,189 @@
+"""Command line entry point: ``python -m kabu_kansoku <command>``.
+
+Run from ``src/`` (or with ``src`` on ``PYTHONPATH``). Commands:
+
+- ``gui``: start the desktop application (same as ``python main.py``);
+- ``monitor``: run the headless monitoring loop without Qt, against the
+  broker or a simulated market (``--source sim``/``replay``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import multiprocessing
+import sys
+from typing import List, Optional
+
+
+def read_codes(path: str, encoding: Optional[str] = None) -> List[str]:
+    """Read codes from a code master (``.csv``/``.parquet``) or a plain list.
+
+    Plain lists have one code per line; blank lines and ``#`` comments are
+    ignored. Without an ``encoding`` a CSV is tried as UTF-8, then cp932,
+    and a plain list is read as UTF-8.
+    """
+    if path.lower().endswith((".csv", ".parquet", ".pq")):
+        from core.universe import load_universe
+
+        return load_universe(path, encoding).codes
+    codes = []
+    with open(path, encoding=encoding or "utf-8") as f:
+        for line in f:
+            code = line.split("#", 1)[0].strip()
+            if code:
+                codes.append(code)
+    return codes
+
+
+def _codes(args: argparse.Namespace, data_source) -> List[str]:
+    if args.codes_file:
+        return read_codes(args.codes_file, args.encoding)
+    if args.synthetic:
+        from core.simulation import synthetic_codes
+
+        return synthetic_codes(args.synthetic)
+    # A replay without a code list watches every code in the recording
+    return list(getattr(data_source, "codes", []))
+
+
+def monitor(args: argparse.Namespace) -> int:
+    from headless.monitor import DatabaseSink, EventLogSink, JsonLinesSink, Monitor, TeeSink
+    from kabu_kansoku.sources import build_data_source
+
+    if args.source == "replay" and not args.replay:
+        print("--source replay requires --replay FILE", file=sys.stderr)
+        return 2
+    if args.processes > 1:
+        from core.sharded_data_source import ShardedDataSource
+
+        # Each worker process builds its own data source from the same options;
+        # the factory must be importable by name, so it cannot live in __main__
+        options = argparse.Namespace(**{k: v for k, v in vars(args).items() if k != "func"})
+        factory = functools.partial(build_data_source, options, True)
+        data_source = ShardedDataSource(factory, args.processes)
+    else:
+        data_source = build_data_source(args)
+    codes = _codes(args, getattr(data_source, "inner", data_source))
+    if not codes:
+        print("No codes to monitor; use --codes-file or --synthetic", file=sys.stderr)
+        return 1
+    sink = DatabaseSink(args.db) if args.db else JsonLinesSink()
+    if args.events_out:
+        sink = TeeSink(sink, EventLogSink(args.events_out))
+    recorder = None
+    if args.record:
+        from core.simulation import QuoteRecorder
+
+        recorder = QuoteRecorder(args.record)
+    runner = Monitor(
+        data_source,
+        codes,
+        sink,
+        interval=args.interval,
+        stats_interval=args.stats_interval,
+        recorder=recorder,
+        metrics_path=args.metrics_out,
+        snapshot_path=args.snapshot,
+    )
+    try:
+        asyncio.run(runner.run(args.ticks))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def gui(args: argparse.Namespace) -> int:
+    from main import main
+
+    options = args.options[1:] if args.options[:1] == ["--"] else args.options
+    return main(options)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="kabu_kansoku")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    window = commands.add_parser(
+        "gui", help="start the desktop application; see `gui -- --help` for its options"
+    )
+    window.add_argument("options", nargs=argparse.REMAINDER, help="options passed to main.py")
+    window.set_defaults(func=gui)
+
+    run = commands.add_parser("monitor", help="monitor limits headless, without Qt")
+    codes = run.add_mutually_exclusive_group()
+    codes.add_argument("--codes-file", help="code master (CSV/Parquet) or one stock code per line")
+    codes.add_argument("--synthetic", type=int, metavar="N", help="watch N generated codes")
+    run.add_argument(
+        "--encoding",
+        help="text encoding of --codes-file (default UTF-8; a CSV falls back to cp932)",
+    )
+    run.add_argument("--interval", type=float, default=1.0, help="seconds between ticks (default 1)")
+    run.add_argument(
+        "--source",
+        choices=("dummy", "sim", "replay", "tachibana"),
+        default="dummy",
+        help="data source (default dummy); sim is a seeded market simulation",
+    )
+    run.add_argument("--db", help="write events to this SQLite database instead of stdout")
+    run.add_argument(
+        "--stats-interval",
+        type=float,
+        default=10.0,
+        help="seconds between latency reports on stderr; 0 reports only at exit",
+    )
+    run.add_argument("--ticks", type=int, help="stop after this many ticks")
+    run.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        metavar="N",
+        help="shard codes over N worker processes, each with its own data source",
+    )
+    run.add_argument("--record", metavar="FILE", help="append every fetched quote to FILE (JSON lines)")
+    run.add_argument(
+        "--metrics-out",
+        metavar="FILE",
+        help="write stage latency histograms at each report (.prom: Prometheus text, else JSON lines)",
+    )
+    run.add_argument(
+        "--events-out",
+        metavar="FILE",
+        help="also append every event to FILE (JSON lines), e.g. for tail -f",
+    )
+    run.add_argument(
+        "--snapshot",
+        metavar="FILE",
+        help="save monitoring state to FILE every 30 s and resume from it on restart",
+    )
+
+    sim = run.add_argument_group("simulation")
+    sim.add_argument("--seed", type=int, help="random seed for dummy/sim sources and fault injection")
+    sim.add_argument("--replay", metavar="FILE", help="quote recording to play back (--source replay)")
+    sim.add_argument(
+        "--replay-speed",
+        type=float,
+        help="play back in recorded time at this speed; default is one frame per tick",
+    )
+    sim.add_argument("--storm-at", type=int, metavar="TICK", help="pin many codes to a limit at TICK")
+    sim.add_argument(
+        "--storm-fraction", type=float, default=0.2, help="share of codes in the storm (default 0.2)"
+    )
+    sim.add_argument("--latency", type=float, default=0.0, help="seconds added to every call")
+    sim.add_argument("--jitter", type=float, default=0.0, help="random extra latency, up to seconds")
+    sim.add_argument("--error-rate", type=float, default=0.0, help="probability each code fails")
+    sim.add_argument("--failure-rate", type=float, default=0.0, help="probability a whole call fails")
+    run.set_defaults(func=monitor)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    # Frozen builds start --processes workers by re-running this executable
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Data sources selected by the ``monitor`` command line options.
+
+Kept out of ``__main__`` so that ``build_data_source`` can be pickled by
+reference and called in ``ShardedDataSource`` worker processes.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+
+def build_data_source(args: argparse.Namespace, sync: bool = False):
+    """Build the data source selected by ``args``; ``sync`` avoids the asyncio client."""
+    if args.source == "tachibana":
+        from core import tachibana_data_source
+
+        if sync:
+            return tachibana_data_source.TachibanaDataSource()
+        return tachibana_data_source.AsyncTachibanaDataSource()
+    if args.source == "dummy":
+        from core.dummy_data_source import DummyDataSource
+
+        data_source = DummyDataSource(args.seed)
+    else:
+        from core import simulation
+
+        if args.source == "replay":
+            data_source = simulation.ReplayDataSource(args.replay, args.replay_speed)
+        else:
+            scenarios = []
+            if args.storm_at is not None:
+                scenarios.append(simulation.LimitStorm(args.storm_at, args.storm_fraction))
+            data_source = simulation.SimulatedDataSource(args.seed, scenarios=scenarios)
+    if args.latency or args.jitter or args.error_rate or args.failure_rate:
+        from core.simulation import FaultInjectingDataSource
+
+        data_source = FaultInjectingDataSource(
+            data_source,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            failure_rate=args.failure_rate,
+            seed=args.seed,
+        )
+    return data_source
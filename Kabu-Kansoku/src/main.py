@@ -6,43 +6,122 @@ credentials or sensitive information. To use the real Tachibana API,
 configure environment variables or OS keyring as described in the README.
 """
 
+import argparse
+import functools
+import multiprocessing
 import sys
 import datetime
-from typing import List, Optional
-
-from PySide6.QtCore import QTimer, Qt
-from PySide6.QtWidgets import (
-    QApplication,
-    QMainWindow,
-    QSplitter,
-    QTableWidget,
-    QTableWidgetItem,
-    QWidget,
-    QVBoxLayout,
-    QLabel,
-    QTabWidget,
-    QTextEdit,
-    QMessageBox,
-)
-
-from core.data_source_base import DataSource
-from core.dummy_data_source import DummyDataSource
-from core.limit_rules import calculate_limits
+from typing import Callable, Dict, List, Optional, Union
+
+from core.startup_profile import StartupProfile
+
+#: Start-up timings, printed with ``--profile-startup``. Offsets are
+#: relative to the import of this module.
+PROFILE = StartupProfile()
+
+with PROFILE.stage("import PySide6"):
+    from PySide6.QtCore import QModelIndex, Qt, QTimer, Signal
+    from PySide6.QtGui import QCloseEvent
+    from PySide6.QtWidgets import (
+        QApplication,
+        QMainWindow,
+        QPlainTextEdit,
+        QSplitter,
+        QTableView,
+        QWidget,
+        QVBoxLayout,
+        QLabel,
+        QTabWidget,
+        QTextEdit,
+    )
+
+# Data sources are imported by ``create_data_source`` on the poller thread
+with PROFILE.stage("import application modules"):
+    from core.data_source_base import DataSource
+    from core.finalizer import FinalizeReport
+    from core.models import Event
+    from core.market_time import trading_day
+    from core.scheduler import AdaptiveSchedule, Schedule, TieredSchedule
+    from core.snapshot import read_snapshot
+    from storage.event_log import EventLog
+    from storage.writer import DatabaseWriter
+    from ui.diagnostics import DiagnosticsPanel
+    from ui.history import HistoryPanel
+    from ui.poller import PollerThread, QuotePoller
+    from ui.quote_table_model import QuoteTableModel
+
+
+def create_data_source(processes: int = 1) -> DataSource:
+    """Import, build and log in the data source; runs on the poller thread.
+
+    With ``processes`` above 1, codes are sharded over that many worker
+    processes, each with its own data source.
+    """
+    # Choose data source. In the future this could be set via CLI or config.
+    with PROFILE.stage("import data source"):
+        from core.dummy_data_source import DummyDataSource
+    with PROFILE.stage("create data source"):
+        if processes > 1:
+            from core.sharded_data_source import ShardedDataSource
+
+            data_source: DataSource = ShardedDataSource(DummyDataSource, processes)
+        else:
+            data_source = DummyDataSource()
+    with PROFILE.stage("data source login"):
+        data_source.login()
+    return data_source
 
 
 class MainWindow(QMainWindow):
     """Main window containing dashboard, history and settings tabs."""
 
-    def __init__(self, data_source: DataSource, update_interval: int = 30) -> None:
+    #: Emitted with the full watchlist whenever it changes.
+    watchlist_changed = Signal(list)
+
+    def __init__(
+        self,
+        data_source: Union[DataSource, Callable[[], DataSource]],
+        update_interval: int = 30,
+        db_path: str = "kabu.db",
+        schedule: Optional[Schedule] = None,
+        snapshot_path: Optional[str] = None,
+        event_log_path: Optional[str] = None,
+    ) -> None:
+        """``data_source`` may be a factory, called on the poller thread.
+
+        Pass a ``schedule`` to poll codes by distance to their limits
+        instead of all codes every ``update_interval`` seconds. With a
+        ``snapshot_path`` the intraday state is saved periodically and
+        today's snapshot is restored at start-up; events are also
+        appended to ``event_log_path`` as JSON lines if given.
+        """
         super().__init__()
-        self.data_source = data_source
+        self.data_source: Optional[DataSource] = (
+            data_source if isinstance(data_source, DataSource) else None
+        )
         self.update_interval = update_interval  # seconds
-        self.watchlist: List[str] = []
+        self.model = QuoteTableModel(self)
+        # Today's limit events per code, shown in the detail panel
+        self.events: Dict[str, List[Event]] = {}
+        self.db_path = db_path
+        self.writer = DatabaseWriter(db_path)
+        self.event_log = EventLog(event_log_path) if event_log_path else None
         self.init_ui()
-        # Timer for periodic updates
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_quotes)
-        self.timer.start(self.update_interval * 1000)
+        # Quotes are fetched by a poller running on its own thread
+        self.poller = QuotePoller(
+            data_source, update_interval, db_path, schedule, snapshot_path=snapshot_path
+        )
+        self.poller_thread = PollerThread(self.poller, self)
+        self.watchlist_changed.connect(self.poller.set_codes)
+        self.poller.rows_changed.connect(self.model.apply_rows)
+        self.poller.events_detected.connect(self.on_events)
+        self.poller.errors_occurred.connect(self.show_errors)
+        self.poller.tick_finished.connect(self.on_tick_finished)
+        self.poller.day_finalized.connect(self.on_day_finalized)
+        self.poller.data_source_ready.connect(self.on_data_source_ready)
+        if snapshot_path:
+            self.restore_snapshot(snapshot_path)
+        self.poller_thread.start()
 
     def init_ui(self) -> None:
         self.setWindowTitle("Kabu‑Kansoku")
@@ -53,19 +132,11 @@ class MainWindow(QMainWindow):
         dashboard_layout = QVBoxLayout(dashboard)
         splitter = QSplitter(Qt.Horizontal)
         # Table: code, price, limit up, limit down, distance, hit, updated
-        self.table = QTableWidget(0, 7, splitter)
-        self.table.setHorizontalHeaderLabels([
-            "Code",
-            "Price",
-            "Limit Up",
-            "Limit Down",
-            "Distance",
-            "Hit",
-            "Updated",
-        ])
+        self.table = QTableView(splitter)
+        self.table.setModel(self.model)
         self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.cellClicked.connect(self.on_table_select)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.clicked.connect(self.on_table_select)
         splitter.addWidget(self.table)
 
         # Detail panel
@@ -74,24 +145,20 @@ class MainWindow(QMainWindow):
         splitter.addWidget(self.detail)
         splitter.setStretchFactor(0, 3)
         splitter.setStretchFactor(1, 2)
-        dashboard_layout.addWidget(splitter)
+        dashboard_layout.addWidget(splitter, 1)
+
+        # Non-blocking error log for failed fetches
+        self.error_log = QPlainTextEdit()
+        self.error_log.setReadOnly(True)
+        self.error_log.setMaximumBlockCount(500)
+        self.error_log.setMaximumHeight(100)
+        self.error_log.setPlaceholderText("Errors")
+        dashboard_layout.addWidget(self.error_log)
         tabs.addTab(dashboard, "Dashboard")
 
-        # History tab (placeholder)
-        history = QWidget()
-        history_layout = QVBoxLayout(history)
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(6)
-        self.history_table.setHorizontalHeaderLabels([
-            "Date",
-            "Code",
-            "High",
-            "Low",
-            "Close",
-            "Result",
-        ])
-        history_layout.addWidget(self.history_table)
-        tabs.addTab(history, "History")
+        # History tab: daily results paged from the database on demand
+        self.history = HistoryPanel(self.db_path)
+        tabs.addTab(self.history, "History")
 
         # Settings tab (placeholder)
         settings = QWidget()
@@ -99,62 +166,179 @@ class MainWindow(QMainWindow):
         settings_layout.addWidget(QLabel("Settings (coming soon)"))
         tabs.addTab(settings, "Settings")
 
+        # Diagnostics tab: latency percentiles per stage and data source
+        self.diagnostics = DiagnosticsPanel()
+        tabs.addTab(self.diagnostics, "Diagnostics")
+
         self.setCentralWidget(tabs)
 
+    def restore_snapshot(self, path: str) -> None:
+        """Show today's snapshot from ``path`` before the first poll; must run before polling."""
+        try:
+            snapshot = read_snapshot(path)
+        except (OSError, ValueError) as ex:
+            print(f"Could not read snapshot: {ex}", file=sys.stderr)
+            return
+        if snapshot is None or snapshot.day != trading_day(datetime.datetime.now()):
+            return
+        rows = self.poller.restore(snapshot)
+        self.add_codes(snapshot.codes)
+        self.model.apply_rows(rows)
+        taken = datetime.datetime.fromtimestamp(snapshot.taken)
+        self.statusBar().showMessage(f"Restored {len(rows)} quotes from {taken:%H:%M:%S}")
+
+    @property
+    def watchlist(self) -> List[str]:
+        """Codes currently shown on the dashboard, in table order."""
+        return self.model.codes
+
     def add_code(self, code: str) -> None:
         """Add a stock code to the watchlist and table."""
-        if code in self.watchlist:
-            return
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        for col in range(self.table.columnCount()):
-            self.table.setItem(row, col, QTableWidgetItem(""))
-        self.table.item(row, 0).setText(code)
-        self.watchlist.append(code)
-
-    def update_quotes(self) -> None:
-        """Fetch and update quote information for all watched codes."""
-        for row, code in enumerate(self.watchlist):
+        if self.model.add_code(code):
+            self.watchlist_changed.emit(list(self.watchlist))
+
+    def add_codes(self, codes: List[str]) -> None:
+        """Add many codes at once, e.g. a whole universe."""
+        if self.model.add_codes(codes):
+            self.watchlist_changed.emit(list(self.watchlist))
+
+    def on_events(self, events: List[Event]) -> None:
+        """Persist limit events in the background and keep them for the detail view."""
+        self.writer.save_events(events)
+        if self.event_log is not None:
             try:
-                quote = self.data_source.get_quote(code)
-            except Exception as ex:
-                QMessageBox.warning(self, "Data error", f"Failed to fetch data for {code}: {ex}")
-                continue
-            if not quote:
-                continue
-            price = quote.get("current_price")
-            base = self.data_source.get_base_price(code) or price
-            limit_up, limit_down = calculate_limits(base)
-            # Distance to nearest limit
-            dist = min(limit_up - price, price - limit_down)
-            hit = "Yes" if (price >= limit_up or price <= limit_down) else ""  # simple flag
-            # Update table cells
-            self.table.item(row, 1).setText(f"{price:.2f}")
-            self.table.item(row, 2).setText(f"{limit_up:.2f}")
-            self.table.item(row, 3).setText(f"{limit_down:.2f}")
-            self.table.item(row, 4).setText(f"{dist:.2f}")
-            self.table.item(row, 5).setText(hit)
-            self.table.item(row, 6).setText(datetime.datetime.now().strftime("%H:%M:%S"))
-
-    def on_table_select(self, row: int, column: int) -> None:
+                self.event_log.write(events)
+            except OSError as ex:
+                self.show_errors({"*": f"Event log write failed: {ex}"})
+        for event in events:
+            self.events.setdefault(event.code, []).append(event)
+
+    def show_errors(self, errors: Dict[str, str]) -> None:
+        """Append fetch errors to the error log without blocking."""
+        stamp = datetime.datetime.now().strftime("%H:%M:%S")
+        for code, message in errors.items():
+            self.error_log.appendPlainText(f"{stamp} {code}: {message}")
+
+    def on_tick_finished(self, ts: datetime.datetime, changed: int, failed: int) -> None:
+        message = f"Updated {ts:%H:%M:%S} ({changed} changed"
+        if failed:
+            message += f", {failed} failed"
+        self.statusBar().showMessage(message + ")")
+
+    def on_data_source_ready(self, data_source: DataSource) -> None:
+        self.data_source = data_source
+        self.statusBar().showMessage(f"Connected: {type(data_source).__name__}")
+
+    def on_day_finalized(self, report: FinalizeReport) -> None:
+        """Reload the History tab so it includes the day's results."""
+        self.history.refresh()
+        message = f"Finalised {report.date}: {report.written} written"
+        if report.missing:
+            message += f", {len(report.missing)} missing"
+        self.statusBar().showMessage(message)
+
+    def shutdown(self) -> None:
+        """Stop the poller thread and flush pending writes; safe to repeat."""
+        self.poller_thread.shutdown()
+        self.history.shutdown()
+        self.writer.close()
+        if self.event_log is not None:
+            self.event_log.close()
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        self.shutdown()
+        super().closeEvent(event)
+
+    def on_table_select(self, index: QModelIndex) -> None:
         """Display details for the selected code."""
-        code = self.table.item(row, 0).text()
-        self.detail.setPlainText(f"Details for {code}\n\n(Detail view not yet implemented)")
+        code = self.model.codes[index.row()]
+        lines = [f"Details for {code}", "", "Events:"]
+        for event in self.events.get(code, []):
+            lines.append(f"{event.ts:%H:%M:%S}  {event.event_type:<12} {event.price:.2f}")
+        if not self.events.get(code):
+            lines.append("(none)")
+        self.detail.setPlainText("\n".join(lines))
 
 
-def main() -> int:
-    # Choose data source. In the future this could be set via CLI or config.
-    data_source: DataSource = DummyDataSource()
-    data_source.login()
-    app = QApplication(sys.argv)
-    window = MainWindow(data_source)
-    # Example: prepopulate with a few codes
-    window.add_code("7203")  # Toyota Motor
-    window.add_code("6758")  # Sony Group
-    window.add_code("9984")  # SoftBank Group
-    window.show()
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="kabu_kansoku")
+    parser.add_argument(
+        "--profile-startup", action="store_true", help="print start-up timings to stderr"
+    )
+    parser.add_argument("--universe", help="code master (CSV or Parquet) to watch")
+    parser.add_argument(
+        "--encoding", help="text encoding of a --universe CSV (default: UTF-8, falling back to cp932)"
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=("adaptive", "tiered", "fixed"),
+        default="adaptive",
+        help="poll codes by distance to the limit (default), by tier, or all every 30s",
+    )
+    parser.add_argument(
+        "--max-rps",
+        type=float,
+        default=10.0,
+        help="request budget per second for the adaptive schedule (default 10)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        metavar="N",
+        help="fetch quotes in N worker processes, each with its own data source",
+    )
+    parser.add_argument(
+        "--snapshot",
+        default="kabu.snapshot",
+        metavar="FILE",
+        help="save intraday state to FILE and restore it on restart (default kabu.snapshot)",
+    )
+    parser.add_argument("--events-out", metavar="FILE", help="also append events to FILE (JSON lines)")
+    args, qt_args = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    with PROFILE.stage("create QApplication"):
+        app = QApplication(sys.argv[:1] + qt_args)
+    with PROFILE.stage("create main window"):
+        if args.schedule == "adaptive":
+            schedule: Optional[Schedule] = AdaptiveSchedule(max_requests_per_second=args.max_rps)
+        elif args.schedule == "tiered":
+            schedule = TieredSchedule()
+        else:
+            schedule = None
+        # The data source is built and logged in in the background
+        window = MainWindow(
+            functools.partial(create_data_source, args.processes),
+            schedule=schedule,
+            snapshot_path=args.snapshot or None,
+            event_log_path=args.events_out,
+        )
+        if args.universe:
+            from core.universe import load_universe
+
+            window.add_codes(load_universe(args.universe, args.encoding).codes)
+        else:
+            # Example: prepopulate with a few codes
+            window.add_code("7203")  # Toyota Motor
+            window.add_code("6758")  # Sony Group
+            window.add_code("9984")  # SoftBank Group
+    with PROFILE.stage("show window"):
+        window.show()
+    app.aboutToQuit.connect(window.shutdown)
+    QTimer.singleShot(0, lambda: PROFILE.mark("event loop running"))
+    if args.profile_startup:
+
+        def report() -> None:
+            # Wait for the background login so its stages are included
+            if window.data_source is None:
+                QTimer.singleShot(50, report)
+                return
+            print(PROFILE.report(), file=sys.stderr)
+
+        QTimer.singleShot(0, report)
     return app.exec()
 
 
 if __name__ == "__main__":
+    # Frozen builds start --processes workers by re-running this executable
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
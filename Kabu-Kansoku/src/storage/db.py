@@ -5,123 +5,650 @@ initializes the necessary tables and provides functions to insert
 daily results and events. For more complex use cases you may wish to
 use a higher‑level ORM such as SQLAlchemy, but SQLite's builtin
 support is sufficient here.
+
+Rows are stored in a compact, integer-only layout (schema version 1):
+
+- dates are day numbers since 1970‑01‑01 and timestamps are epoch
+  milliseconds;
+- codes and event types are stored once in lookup tables and referenced
+  by integer id;
+- prices are integers in sen (1/100 JPY);
+- the four hit/close flags are packed into one ``flags`` bitfield.
+
+Databases written with the original text/REAL schema are migrated in
+place the first time they are opened.
 """
 
 from __future__ import annotations
 
 import sqlite3
 import datetime
-from typing import Iterable
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from core.models import DayResult, Event, Streaks
+
+SCHEMA_VERSION = 1
+
+# Connection settings. WAL with synchronous=NORMAL only fsyncs at
+# checkpoints; cache_size is in KiB when negative (64 MiB here).
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Bits of daily_results.flags
+HIT_UP = 1
+HIT_DOWN = 2
+CLOSE_UP = 4
+CLOSE_DOWN = 8
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+_INSERT_DAILY = """
+    INSERT OR REPLACE INTO daily_results (
+        day, code_id, base_price, limit_up, limit_down, high, low, close, flags
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+_INSERT_EVENT = """
+    INSERT INTO events (ts, code_id, price, event_type_id)
+    VALUES (?, ?, ?, ?);
+"""
+
+_DAILY_COLUMNS = """d.day, c.code, d.base_price, d.limit_up, d.limit_down,
+                   d.high, d.low, d.close, d.flags"""
+
+
+def day_number(date: datetime.date) -> int:
+    """Return the number of days since 1970‑01‑01."""
+    return date.toordinal() - _EPOCH_ORDINAL
+
+
+def from_day_number(day: int) -> datetime.date:
+    return datetime.date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def _to_sen(price: Optional[float]) -> Optional[int]:
+    return None if price is None else round(price * 100)
+
+
+def _from_sen(sen: Optional[int]) -> Optional[float]:
+    return None if sen is None else sen / 100
+
+
+def _flags(result: DayResult) -> int:
+    return (
+        HIT_UP * result.hit_up
+        | HIT_DOWN * result.hit_down
+        | CLOSE_UP * result.close_up
+        | CLOSE_DOWN * result.close_down
+    )
+
+
+def _day_result(row: Tuple) -> DayResult:
+    flags = row[8]
+    return DayResult(
+        code=row[1],
+        date=from_day_number(row[0]),
+        base_price=_from_sen(row[2]),
+        limit_up=_from_sen(row[3]),
+        limit_down=_from_sen(row[4]),
+        high=_from_sen(row[5]),
+        low=_from_sen(row[6]),
+        close=_from_sen(row[7]),
+        hit_up=bool(flags & HIT_UP),
+        hit_down=bool(flags & HIT_DOWN),
+        close_up=bool(flags & CLOSE_UP),
+        close_down=bool(flags & CLOSE_DOWN),
+    )
+
+
+def _day_range(
+    since: Optional[datetime.date], until: Optional[datetime.date]
+) -> Tuple[Optional[int], ...]:
+    """Return (since, since, until, until) day numbers for optional bounds."""
+    since_day = day_number(since) if since else None
+    until_day = day_number(until) if until else None
+    return since_day, since_day, until_day, until_day
+
+
+class DailyColumns(NamedTuple):
+    """Daily results as parallel NumPy arrays (prices in JPY, NaN if missing)."""
 
-from core.models import DayResult, Event
+    date: np.ndarray  # datetime64[D]
+    code: np.ndarray  # str
+    base_price: np.ndarray
+    limit_up: np.ndarray
+    limit_down: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    hit_up: np.ndarray  # bool
+    hit_down: np.ndarray
+    close_up: np.ndarray
+    close_down: np.ndarray
+
+
+class EventColumns(NamedTuple):
+    """Events as parallel NumPy arrays."""
+
+    ts: np.ndarray  # datetime64[ms], UTC
+    code: np.ndarray  # str
+    price: np.ndarray  # JPY, NaN if missing
+    event_type: np.ndarray  # str
+
+
+class HistoryQuery(NamedTuple):
+    """Filter and sort order for paging through daily results."""
+
+    code_prefix: str = ""
+    # Keep rows with any of these flag bits set; 0 keeps every row
+    flags: int = 0
+    since: Optional[datetime.date] = None
+    until: Optional[datetime.date] = None
+    order_by: str = "date"  # "date" or "code"
+    descending: bool = True
+
+
+# Stand-in for NULL when reading integer columns into NumPy arrays
+_NULL = -(2 ** 62)
+
+_DAILY_INT_COLUMNS = f"""d.day, d.code_id,
+                   IFNULL(d.base_price, {_NULL}), IFNULL(d.limit_up, {_NULL}),
+                   IFNULL(d.limit_down, {_NULL}), IFNULL(d.high, {_NULL}),
+                   IFNULL(d.low, {_NULL}), IFNULL(d.close, {_NULL}), d.flags"""
+
+# Sort keys of a history page: the primary column, then the tie-breaker
+_PAGE_KEYS = {"date": ("d.day", "c.code"), "code": ("c.code", "d.day")}
+
+
+def _glob_prefix(prefix: str) -> str:
+    """GLOB pattern matching codes that start with ``prefix`` literally."""
+    return "".join(f"[{ch}]" if ch in "*?[" else ch for ch in prefix) + "*"
 
 
 class Database:
     def __init__(self, path: str = "kabu.db") -> None:
+        self.path = path
         self.conn = sqlite3.connect(path)
-        # store timestamps as ISO strings
-        self.conn.execute("PRAGMA journal_mode=WAL")
+        for pragma in _PRAGMAS:
+            self.conn.execute(pragma)
+        self._code_ids: Dict[str, int] = {}
+        self._event_type_ids: Dict[str, int] = {}
         self._init_tables()
 
     def _init_tables(self) -> None:
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        legacy = version == 0 and "date" in self._columns("daily_results")
+        with self._transaction():
+            # Explicit BEGIN so the DDL below is part of the transaction too
+            self.conn.execute("BEGIN")
+            if legacy:
+                self.conn.execute("ALTER TABLE daily_results RENAME TO legacy_daily_results")
+                self.conn.execute("ALTER TABLE events RENAME TO legacy_events")
+                self.conn.execute("DROP INDEX IF EXISTS idx_daily_results_code_date")
+                self.conn.execute("DROP INDEX IF EXISTS idx_events_code_ts")
+            self._create_tables()
+            if legacy:
+                self._migrate_legacy()
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _columns(self, table: str) -> List[str]:
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+
+    def _create_tables(self) -> None:
         cur = self.conn.cursor()
         cur.execute(
             """
-            CREATE TABLE IF NOT EXISTS daily_results (
-                date TEXT NOT NULL,
-                code TEXT NOT NULL,
-                base_price REAL,
-                limit_up REAL,
-                limit_down REAL,
-                high REAL,
-                low REAL,
-                close REAL,
-                hit_up INTEGER,
-                hit_down INTEGER,
-                close_up INTEGER,
-                close_down INTEGER,
-                PRIMARY KEY (date, code)
+            CREATE TABLE IF NOT EXISTS codes (
+                id INTEGER PRIMARY KEY,
+                code TEXT NOT NULL UNIQUE
             );
             """
         )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS event_types (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS daily_results (
+                day INTEGER NOT NULL,
+                code_id INTEGER NOT NULL,
+                base_price INTEGER,
+                limit_up INTEGER,
+                limit_down INTEGER,
+                high INTEGER,
+                low INTEGER,
+                close INTEGER,
+                flags INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, code_id)
+            ) WITHOUT ROWID;
+            """
+        )
         cur.execute(
             """
             CREATE TABLE IF NOT EXISTS events (
-                ts TEXT NOT NULL,
-                code TEXT NOT NULL,
-                price REAL,
-                event_type TEXT
+                ts INTEGER NOT NULL,
+                code_id INTEGER NOT NULL,
+                price INTEGER,
+                event_type_id INTEGER NOT NULL
             );
             """
         )
-        self.conn.commit()
+        # Per-code lookups: history of one code and its events by time
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_daily_results_code_day "
+            "ON daily_results (code_id, day);"
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_events_code_ts ON events (code_id, ts);")
+        # Daily summaries fetched by an unfinished end-of-day run
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS finalize_staging (
+                day INTEGER NOT NULL,
+                code_id INTEGER NOT NULL,
+                base_price INTEGER,
+                high INTEGER,
+                low INTEGER,
+                close INTEGER,
+                PRIMARY KEY (day, code_id)
+            ) WITHOUT ROWID;
+            """
+        )
 
-    def save_daily(self, result: DayResult) -> None:
-        """Insert or replace a daily result."""
+    def _migrate_legacy(self) -> None:
+        """Copy rows from the original text/REAL tables, then drop them."""
         cur = self.conn.cursor()
         cur.execute(
             """
-            INSERT OR REPLACE INTO daily_results (
-                date, code, base_price, limit_up, limit_down, high, low, close,
-                hit_up, hit_down, close_up, close_down
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-            """,
-            (
-                result.date.isoformat(),
-                result.code,
-                result.base_price,
-                result.limit_up,
-                result.limit_down,
-                result.high,
-                result.low,
-                result.close,
-                int(result.hit_up),
-                int(result.hit_down),
-                int(result.close_up),
-                int(result.close_down),
-            ),
+            INSERT OR IGNORE INTO codes (code)
+            SELECT code FROM legacy_daily_results UNION SELECT code FROM legacy_events;
+            """
+        )
+        cur.execute(
+            """
+            INSERT OR IGNORE INTO event_types (name)
+            SELECT DISTINCT event_type FROM legacy_events WHERE event_type IS NOT NULL;
+            """
+        )
+        cur.execute(
+            f"""
+            INSERT OR REPLACE INTO daily_results
+            SELECT CAST(julianday(l.date) - 2440587.5 AS INTEGER),
+                   c.id,
+                   CAST(ROUND(l.base_price * 100) AS INTEGER),
+                   CAST(ROUND(l.limit_up * 100) AS INTEGER),
+                   CAST(ROUND(l.limit_down * 100) AS INTEGER),
+                   CAST(ROUND(l.high * 100) AS INTEGER),
+                   CAST(ROUND(l.low * 100) AS INTEGER),
+                   CAST(ROUND(l.close * 100) AS INTEGER),
+                   (l.hit_up != 0) * {HIT_UP} | (l.hit_down != 0) * {HIT_DOWN}
+                   | (l.close_up != 0) * {CLOSE_UP} | (l.close_down != 0) * {CLOSE_DOWN}
+            FROM legacy_daily_results l JOIN codes c ON c.code = l.code;
+            """
+        )
+        # Event timestamps are naive local ISO strings, which SQLite would
+        # read as UTC, so they are converted in Python.
+        legacy = self.conn.execute(
+            "SELECT ts, code, price, COALESCE(event_type, '') FROM legacy_events"
+        )
+        while True:
+            rows = legacy.fetchmany(10000)
+            if not rows:
+                break
+            cur.executemany(
+                _INSERT_EVENT,
+                [
+                    (
+                        round(datetime.datetime.fromisoformat(ts).timestamp() * 1000),
+                        self._code_id(code),
+                        _to_sen(price),
+                        self._event_type_id(event_type),
+                    )
+                    for ts, code, price, event_type in rows
+                ],
+            )
+        cur.execute("DROP TABLE legacy_daily_results")
+        cur.execute("DROP TABLE legacy_events")
+
+    def _code_id(self, code: str) -> int:
+        """Return the id for ``code``, adding it to the lookup table if new."""
+        code_id = self._code_ids.get(code)
+        if code_id is None:
+            self.conn.execute("INSERT OR IGNORE INTO codes (code) VALUES (?)", (code,))
+            code_id = self.conn.execute("SELECT id FROM codes WHERE code = ?", (code,)).fetchone()[0]
+            self._code_ids[code] = code_id
+        return code_id
+
+    def _event_type_id(self, name: str) -> int:
+        type_id = self._event_type_ids.get(name)
+        if type_id is None:
+            self.conn.execute("INSERT OR IGNORE INTO event_types (name) VALUES (?)", (name,))
+            type_id = self.conn.execute(
+                "SELECT id FROM event_types WHERE name = ?", (name,)
+            ).fetchone()[0]
+            self._event_type_ids[name] = type_id
+        return type_id
+
+    def _lookup(self, table: str, column: str) -> np.ndarray:
+        """Return an array mapping ids of a lookup table to their names."""
+        rows = self.conn.execute(f"SELECT id, {column} FROM {table}").fetchall()
+        names = np.empty(max((row[0] for row in rows), default=0) + 1, dtype=object)
+        for row_id, name in rows:
+            names[row_id] = name
+        return names
+
+    def _daily_row(self, result: DayResult) -> Tuple:
+        return (
+            day_number(result.date),
+            self._code_id(result.code),
+            _to_sen(result.base_price),
+            _to_sen(result.limit_up),
+            _to_sen(result.limit_down),
+            _to_sen(result.high),
+            _to_sen(result.low),
+            _to_sen(result.close),
+            _flags(result),
         )
-        self.conn.commit()
+
+    def _event_row(self, event: Event) -> Tuple:
+        return (
+            round(event.ts.timestamp() * 1000),
+            self._code_id(event.code),
+            _to_sen(event.price),
+            self._event_type_id(event.event_type),
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Commit on success; on failure roll back and forget ids added meanwhile."""
+        try:
+            with self.conn:
+                yield
+        except BaseException:
+            self._code_ids.clear()
+            self._event_type_ids.clear()
+            raise
+
+    def save_daily(self, result: DayResult) -> None:
+        """Insert or replace a daily result."""
+        self.save_daily_many([result])
+
+    def save_daily_many(self, results: Iterable[DayResult]) -> None:
+        """Insert or replace many daily results in one transaction."""
+        with self._transaction():
+            self.conn.executemany(_INSERT_DAILY, [self._daily_row(r) for r in results])
 
     def save_events(self, events: Iterable[Event]) -> None:
         """Bulk insert events."""
-        cur = self.conn.cursor()
-        cur.executemany(
-            """
-            INSERT INTO events (ts, code, price, event_type)
-            VALUES (?, ?, ?, ?);
-            """,
-            [
-                (e.ts.isoformat(), e.code, e.price, e.event_type)
-                for e in events
-            ],
-        )
-        self.conn.commit()
+        with self._transaction():
+            self.conn.executemany(_INSERT_EVENT, [self._event_row(e) for e in events])
+
+    def write_batch(self, results: Iterable[DayResult], events: Iterable[Event]) -> None:
+        """Write daily results and events together in one transaction."""
+        with self._transaction():
+            self.conn.executemany(_INSERT_DAILY, [self._daily_row(r) for r in results])
+            self.conn.executemany(_INSERT_EVENT, [self._event_row(e) for e in events])
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def finalized_codes(self, date: datetime.date) -> Set[str]:
+        """Return the codes that already have a daily result for ``date``."""
+        return {
+            row[0]
+            for row in self.conn.execute(
+                """
+                SELECT c.code FROM daily_results d JOIN codes c ON c.id = d.code_id
+                WHERE d.day = ?;
+                """,
+                (day_number(date),),
+            )
+        }
+
+    def stage_summaries(
+        self,
+        date: datetime.date,
+        rows: Iterable[Tuple[str, Optional[float], Optional[float], Optional[float], Optional[float]]],
+    ) -> None:
+        """Checkpoint (code, base_price, high, low, close) rows of an end-of-day run."""
+        day = day_number(date)
+        with self._transaction():
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO finalize_staging VALUES (?, ?, ?, ?, ?, ?);",
+                [
+                    (day, self._code_id(code), _to_sen(base), _to_sen(high), _to_sen(low), _to_sen(close))
+                    for code, base, high, low, close in rows
+                ],
+            )
+
+    def staged_summaries(
+        self, date: datetime.date
+    ) -> List[Tuple[str, Optional[float], Optional[float], Optional[float], Optional[float]]]:
+        """Return the rows checkpointed by ``stage_summaries`` for ``date``."""
+        return [
+            (code, _from_sen(base), _from_sen(high), _from_sen(low), _from_sen(close))
+            for code, base, high, low, close in self.conn.execute(
+                """
+                SELECT c.code, s.base_price, s.high, s.low, s.close
+                FROM finalize_staging s JOIN codes c ON c.id = s.code_id
+                WHERE s.day = ?;
+                """,
+                (day_number(date),),
+            )
+        ]
+
+    def commit_day(self, date: datetime.date, results: Iterable[DayResult]) -> None:
+        """Write a day's results and drop its staged rows in one transaction."""
+        with self._transaction():
+            self.conn.executemany(_INSERT_DAILY, [self._daily_row(r) for r in results])
+            self.conn.execute("DELETE FROM finalize_staging WHERE day = ?;", (day_number(date),))
 
     def fetch_daily_results(self, limit: int = 100) -> Iterable[DayResult]:
         """Yield the most recent daily results, ordered by date descending."""
         cur = self.conn.cursor()
         for row in cur.execute(
-            """
-            SELECT date, code, base_price, limit_up, limit_down, high, low, close,
-                   hit_up, hit_down, close_up, close_down
-            FROM daily_results
-            ORDER BY date DESC
+            f"""
+            SELECT {_DAILY_COLUMNS}
+            FROM daily_results d JOIN codes c ON c.id = d.code_id
+            ORDER BY d.day DESC
             LIMIT ?;
             """,
             (limit,),
         ):
-            yield DayResult(
-                code=row[1],
-                date=datetime.date.fromisoformat(row[0]),
-                base_price=row[2],
-                limit_up=row[3],
-                limit_down=row[4],
-                high=row[5],
-                low=row[6],
-                close=row[7],
-                hit_up=bool(row[8]),
-                hit_down=bool(row[9]),
-                close_up=bool(row[10]),
-                close_down=bool(row[11]),
-            )
\ No newline at end of file
+            yield _day_result(row)
+
+    def fetch_history(
+        self,
+        code: str,
+        since: Optional[datetime.date] = None,
+        until: Optional[datetime.date] = None,
+    ) -> Iterable[DayResult]:
+        """Yield daily results for one code between two dates (inclusive), oldest first."""
+        cur = self.conn.cursor()
+        for row in cur.execute(
+            f"""
+            SELECT {_DAILY_COLUMNS}
+            FROM daily_results d JOIN codes c ON c.id = d.code_id
+            WHERE c.code = ?
+              AND (? IS NULL OR d.day >= ?)
+              AND (? IS NULL OR d.day <= ?)
+            ORDER BY d.day;
+            """,
+            (code, *_day_range(since, until)),
+        ):
+            yield _day_result(row)
+
+    def fetch_streaks(
+        self,
+        until: Optional[datetime.date] = None,
+        codes: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Streaks]:
+        """Return the current consecutive-day streaks for each code.
+
+        A streak counts the trading days, going back from a code's latest
+        result on or before ``until``, on which a flag is set without
+        interruption. Trading days are the days with any result in the
+        table, so a day on which the code has no row ends its streak. The
+        whole computation runs in SQLite using window functions over the
+        ``(code_id, day)`` index.
+        """
+        until_day = day_number(until) if until else None
+        code_filter = ""
+        if codes is not None:
+            # A temporary table instead of an IN (...) list, which would hit
+            # SQLite's variable limit for a full code master
+            with self._transaction():
+                self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS streak_codes (code TEXT PRIMARY KEY)")
+                self.conn.execute("DELETE FROM streak_codes")
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO streak_codes VALUES (?)", ((code,) for code in codes)
+                )
+            code_filter = (
+                "AND d.code_id IN (SELECT c.id FROM codes c JOIN streak_codes s ON s.code = c.code)"
+            )
+        streaks: Dict[str, Streaks] = {}
+        for row in self.conn.execute(
+            f"""
+            WITH trading_days AS (
+                SELECT day, ROW_NUMBER() OVER (ORDER BY day DESC) AS dn
+                FROM (SELECT DISTINCT day FROM daily_results WHERE (? IS NULL OR day <= ?))
+            ),
+            ranked AS (
+                SELECT d.code_id, d.flags,
+                       ROW_NUMBER() OVER (PARTITION BY d.code_id ORDER BY d.day DESC) AS rn,
+                       t.dn
+                FROM daily_results d JOIN trading_days t ON t.day = d.day
+                WHERE 1 {code_filter}
+            ),
+            -- A row is in sequence while no trading day was skipped since the
+            -- latest one, i.e. dn - rn still equals its value at rn = 1
+            breaks AS (
+                SELECT code_id, rn, flags,
+                       dn - rn > MIN(dn - rn) OVER (PARTITION BY code_id) AS gap
+                FROM ranked
+            )
+            SELECT c.code,
+                   COALESCE(MIN(CASE WHEN gap OR NOT flags & {HIT_UP} THEN rn END), MAX(rn) + 1) - 1,
+                   COALESCE(MIN(CASE WHEN gap OR NOT flags & {HIT_DOWN} THEN rn END), MAX(rn) + 1) - 1,
+                   COALESCE(MIN(CASE WHEN gap OR NOT flags & {CLOSE_UP} THEN rn END), MAX(rn) + 1) - 1,
+                   COALESCE(MIN(CASE WHEN gap OR NOT flags & {CLOSE_DOWN} THEN rn END), MAX(rn) + 1) - 1
+            FROM breaks JOIN codes c ON c.id = breaks.code_id
+            GROUP BY breaks.code_id;
+            """,
+            (until_day, until_day),
+        ):
+            streaks[row[0]] = Streaks(row[0], row[1], row[2], row[3], row[4])
+        return streaks
+
+    def read_daily_columns(
+        self,
+        since: Optional[datetime.date] = None,
+        until: Optional[datetime.date] = None,
+    ) -> DailyColumns:
+        """Return daily results between two dates as NumPy columns, ordered by (date, code)."""
+        rows = self.conn.execute(
+            f"""
+            SELECT {_DAILY_INT_COLUMNS}
+            FROM daily_results d
+            WHERE (? IS NULL OR d.day >= ?) AND (? IS NULL OR d.day <= ?)
+            ORDER BY d.day, d.code_id;
+            """,
+            _day_range(since, until),
+        ).fetchall()
+        return self._daily_columns(rows)
+
+    def read_daily_page(
+        self,
+        query: HistoryQuery = HistoryQuery(),
+        after: Optional[Tuple[datetime.date, str]] = None,
+        limit: int = 1000,
+    ) -> DailyColumns:
+        """Return up to ``limit`` results matching ``query``, as NumPy columns.
+
+        ``after`` is the (date, code) of the last row of the previous
+        page. Pages are found by seeking to that key rather than with
+        OFFSET, so reading page 1000 costs the same as reading page 1.
+        """
+        first, second = _PAGE_KEYS[query.order_by]
+        op = "<" if query.descending else ">"
+        direction = "DESC" if query.descending else "ASC"
+        conditions = ["(? IS NULL OR d.day >= ?)", "(? IS NULL OR d.day <= ?)"]
+        params: List[object] = list(_day_range(query.since, query.until))
+        if query.code_prefix:
+            conditions.append("c.code GLOB ?")
+            params.append(_glob_prefix(query.code_prefix))
+        if query.flags:
+            conditions.append("d.flags & ? != 0")
+            params.append(query.flags)
+        if after is not None:
+            key = {"d.day": day_number(after[0]), "c.code": after[1]}
+            # Expanded form of (first, second) < (?, ?) so the first key can use an index
+            conditions.append(f"{first} {op}= ? AND ({first} {op} ? OR {second} {op} ?)")
+            params += [key[first], key[first], key[second]]
+        rows = self.conn.execute(
+            f"""
+            SELECT {_DAILY_INT_COLUMNS}
+            FROM daily_results d JOIN codes c ON c.id = d.code_id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {first} {direction}, {second} {direction}
+            LIMIT ?;
+            """,
+            (*params, limit),
+        ).fetchall()
+        return self._daily_columns(rows)
+
+    def _daily_columns(self, rows: List[Tuple]) -> DailyColumns:
+        data = np.array(rows, dtype=np.int64).reshape(len(rows), 9)
+        prices = np.where(data[:, 2:8] == _NULL, np.nan, data[:, 2:8] / 100)
+        flags = data[:, 8]
+        return DailyColumns(
+            date=data[:, 0].astype("datetime64[D]"),
+            code=self._lookup("codes", "code")[data[:, 1]].astype(str),
+            base_price=prices[:, 0],
+            limit_up=prices[:, 1],
+            limit_down=prices[:, 2],
+            high=prices[:, 3],
+            low=prices[:, 4],
+            close=prices[:, 5],
+            hit_up=(flags & HIT_UP) != 0,
+            hit_down=(flags & HIT_DOWN) != 0,
+            close_up=(flags & CLOSE_UP) != 0,
+            close_down=(flags & CLOSE_DOWN) != 0,
+        )
+
+    def read_event_columns(
+        self,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None,
+    ) -> EventColumns:
+        """Return events between two times (inclusive) as NumPy columns, ordered by time."""
+        since_ms = round(since.timestamp() * 1000) if since else None
+        until_ms = round(until.timestamp() * 1000) if until else None
+        rows = self.conn.execute(
+            f"""
+            SELECT ts, code_id, IFNULL(price, {_NULL}), event_type_id
+            FROM events
+            WHERE (? IS NULL OR ts >= ?) AND (? IS NULL OR ts <= ?)
+            ORDER BY ts;
+            """,
+            (since_ms, since_ms, until_ms, until_ms),
+        ).fetchall()
+        data = np.array(rows, dtype=np.int64).reshape(len(rows), 4)
+        return EventColumns(
+            ts=data[:, 0].astype("datetime64[ms]"),
+            code=self._lookup("codes", "code")[data[:, 1]].astype(str),
+            price=np.where(data[:, 2] == _NULL, np.nan, data[:, 2] / 100),
+            event_type=self._lookup("event_types", "name")[data[:, 3]].astype(str),
+        )
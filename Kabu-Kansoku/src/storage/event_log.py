@@ -0,0 +1,45 @@
+"""Append-only JSON lines export of limit events.
+
+``EventLog`` appends one JSON object per ``Event`` to a text file and
+flushes after every batch, so tools can follow the file (``tail -f``,
+log shippers) without querying SQLite. Each batch is written with a
+single ``write`` call, so readers never see a partial batch. The file is
+only ever appended to; rotating it is left to the reader's tooling.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Iterable
+
+from core.models import Event
+
+
+def event_json(event: Event) -> str:
+    """Return ``event`` as one line of JSON, without the newline."""
+    return json.dumps(
+        {
+            "ts": event.ts.isoformat(),
+            "code": event.code,
+            "price": event.price,
+            "event_type": event.event_type,
+        }
+    )
+
+
+class EventLog:
+    """Append events to a JSON lines file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, events: Iterable[Event]) -> None:
+        lines = "".join(event_json(event) + "\n" for event in events)
+        if lines:
+            self.file.write(lines)
+            self.file.flush()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.file.close()
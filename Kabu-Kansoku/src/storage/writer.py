@@ -0,0 +1,149 @@
+"""Write-behind writer for the SQLite database.
+
+``DatabaseWriter`` accepts ``DayResult`` and ``Event`` objects from any
+thread and returns immediately. A dedicated thread with its own
+connection writes them in one transaction whenever ``batch_size`` items
+are pending or ``flush_interval`` seconds have passed since the oldest
+pending item, so callers such as the GUI never wait on SQLite.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from core.metrics import METRICS
+from core.models import DayResult, Event
+from storage.db import Database
+
+
+class _Flush:
+    """Queue marker asking the writer to write everything queued before it."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class DatabaseWriter:
+    """Queue writes and apply them in batches on a background thread."""
+
+    def __init__(
+        self,
+        path: str = "kabu.db",
+        batch_size: int = 1000,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        #: Last exception raised while writing; re-raised by flush()/close().
+        self.error: Optional[BaseException] = None
+        self.batches_written = 0
+        self._queue: "queue.Queue[object]" = queue.Queue()
+        self._ready = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        self._raise_error()
+
+    def save_daily(self, result: DayResult) -> None:
+        """Queue a daily result for insert-or-replace."""
+        self._put(result)
+
+    def save_daily_many(self, results: Iterable[DayResult]) -> None:
+        for result in results:
+            self._put(result)
+
+    def save_events(self, events: Iterable[Event]) -> None:
+        """Queue events for insertion."""
+        for event in events:
+            self._put(event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is committed.
+
+        Returns False if ``timeout`` expired first. Raises the last write
+        error, if any.
+        """
+        marker = _Flush()
+        self._put(marker)
+        done = marker.done.wait(timeout)
+        self._raise_error()
+        return done
+
+    def close(self) -> None:
+        """Flush pending writes, stop the thread and close the connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_error()
+
+    def _put(self, item: object) -> None:
+        if self._closed:
+            raise RuntimeError("DatabaseWriter is closed")
+        self._queue.put(item)
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self) -> None:
+        try:
+            db = Database(self.path)
+        except BaseException as ex:
+            self.error = ex
+            self._closed = True
+            self._ready.set()
+            return
+        self._ready.set()
+        daily: List[DayResult] = []
+        events: List[Event] = []
+        deadline: Optional[float] = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if isinstance(item, DayResult):
+                    daily.append(item)
+                elif isinstance(item, Event):
+                    events.append(item)
+                pending = len(daily) + len(events)
+                if pending and deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if (
+                    item is None
+                    or item is _STOP
+                    or isinstance(item, _Flush)
+                    or pending >= self.batch_size
+                ):
+                    if pending:
+                        self._write(db, daily, events)
+                        daily, events = [], []
+                    deadline = None
+                if isinstance(item, _Flush):
+                    item.done.set()
+                if item is _STOP:
+                    break
+        finally:
+            db.close()
+
+    def _write(self, db: Database, daily: List[DayResult], events: List[Event]) -> None:
+        try:
+            with METRICS.timer("db_write"):
+                db.write_batch(daily, events)
+            self.batches_written += 1
+        except Exception as ex:
+            # Keep the thread alive; the error surfaces on flush()/close()
+            self.error = ex
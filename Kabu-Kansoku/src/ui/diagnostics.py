@@ -0,0 +1,118 @@
+"""Diagnostics tab: live latency percentiles per hot-path stage.
+
+The panel reads a ``Metrics`` snapshot once a second while it is
+visible and can export the histograms as Prometheus text or append the
+snapshot to a JSON lines file.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import (
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from core.metrics import METRICS, Metrics
+
+_COLUMNS = [
+    ("Stage", "stage"),
+    ("Source", "source"),
+    ("Count", "count"),
+    ("Mean ms", "mean_ms"),
+    ("p50 ms", "p50_ms"),
+    ("p95 ms", "p95_ms"),
+    ("p99 ms", "p99_ms"),
+    ("Max ms", "max_ms"),
+]
+
+
+def _cell(value: object) -> str:
+    if isinstance(value, float):
+        return "" if math.isnan(value) else f"{value:.2f}"
+    return str(value)
+
+
+class DiagnosticsPanel(QWidget):
+    """Table of per-stage latency percentiles with export buttons."""
+
+    def __init__(
+        self,
+        metrics: Metrics = METRICS,
+        refresh_ms: int = 1000,
+        parent: Optional[QWidget] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.metrics = metrics
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(_COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _ in _COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table, 1)
+
+        buttons = QHBoxLayout()
+        reset = QPushButton("Reset")
+        reset.clicked.connect(self.reset)
+        prometheus = QPushButton("Export Prometheus…")
+        # Lambdas so clicked's ``checked`` argument is not taken for a path
+        prometheus.clicked.connect(lambda: self.export_prometheus())
+        json_lines = QPushButton("Export JSON lines…")
+        json_lines.clicked.connect(lambda: self.export_json_lines())
+        self.status = QLabel()
+        for widget in (reset, prometheus, json_lines):
+            buttons.addWidget(widget)
+        buttons.addWidget(self.status, 1)
+        layout.addLayout(buttons)
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(refresh_ms)
+
+    def refresh(self) -> None:
+        """Redraw the table from a fresh snapshot; skipped while hidden."""
+        if not self.isVisible():
+            return
+        rows = self.metrics.snapshot()
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, (_, key) in enumerate(_COLUMNS):
+                self.table.setItem(r, c, QTableWidgetItem(_cell(row[key])))
+
+    def reset(self) -> None:
+        self.metrics.reset()
+        self.table.setRowCount(0)
+
+    def export_prometheus(self, path: Optional[str] = None) -> None:
+        """Write the histograms in Prometheus text format, replacing ``path``."""
+        path = path or QFileDialog.getSaveFileName(
+            self, "Export Prometheus metrics", "kabu_metrics.prom", "Prometheus (*.prom *.txt)"
+        )[0]
+        if path:
+            self._write(path, "w", self.metrics.to_prometheus())
+
+    def export_json_lines(self, path: Optional[str] = None) -> None:
+        """Append the current snapshot to a JSON lines file."""
+        path = path or QFileDialog.getSaveFileName(
+            self, "Export metrics as JSON lines", "kabu_metrics.jsonl", "JSON lines (*.jsonl)"
+        )[0]
+        if path:
+            self._write(path, "a", self.metrics.to_json_lines())
+
+    def _write(self, path: str, mode: str, text: str) -> None:
+        try:
+            with open(path, mode, encoding="utf-8") as f:
+                f.write(text)
+        except OSError as ex:
+            self.status.setText(f"Export failed: {ex}")
+            return
+        self.status.setText(f"Exported to {path}")
@@ -0,0 +1,301 @@
+"""History tab: daily results paged lazily out of SQLite.
+
+``HistoryTableModel`` holds only the pages the view has scrolled to.
+When the view reaches the last loaded row it calls ``fetchMore``, which
+asks a ``HistoryLoader`` on its own thread for the next page via
+``Database.read_daily_page`` (keyset pagination on date and code).
+Filters and the sort order are part of the SQL query; changing either
+resets the model and starts again from the first page. Pages from a
+superseded query are recognised by a generation number and dropped.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import List, Optional
+
+from PySide6.QtCore import (
+    QAbstractTableModel,
+    QMetaObject,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QThread,
+    QTimer,
+    Qt,
+    Signal,
+    Slot,
+)
+from PySide6.QtWidgets import (
+    QComboBox,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
+)
+
+from storage.db import CLOSE_DOWN, CLOSE_UP, HIT_DOWN, HIT_UP, DailyColumns, Database, HistoryQuery
+
+_HEADERS = ["Date", "Code", "High", "Low", "Close", "Result"]
+# Columns the database can sort on, by header position
+_SORT_COLUMNS = {0: "date", 1: "code"}
+
+# Outcome filter choices: label and flag bits
+OUTCOMES = [
+    ("All", 0),
+    ("Closed at a limit", CLOSE_UP | CLOSE_DOWN),
+    ("Close up", CLOSE_UP),
+    ("Close down", CLOSE_DOWN),
+    ("Touched a limit", HIT_UP | HIT_DOWN),
+]
+
+
+def _price(value: float) -> str:
+    return "" if math.isnan(value) else f"{value:.2f}"
+
+
+class HistoryLoader(QObject):
+    """Reads pages of daily results on a worker thread."""
+
+    #: Generation, DailyColumns page and whether more rows follow.
+    page_loaded = Signal(int, object, bool)
+    #: Generation and error message.
+    failed = Signal(int, str)
+
+    def __init__(self, db_path: str) -> None:
+        super().__init__()
+        self.db_path = db_path
+        # Opened on the loader thread; SQLite connections are thread-bound
+        self._db: Optional[Database] = None
+
+    @Slot(int, object, object, int)
+    def load(self, generation: int, query: HistoryQuery, after, limit: int) -> None:
+        try:
+            if self._db is None:
+                self._db = Database(self.db_path)
+            # One extra row tells whether another page exists
+            page = self._db.read_daily_page(query, after, limit + 1)
+        except Exception as ex:
+            self.failed.emit(generation, str(ex))
+            return
+        more = len(page.code) > limit
+        if more:
+            page = DailyColumns(*(column[:limit] for column in page))
+        self.page_loaded.emit(generation, page, more)
+
+    @Slot()
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """Lazily loaded, database-sorted model of ``daily_results``."""
+
+    #: Emitted with the number of loaded rows and whether more remain.
+    loaded = Signal(int, bool)
+    #: Emitted with a message when a page fails to load.
+    load_failed = Signal(str)
+    # Generation, query, key of the last loaded row, page size
+    _request = Signal(int, object, object, int)
+
+    def __init__(self, db_path: str, page_size: int = 1000, parent=None) -> None:
+        super().__init__(parent)
+        self.page_size = page_size
+        self.query = HistoryQuery()
+        self._pages: List[DailyColumns] = []
+        self._count = 0
+        self._more = True
+        self._pending = False
+        self._generation = 0
+        self._loader = HistoryLoader(db_path)
+        self._thread = QThread(self)
+        self._loader.moveToThread(self._thread)
+        self._request.connect(self._loader.load)
+        self._loader.page_loaded.connect(self._on_page_loaded)
+        self._loader.failed.connect(self._on_failed)
+        self._thread.start()
+        self._request_page()
+
+    def set_query(self, query: HistoryQuery) -> None:
+        """Show results for ``query``, starting again from the first page."""
+        self.query = query
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Drop loaded rows and reload, e.g. after new results were written."""
+        self.beginResetModel()
+        self._generation += 1
+        self._pages = []
+        self._count = 0
+        self._more = True
+        self._pending = False
+        self.endResetModel()
+        self._request_page()
+
+    def shutdown(self) -> None:
+        """Close the loader's connection and stop its thread; safe to repeat."""
+        if self._thread.isRunning():
+            QMetaObject.invokeMethod(self._loader, "close", Qt.BlockingQueuedConnection)
+        self._thread.quit()
+        self._thread.wait()
+
+    def _request_page(self) -> None:
+        after = None
+        if self._pages:
+            last = self._pages[-1]
+            after = (last.date[-1].item(), str(last.code[-1]))
+        self._pending = True
+        self._request.emit(self._generation, self.query, after, self.page_size)
+
+    @Slot(int, object, bool)
+    def _on_page_loaded(self, generation: int, page: DailyColumns, more: bool) -> None:
+        if generation != self._generation:
+            return
+        self._pending = False
+        self._more = more
+        count = len(page.code)
+        if count:
+            self.beginInsertRows(QModelIndex(), self._count, self._count + count - 1)
+            self._pages.append(page)
+            self._count += count
+            self.endInsertRows()
+        self.loaded.emit(self._count, more)
+
+    @Slot(int, str)
+    def _on_failed(self, generation: int, message: str) -> None:
+        if generation != self._generation:
+            return
+        self._pending = False
+        self._more = False
+        self.load_failed.emit(message)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._more
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if not parent.isValid() and self._more and not self._pending:
+            self._request_page()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._count
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(_HEADERS)
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        # Every page but the last holds exactly page_size rows
+        page, i = divmod(index.row(), self.page_size)
+        columns = self._pages[page]
+        column = index.column()
+        if column == 0:
+            return str(columns.date[i])
+        if column == 1:
+            return str(columns.code[i])
+        if column == 2:
+            return _price(columns.high[i])
+        if column == 3:
+            return _price(columns.low[i])
+        if column == 4:
+            return _price(columns.close[i])
+        if column == 5:
+            if columns.close_up[i]:
+                return "Close up"
+            if columns.close_down[i]:
+                return "Close down"
+            if columns.hit_up[i] or columns.hit_down[i]:
+                return "Touched"
+            return ""
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return _HEADERS[section]
+        return None
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        """Re-query in the given order; only date and code are sortable."""
+        order_by = _SORT_COLUMNS.get(column)
+        if order_by is None:
+            return
+        self.set_query(
+            self.query._replace(order_by=order_by, descending=order == Qt.DescendingOrder)
+        )
+
+
+class HistoryPanel(QWidget):
+    """History table with code and outcome filters."""
+
+    def __init__(self, db_path: str, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.model = HistoryTableModel(db_path, parent=self)
+        layout = QVBoxLayout(self)
+
+        filters = QHBoxLayout()
+        self.code_filter = QLineEdit()
+        self.code_filter.setPlaceholderText("Code prefix")
+        self.outcome_filter = QComboBox()
+        for label, _ in OUTCOMES:
+            self.outcome_filter.addItem(label)
+        self.status = QLabel()
+        filters.addWidget(self.code_filter)
+        filters.addWidget(self.outcome_filter)
+        filters.addWidget(self.status, 1)
+        layout.addLayout(filters)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
+        # Fixed row heights keep scrolling independent of the row count
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        header = self.table.horizontalHeader()
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(0, Qt.DescendingOrder)
+        header.sectionClicked.connect(self._on_header_clicked)
+        layout.addWidget(self.table, 1)
+
+        # Wait for typing to pause before re-querying
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(250)
+        self._debounce.timeout.connect(self.apply_filters)
+        self.code_filter.textChanged.connect(self._debounce.start)
+        self.outcome_filter.currentIndexChanged.connect(self.apply_filters)
+        self.model.loaded.connect(self._on_loaded)
+        self.model.load_failed.connect(self._on_load_failed)
+
+    def apply_filters(self) -> None:
+        flags = OUTCOMES[self.outcome_filter.currentIndex()][1]
+        self.model.set_query(
+            self.model.query._replace(code_prefix=self.code_filter.text().strip(), flags=flags)
+        )
+
+    def refresh(self) -> None:
+        self.model.refresh()
+
+    def shutdown(self) -> None:
+        self.model.shutdown()
+
+    def _on_header_clicked(self, column: int) -> None:
+        query = self.model.query
+        order_by = _SORT_COLUMNS.get(column)
+        if order_by is None:
+            # Not sortable in SQL; keep the indicator on the current sort column
+            current = 0 if query.order_by == "date" else 1
+            order = Qt.DescendingOrder if query.descending else Qt.AscendingOrder
+            self.table.horizontalHeader().setSortIndicator(current, order)
+            return
+        self.model.sort(column, self.table.horizontalHeader().sortIndicatorOrder())
+
+    def _on_loaded(self, count: int, more: bool) -> None:
+        self.status.setText(f"{count:,} rows" + (" (scroll for more)" if more else ""))
+
+    def _on_load_failed(self, message: str) -> None:
+        self.status.setText(f"Load failed: {message}")
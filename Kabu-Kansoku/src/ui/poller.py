@@ -0,0 +1,432 @@
+"""Background quote polling for the dashboard.
+
+``QuotePoller`` owns the data source and runs in its own ``QThread``.
+On every tick it fetches the whole watchlist, looks up limits in a
+``LimitCache``, computes hit flags, and emits only the rows whose values
+changed since the previous tick as one batch, plus any limit events
+found by the ``EventDetector``. The GUI thread never
+performs network I/O.
+
+The data source may be passed as a factory; it is then built and logged
+in on the poller thread when polling starts, so slow imports, keyring
+reads and network logins never delay the window.
+
+With a ``Schedule`` (see ``core.scheduler``) the timer runs at the
+schedule's tick interval and each tick fetches only the codes it reports
+as due; the schedule is then updated from the new distances to the
+limits.
+
+When a database path is given, the first tick after the close on each
+trading day also starts the ``EndOfDayFinalizer`` for the watchlist. It
+runs in a ``FinalizeWorker`` on a thread of its own, so the thousands of
+daily summary requests do not hold up ticks.
+
+With a snapshot path, the poller writes its intraday state (see
+``core.snapshot``) every ``snapshot_interval`` seconds and when it
+stops; ``restore`` loads such a snapshot back before polling starts.
+"""
+
+from __future__ import annotations
+
+import datetime
+import math
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+
+from PySide6.QtCore import QMetaObject, QObject, QThread, QTimer, Qt, Signal, Slot
+
+from core.data_source_base import DataSource
+from core.detector import is_hit_batch
+from core.event_detector import EventDetector
+from core.finalizer import EndOfDayFinalizer, FinalizeReport
+from core.limit_cache import LimitCache
+from core.metrics import METRICS
+from core.market_time import after_close, now_jst, trading_day
+from core.scheduler import Schedule, distance_ratio
+from core.snapshot import Snapshot, write_snapshot
+from storage.db import Database
+
+
+class QuoteRow(NamedTuple):
+    """Values shown in one dashboard row."""
+
+    code: str
+    price: float
+    limit_up: float
+    limit_down: float
+    distance: float
+    hit: bool
+    updated: datetime.datetime
+
+
+class FinalizeWorker(QObject):
+    """Runs ``EndOfDayFinalizer`` on its own thread."""
+
+    #: Emitted with the FinalizeReport of a completed run.
+    finished = Signal(object)
+    #: Emitted with an error message if a run failed.
+    failed = Signal(str)
+
+    def __init__(self, db_path: str) -> None:
+        super().__init__()
+        self.db_path = db_path
+        # Opened on the worker thread; SQLite connections are thread-bound
+        self._db: Optional[Database] = None
+
+    @Slot(object, object, list)
+    def run(self, data_source: DataSource, date: datetime.date, codes: List[str]) -> None:
+        thread = QThread.currentThread()
+        try:
+            if self._db is None:
+                self._db = Database(self.db_path)
+            report = EndOfDayFinalizer(data_source, self._db).run(
+                codes, date, should_stop=thread.isInterruptionRequested
+            )
+        except Exception as ex:
+            self.failed.emit(str(ex))
+            return
+        # An interrupted run is resumed from its staged rows next time
+        if not report.interrupted:
+            self.finished.emit(report)
+
+    @Slot()
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class QuotePoller(QObject):
+    """Poll a data source periodically from a worker thread."""
+
+    #: Rows that changed during a tick (list of QuoteRow).
+    rows_changed = Signal(list)
+    #: Limit touch/release events detected during a tick (list of Event).
+    events_detected = Signal(list)
+    #: Codes that failed during a tick, mapped to an error message.
+    errors_occurred = Signal(dict)
+    #: Emitted after every tick with the tick time, changed and failed counts.
+    tick_finished = Signal(object, int, int)
+    #: Emitted with a FinalizeReport after the end-of-day results are written.
+    day_finalized = Signal(object)
+    #: Emitted with the data source once it is built and logged in.
+    data_source_ready = Signal(object)
+    # Data source, date and codes for the finalise worker
+    _finalize_requested = Signal(object, object, list)
+
+    def __init__(
+        self,
+        data_source: Union[DataSource, Callable[[], DataSource]],
+        update_interval: int = 30,
+        db_path: Optional[str] = None,
+        schedule: Optional[Schedule] = None,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: float = 30.0,
+    ) -> None:
+        """``data_source`` is a logged-in source, or a callable returning one.
+
+        Without a ``schedule`` every code is polled every ``update_interval`` seconds.
+        """
+        super().__init__()
+        if isinstance(data_source, DataSource):
+            self.data_source: Optional[DataSource] = data_source
+            self._factory: Optional[Callable[[], DataSource]] = None
+        else:
+            self.data_source = None
+            self._factory = data_source
+        self.schedule = schedule
+        if schedule is not None and self.data_source is not None:
+            schedule.set_codes_per_request(self.data_source.codes_per_request)
+        self.db_path = db_path
+        # Created on the first finalisation
+        self._finalizer: Optional[FinalizeWorker] = None
+        self._finalizer_thread: Optional[QThread] = None
+        self._finalizing = False
+        self._finalized_day: Optional[datetime.date] = None
+        self.limit_cache = LimitCache(self.data_source)
+        self.event_detector = EventDetector()
+        self.update_interval = update_interval  # seconds
+        self.codes: List[str] = []
+        self._last: Dict[str, QuoteRow] = {}
+        self._timer: Optional[QTimer] = None
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval  # seconds
+        self._snapshot_timer: Optional[QTimer] = None
+        # Restored snapshot not yet handed to the data source
+        self._restored: Optional[Snapshot] = None
+
+    @Slot()
+    def start(self) -> None:
+        """Start the timer; must run in the poller's thread."""
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.poll)
+        interval = self.schedule.tick_interval if self.schedule else self.update_interval
+        self._timer.start(int(interval * 1000))
+        if self.snapshot_path:
+            self._snapshot_timer = QTimer(self)
+            self._snapshot_timer.timeout.connect(self.save_snapshot)
+            self._snapshot_timer.start(int(self.snapshot_interval * 1000))
+        self._ensure_data_source()
+
+    def _ensure_data_source(self) -> bool:
+        """Build the data source from the factory if needed; retried every tick."""
+        if self.data_source is not None:
+            return True
+        try:
+            data_source = self._factory()
+        except Exception as ex:
+            self.errors_occurred.emit({"*": f"Data source unavailable: {ex}"})
+            return False
+        self.data_source = data_source
+        self.limit_cache.data_source = data_source
+        if self.schedule is not None:
+            self.schedule.set_codes_per_request(data_source.codes_per_request)
+        self._seed_data_source()
+        self.data_source_ready.emit(data_source)
+        return True
+
+    def _seed_data_source(self) -> None:
+        # Simulated sources can continue from the restored prices
+        if self._restored is not None and self.data_source is not None:
+            if hasattr(self.data_source, "restore_snapshot"):
+                self.data_source.restore_snapshot(self._restored)
+            self._restored = None
+
+    @Slot()
+    def stop(self) -> None:
+        """Stop the timer; must run in the poller's thread."""
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer.deleteLater()
+            self._timer = None
+        if self._snapshot_timer is not None:
+            self._snapshot_timer.stop()
+            self._snapshot_timer.deleteLater()
+            self._snapshot_timer = None
+            self.save_snapshot()
+        if self._finalizer_thread is not None:
+            # Stops a running finalisation after its current chunk
+            self._finalizer_thread.requestInterruption()
+            QMetaObject.invokeMethod(self._finalizer, "close", Qt.BlockingQueuedConnection)
+            self._finalizer_thread.quit()
+            self._finalizer_thread.wait()
+            self._finalizer_thread = None
+            self._finalizer = None
+            self._finalizing = False
+        # A source built from the factory is ours to close (e.g. worker processes)
+        if self._factory is not None and hasattr(self.data_source, "close"):
+            self.data_source.close()
+
+    @Slot(list)
+    def set_codes(self, codes: List[str]) -> None:
+        """Replace the list of codes polled on each tick."""
+        self.codes = list(codes)
+        if self.schedule is not None:
+            self.schedule.set_codes(self.codes)
+        for code in set(self._last) - set(self.codes):
+            del self._last[code]
+
+    @Slot()
+    def poll(self) -> None:
+        """Fetch quotes for all codes and emit the rows that changed."""
+        if not self._ensure_data_source():
+            return
+        now = datetime.datetime.now()
+        codes = self.schedule.due() if self.schedule is not None else self.codes
+        if not codes:
+            self._maybe_finalize()
+            return
+        errors: Dict[str, Exception] = {}
+        source = type(self.data_source).__name__
+        started = time.perf_counter()
+        try:
+            with METRICS.timer("get_quotes", source):
+                batch = self.data_source.get_quotes(codes, errors, include_base_price=False)
+            with METRICS.timer("limits"):
+                limits_up, limits_down = self.limit_cache.limits(batch.codes, batch.price)
+            with METRICS.timer("detect"):
+                hit_up, hit_down = is_hit_batch(batch.price, limits_up, limits_down)
+                events = self.event_detector.process(batch, limits_up, limits_down)
+        except Exception as ex:
+            self.errors_occurred.emit({"*": str(ex)})
+            self.tick_finished.emit(now, 0, len(codes))
+            return
+        if self.schedule is not None:
+            self.schedule.update(batch.codes, distance_ratio(batch.price, limits_up, limits_down))
+        diff_started = time.perf_counter()
+        changed: List[QuoteRow] = []
+        for code, price, limit_up, limit_down, hit in zip(
+            batch.codes,
+            batch.price.tolist(),
+            limits_up.tolist(),
+            limits_down.tolist(),
+            (hit_up | hit_down).tolist(),
+        ):
+            previous = self._last.get(code)
+            if (
+                previous is not None
+                and previous.price == price
+                and previous.limit_up == limit_up
+                and previous.limit_down == limit_down
+            ):
+                continue
+            row = QuoteRow(
+                code=code,
+                price=price,
+                limit_up=limit_up,
+                limit_down=limit_down,
+                # Distance to nearest limit
+                distance=min(limit_up - price, price - limit_down),
+                hit=hit,
+                updated=now,
+            )
+            self._last[code] = row
+            changed.append(row)
+        finished = time.perf_counter()
+        METRICS.observe("diff_rows", finished - diff_started)
+        METRICS.observe("tick", finished - started, source)
+        if changed:
+            self.rows_changed.emit(changed)
+        if events:
+            self.events_detected.emit(events)
+        if errors:
+            self.errors_occurred.emit({code: str(ex) for code, ex in errors.items()})
+        self.tick_finished.emit(now, len(changed), len(errors))
+        self._maybe_finalize()
+
+    def restore(self, snapshot: Snapshot) -> List[QuoteRow]:
+        """Load today's state from ``snapshot``; call before the poller thread starts.
+
+        Restores the last rows, the event detector state and the cached
+        base prices, and returns the rows so the table can show them
+        before the first poll.
+        """
+        rows: List[QuoteRow] = []
+        for code, price, limit_up, limit_down, hit, updated in zip(
+            snapshot.codes,
+            snapshot.price.tolist(),
+            snapshot.limit_up.tolist(),
+            snapshot.limit_down.tolist(),
+            (snapshot.at_up | snapshot.at_down).tolist(),
+            snapshot.updated.tolist(),
+        ):
+            if math.isnan(price) or math.isnan(updated):
+                continue
+            row = QuoteRow(
+                code=code,
+                price=price,
+                limit_up=limit_up,
+                limit_down=limit_down,
+                distance=min(limit_up - price, price - limit_down),
+                hit=hit,
+                updated=datetime.datetime.fromtimestamp(updated),
+            )
+            self._last[code] = row
+            rows.append(row)
+        self.event_detector.restore(
+            snapshot.day,
+            snapshot.codes,
+            high=snapshot.high,
+            low=snapshot.low,
+            at_up=snapshot.at_up,
+            at_down=snapshot.at_down,
+            touched_up=snapshot.touched_up,
+            touched_down=snapshot.touched_down,
+        )
+        self.limit_cache.seed(
+            {
+                code: base
+                for code, base in zip(snapshot.codes, snapshot.base_price.tolist())
+                if not math.isnan(base)
+            }
+        )
+        self._restored = snapshot
+        self._seed_data_source()
+        return rows
+
+    def snapshot(self) -> Snapshot:
+        """Return the current state of the watchlist."""
+        codes = list(self.codes)
+        day = self.event_detector.day or trading_day(datetime.datetime.now())
+        snapshot = Snapshot.empty(day, codes, time.time())
+        base_prices = self.limit_cache.cached_base_prices()
+        for i, code in enumerate(codes):
+            row = self._last.get(code)
+            if row is not None:
+                snapshot.price[i] = row.price
+                snapshot.limit_up[i] = row.limit_up
+                snapshot.limit_down[i] = row.limit_down
+                snapshot.updated[i] = row.updated.timestamp()
+            base = base_prices.get(code)
+            if base:
+                snapshot.base_price[i] = base
+        for name, values in self.event_detector.state(codes).items():
+            getattr(snapshot, name)[:] = values
+        return snapshot
+
+    @Slot()
+    def save_snapshot(self) -> None:
+        """Write the current state to ``snapshot_path``; must run in the poller's thread."""
+        if not self.snapshot_path or not self.codes:
+            return
+        try:
+            write_snapshot(self.snapshot_path, self.snapshot())
+        except OSError as ex:
+            self.errors_occurred.emit({"*": f"Could not save snapshot: {ex}"})
+
+    def _maybe_finalize(self) -> None:
+        if self.db_path is None or not self.codes:
+            return
+        now = now_jst()
+        if self._finalized_day == now.date() or not after_close(now):
+            return
+        self._finalized_day = now.date()
+        self.finalize_day(now.date())
+
+    def finalize_day(self, date: datetime.date) -> None:
+        """Start writing end-of-day results for the watchlist in the background.
+
+        Safe to repeat; ignored while a finalisation is still running.
+        ``day_finalized`` is emitted when it completes.
+        """
+        if self._finalizing or self.db_path is None:
+            return
+        if self._finalizer_thread is None:
+            self._finalizer = FinalizeWorker(self.db_path)
+            self._finalizer_thread = QThread(self)
+            self._finalizer.moveToThread(self._finalizer_thread)
+            self._finalize_requested.connect(self._finalizer.run)
+            self._finalizer.finished.connect(self._on_finalized)
+            self._finalizer.failed.connect(self._on_finalize_failed)
+            self._finalizer_thread.start()
+        self._finalizing = True
+        self._finalize_requested.emit(self.data_source, date, list(self.codes))
+
+    @Slot(object)
+    def _on_finalized(self, report: FinalizeReport) -> None:
+        self._finalizing = False
+        if report.errors:
+            self.errors_occurred.emit(report.errors)
+        self.day_finalized.emit(report)
+
+    @Slot(str)
+    def _on_finalize_failed(self, message: str) -> None:
+        self._finalizing = False
+        self.errors_occurred.emit({"*": f"Finalisation failed: {message}"})
+
+
+class PollerThread(QThread):
+    """Thread hosting a ``QuotePoller``; the poller is moved onto it."""
+
+    def __init__(self, poller: QuotePoller, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.poller = poller
+        poller.moveToThread(self)
+        self.started.connect(poller.start)
+
+    def shutdown(self) -> None:
+        """Stop polling and wait for the thread to exit."""
+        if self.isRunning():
+            QMetaObject.invokeMethod(self.poller, "stop", Qt.BlockingQueuedConnection)
+        self.quit()
+        self.wait()
@@ -0,0 +1,134 @@
+"""Table model for the dashboard.
+
+Values are kept in NumPy columns indexed by row, with a dict mapping
+each code to its row. Cells are formatted only when the view asks for
+them in ``data()``, and updates emit ``dataChanged`` for the contiguous
+row ranges that were touched rather than for the whole table.
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPersistentModelIndex, Qt
+
+from core.metrics import METRICS
+from ui.poller import QuoteRow
+
+_HEADERS = ["Code", "Price", "Limit Up", "Limit Down", "Distance", "Hit", "Updated"]
+_INITIAL_CAPACITY = 64
+
+
+def _row_ranges(rows: Iterable[int]) -> List[Tuple[int, int]]:
+    """Group row numbers into sorted, inclusive (first, last) ranges."""
+    ranges: List[Tuple[int, int]] = []
+    for row in sorted(set(rows)):
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
+
+
+class QuoteTableModel(QAbstractTableModel):
+    """Columnar model of the watchlist shown on the dashboard."""
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.codes: List[str] = []
+        self.index_of: Dict[str, int] = {}
+        self.price = np.full(_INITIAL_CAPACITY, np.nan)
+        self.limit_up = np.full(_INITIAL_CAPACITY, np.nan)
+        self.limit_down = np.full(_INITIAL_CAPACITY, np.nan)
+        self.distance = np.full(_INITIAL_CAPACITY, np.nan)
+        self.hit = np.zeros(_INITIAL_CAPACITY, dtype=np.bool_)
+        # POSIX timestamp of the last change, NaN until the first quote
+        self.updated = np.full(_INITIAL_CAPACITY, np.nan)
+
+    def _grow(self) -> None:
+        """Double the capacity of every column, keeping existing rows."""
+        count = len(self.codes)
+        for name in ("price", "limit_up", "limit_down", "distance", "hit", "updated"):
+            old = getattr(self, name)
+            new = np.full(len(old) * 2, False if old.dtype == np.bool_ else np.nan, dtype=old.dtype)
+            new[:count] = old[:count]
+            setattr(self, name, new)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.codes)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(_HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return _HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if col == 0:
+            return self.codes[row]
+        if col == 5:
+            return "Yes" if self.hit[row] else ""
+        if col == 6:
+            ts = self.updated[row]
+            if np.isnan(ts):
+                return ""
+            return datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+        column = (self.price, self.limit_up, self.limit_down, self.distance)[col - 1]
+        value = column[row]
+        return "" if np.isnan(value) else f"{value:.2f}"
+
+    def add_code(self, code: str) -> bool:
+        """Append a code; return False if it is already present."""
+        if code in self.index_of:
+            return False
+        row = len(self.codes)
+        if row == len(self.price):
+            self._grow()
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.codes.append(code)
+        self.index_of[code] = row
+        self.endInsertRows()
+        return True
+
+    def add_codes(self, codes: Iterable[str]) -> int:
+        """Append many codes in one insertion; return how many were new."""
+        new = [code for code in dict.fromkeys(codes) if code not in self.index_of]
+        if not new:
+            return 0
+        first = len(self.codes)
+        while first + len(new) > len(self.price):
+            self._grow()
+        self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+        for row, code in enumerate(new, first):
+            self.codes.append(code)
+            self.index_of[code] = row
+        self.endInsertRows()
+        return len(new)
+
+    def apply_rows(self, rows: Iterable[QuoteRow]) -> None:
+        """Store changed quote rows and notify views of the touched ranges."""
+        with METRICS.timer("ui_patch"):
+            touched: List[int] = []
+            for quote in rows:
+                row = self.index_of.get(quote.code)
+                if row is None:
+                    continue
+                self.price[row] = quote.price
+                self.limit_up[row] = quote.limit_up
+                self.limit_down[row] = quote.limit_down
+                self.distance[row] = quote.distance
+                self.hit[row] = quote.hit
+                self.updated[row] = quote.updated.timestamp()
+                touched.append(row)
+            last_col = len(_HEADERS) - 1
+            for first, last in _row_ranges(touched):
+                self.dataChanged.emit(
+                    self.index(first, 1), self.index(last, last_col), [Qt.DisplayRole]
+                )
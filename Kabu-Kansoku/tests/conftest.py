@@ -0,0 +1,12 @@
+"""Shared setup for the unit tests.
+
+Run from the project root with ``pytest tests``. The application
+modules are imported from ``src/``.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,120 @@
+"""Database: migration from the original text/REAL schema."""
+
+from __future__ import annotations
+
+import datetime
+import sqlite3
+
+import numpy as np
+import pytest
+
+from storage.db import SCHEMA_VERSION, Database
+
+# The schema written by the original storage.db
+_LEGACY_SCHEMA = """
+CREATE TABLE daily_results (
+    date TEXT NOT NULL,
+    code TEXT NOT NULL,
+    base_price REAL,
+    limit_up REAL,
+    limit_down REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    hit_up INTEGER,
+    hit_down INTEGER,
+    close_up INTEGER,
+    close_down INTEGER,
+    PRIMARY KEY (date, code)
+);
+CREATE TABLE events (
+    ts TEXT NOT NULL,
+    code TEXT NOT NULL,
+    price REAL,
+    event_type TEXT
+);
+"""
+
+
+@pytest.fixture
+def legacy_path(tmp_path) -> str:
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(_LEGACY_SCHEMA)
+    conn.executemany(
+        "INSERT INTO daily_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("2024-03-01", "7203", 3000.0, 3500.0, 2500.0, 3500.0, 2990.5, 3500.0, 1, 0, 1, 0),
+            ("2024-03-04", "7203", 3500.0, 4200.0, 2800.0, 3600.0, 2800.0, 2810.0, 0, 1, 0, 0),
+            ("2024-03-04", "6758", 120.3, 150.3, 90.3, None, None, None, 0, 0, 0, 0),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO events VALUES (?, ?, ?, ?)",
+        [
+            ("2024-03-01T10:15:00.250000", "7203", 3500.0, "hit_up"),
+            ("2024-03-04T13:00:00", "7203", 2800.0, "hit_down"),
+            ("2024-03-04T09:00:00", "9984", None, None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_legacy_daily_results_are_converted(legacy_path):
+    db = Database(legacy_path)
+    try:
+        toyota = list(db.fetch_history("7203"))
+        sony = list(db.fetch_history("6758"))
+    finally:
+        db.close()
+    assert [r.date for r in toyota] == [datetime.date(2024, 3, 1), datetime.date(2024, 3, 4)]
+    first, second = toyota
+    assert (first.base_price, first.limit_up, first.limit_down) == (3000.0, 3500.0, 2500.0)
+    assert (first.high, first.low, first.close) == (3500.0, 2990.5, 3500.0)
+    assert (first.hit_up, first.hit_down, first.close_up, first.close_down) == (True, False, True, False)
+    assert (second.hit_up, second.hit_down, second.close_up, second.close_down) == (False, True, False, False)
+    # Prices survive the conversion to sen exactly; missing values stay missing
+    assert sony[0].base_price == 120.3
+    assert (sony[0].high, sony[0].low, sony[0].close) == (None, None, None)
+
+
+def test_legacy_events_are_converted(legacy_path):
+    db = Database(legacy_path)
+    try:
+        events = db.read_event_columns()
+    finally:
+        db.close()
+    # Ordered by time
+    assert events.code.tolist() == ["7203", "9984", "7203"]
+    assert events.event_type.tolist() == ["hit_up", "", "hit_down"]
+    assert events.price[[0, 2]].tolist() == [3500.0, 2800.0]
+    assert np.isnan(events.price[1])
+    # Naive timestamps were local time and keep their millisecond precision
+    expected = round(datetime.datetime(2024, 3, 1, 10, 15, 0, 250000).timestamp() * 1000)
+    assert events.ts[0].astype(np.int64) == expected
+
+
+def test_migration_drops_legacy_tables_and_sets_version(legacy_path):
+    Database(legacy_path).close()
+    conn = sqlite3.connect(legacy_path)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(daily_results)")]
+    finally:
+        conn.close()
+    assert not {"legacy_daily_results", "legacy_events"} & tables
+    assert version == SCHEMA_VERSION
+    assert "day" in columns and "date" not in columns
+
+
+def test_reopening_a_migrated_database_keeps_its_rows(legacy_path):
+    Database(legacy_path).close()
+    db = Database(legacy_path)
+    try:
+        assert len(list(db.fetch_daily_results())) == 3
+        assert len(db.read_event_columns().code) == 3
+    finally:
+        db.close()
@@ -0,0 +1,132 @@
+"""EventDetector: hit, release and retouch transitions per code."""
+
+from __future__ import annotations
+
+import datetime
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pytest
+
+from core.event_detector import EventDetector
+from core.models import QuoteBatch
+
+# Base price 1000: limits 1100 / 900
+UP, DOWN = 1100.0, 900.0
+START = datetime.datetime(2026, 10, 16, 9, 0)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = START
+
+    def __call__(self) -> datetime.datetime:
+        return self.now
+
+
+def batch(
+    codes: Sequence[str],
+    prices: Sequence[float],
+    highs: Optional[Sequence[float]] = None,
+    lows: Optional[Sequence[float]] = None,
+    ts: datetime.datetime = START,
+) -> QuoteBatch:
+    price = np.array(prices, dtype=np.float64)
+    n = len(codes)
+    return QuoteBatch(
+        codes=list(codes),
+        price=price,
+        high=price.copy() if highs is None else np.array(highs, dtype=np.float64),
+        low=price.copy() if lows is None else np.array(lows, dtype=np.float64),
+        volume=np.zeros(n, dtype=np.int64),
+        timestamp=np.full(n, ts.timestamp()),
+        base_price=np.full(n, 1000.0),
+    )
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def detector(clock) -> EventDetector:
+    return EventDetector(clock)
+
+
+def feed(detector: EventDetector, prices: Sequence[float], code: str = "7203") -> List[List[str]]:
+    """Process one single-code batch per price; return the event types of each."""
+    result = []
+    for price in prices:
+        events = detector.process(batch([code], [price]), np.array([UP]), np.array([DOWN]))
+        assert all(event.code == code for event in events)
+        result.append([event.event_type for event in events])
+    return result
+
+
+def test_touch_release_retouch_sequence(detector):
+    assert feed(detector, [1000, 1100, 1100, 1090, 1050, 1100, 1100, 1095]) == [
+        [],
+        ["hit_up"],
+        [],
+        ["release_up"],
+        [],
+        ["retouch_up"],
+        [],
+        ["release_up"],
+    ]
+
+
+def test_down_side_is_tracked_independently(detector):
+    assert feed(detector, [900, 1100, 900, 1000]) == [
+        ["hit_down"],
+        ["hit_up", "release_down"],
+        ["release_up", "retouch_down"],
+        ["release_down"],
+    ]
+
+
+def test_event_prices(detector):
+    events = detector.process(batch(["7203"], [1100]), np.array([UP]), np.array([DOWN]))
+    assert [(e.event_type, e.price, e.ts) for e in events] == [("hit_up", 1100.0, START)]
+    events = detector.process(batch(["7203"], [1080]), np.array([UP]), np.array([DOWN]))
+    assert [(e.event_type, e.price) for e in events] == [("release_up", 1080.0)]
+
+
+def test_touch_between_polls_is_seen_in_the_high(detector):
+    limits = np.array([UP]), np.array([DOWN])
+    events = detector.process(batch(["7203"], [1050], highs=[1100]), *limits)
+    # Reported at the limit price; the price is not at the limit now, so no release follows
+    assert [(e.event_type, e.price) for e in events] == [("hit_up", UP)]
+    assert detector.process(batch(["7203"], [1040], highs=[1100]), *limits) == []
+
+
+def test_nan_prices_are_ignored(detector):
+    limits = np.array([UP]), np.array([DOWN])
+    assert [e.event_type for e in detector.process(batch(["7203"], [1100]), *limits)] == ["hit_up"]
+    # A failed fetch neither releases nor re-triggers the limit
+    assert detector.process(batch(["7203"], [np.nan], [np.nan], [np.nan]), *limits) == []
+    assert detector.process(batch(["7203"], [1100]), *limits) == []
+
+
+def test_batches_emit_per_code(detector):
+    codes = ["7203", "6758", "9984"]
+    limits = np.full(3, UP), np.full(3, DOWN)
+    events = detector.process(batch(codes, [1100, 1000, 900]), *limits)
+    assert sorted((e.code, e.event_type) for e in events) == [("7203", "hit_up"), ("9984", "hit_down")]
+    events = detector.process(batch(codes[1:], [1100, 950]), np.full(2, UP), np.full(2, DOWN))
+    assert sorted((e.code, e.event_type) for e in events) == [("6758", "hit_up"), ("9984", "release_down")]
+
+
+def test_new_trading_day_resets_state(detector, clock):
+    assert feed(detector, [1100]) == [["hit_up"]]
+    clock.now += datetime.timedelta(days=1)
+    assert feed(detector, [1100]) == [["hit_up"]]
+
+
+def test_restored_state_suppresses_first_touch(detector, clock):
+    assert feed(detector, [1100, 1050]) == [["hit_up"], ["release_up"]]
+    state = detector.state(["7203"])
+    restarted = EventDetector(clock)
+    restarted.restore(detector.day, ["7203"], **state)
+    assert feed(restarted, [1100]) == [["retouch_up"]]
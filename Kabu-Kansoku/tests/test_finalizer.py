@@ -0,0 +1,70 @@
+"""EndOfDayFinalizer with an in-memory data source and a temporary database."""
+
+from __future__ import annotations
+
+import datetime
+from typing import Dict, Iterable, Optional
+
+import pytest
+
+from core.finalizer import EndOfDayFinalizer
+from storage.db import Database
+
+DAY = datetime.date(2026, 10, 16)
+
+
+class SummarySource:
+    """Answers base prices and daily summaries from dicts; ``failing`` codes raise."""
+
+    def __init__(self, failing: Iterable[str] = ()) -> None:
+        self.failing = set(failing)
+        self.summary_calls = 0
+
+    def get_base_prices(self, codes: Iterable[str]) -> Dict[str, Optional[float]]:
+        return {code: 1000.0 for code in codes}
+
+    def get_daily_summary(self, code: str, date: datetime.date) -> Optional[Dict[str, object]]:
+        self.summary_calls += 1
+        if code in self.failing:
+            raise ConnectionError("timed out")
+        return {"high": 1100.0, "low": 990.0, "close": 1100.0}
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "kabu.db"))
+    yield database
+    database.close()
+
+
+def test_writes_results_and_flags(db):
+    report = EndOfDayFinalizer(SummarySource(), db).run(["7203", "6758"], DAY)
+    assert report.written == 2
+    assert report.missing == []
+    assert {result.code for result in report.results} == {"7203", "6758"}
+    # The limit up from 1000 yen is 1100: closing there is a stop-high close
+    assert all(result.close_up and result.hit_up for result in report.results)
+
+
+def test_second_run_skips_finalized_codes(db):
+    source = SummarySource()
+    EndOfDayFinalizer(source, db).run(["7203"], DAY)
+    report = EndOfDayFinalizer(source, db).run(["7203"], DAY)
+    assert report.skipped == 1
+    assert report.written == 0
+    assert source.summary_calls == 1
+
+
+def test_commits_only_requested_codes(db):
+    # An interrupted earlier run staged a code that is no longer watched
+    db.stage_summaries(DAY, [("9984", 1000.0, 1010.0, 990.0, 1000.0)])
+    report = EndOfDayFinalizer(SummarySource(), db).run(["7203"], DAY)
+    assert [result.code for result in report.results] == ["7203"]
+    assert db.finalized_codes(DAY) == {"7203"}
+
+
+def test_fetch_errors_are_reported_per_code(db):
+    report = EndOfDayFinalizer(SummarySource(failing=["6758"]), db).run(["7203", "6758"], DAY)
+    assert report.written == 1
+    assert report.missing == ["6758"]
+    assert report.errors == {"6758": "Daily summary: timed out"}
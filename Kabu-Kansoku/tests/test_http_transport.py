@@ -0,0 +1,87 @@
+"""request_with_retry against an in-process ``httpx.MockTransport``."""
+
+from __future__ import annotations
+
+from typing import List
+
+import httpx
+import pytest
+
+from core import http_transport
+from core.http_transport import RetryPolicy, create_client, request_with_retry
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> List[float]:
+    """Record backoff waits instead of sleeping."""
+    waits: List[float] = []
+    monkeypatch.setattr(http_transport.time, "sleep", waits.append)
+    return waits
+
+
+def serve(*responses: httpx.Response):
+    """Return a client answering with ``responses`` in turn, and the request log."""
+    requests: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return responses[len(requests) - 1]
+
+    return create_client(httpx.MockTransport(handler)), requests
+
+
+def test_retries_server_errors_until_success(sleeps):
+    client, requests = serve(httpx.Response(503), httpx.Response(500), httpx.Response(200))
+    with client:
+        response = request_with_retry(client, "GET", "https://broker.test/", RetryPolicy(attempts=3))
+    assert response.status_code == 200
+    assert len(requests) == 3
+    assert len(sleeps) == 2
+
+
+def test_returns_last_server_error_after_final_attempt(sleeps):
+    client, requests = serve(httpx.Response(502), httpx.Response(502))
+    with client:
+        response = request_with_retry(client, "GET", "https://broker.test/", RetryPolicy(attempts=2))
+    assert response.status_code == 502
+    assert len(requests) == 2
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404])
+def test_does_not_retry_client_errors(sleeps, status):
+    client, requests = serve(httpx.Response(status), httpx.Response(200))
+    with client:
+        response = request_with_retry(client, "GET", "https://broker.test/")
+    assert response.status_code == status
+    assert len(requests) == 1
+    assert sleeps == []
+
+
+def test_waits_for_retry_after(sleeps):
+    client, _ = serve(httpx.Response(429, headers={"Retry-After": "3"}), httpx.Response(200))
+    with client:
+        response = request_with_retry(client, "GET", "https://broker.test/", RetryPolicy(max_backoff=8.0))
+    assert response.status_code == 200
+    assert sleeps == [3.0]
+
+
+def test_retry_after_is_capped_by_max_backoff(sleeps):
+    client, _ = serve(httpx.Response(503, headers={"Retry-After": "120"}), httpx.Response(200))
+    with client:
+        request_with_retry(client, "GET", "https://broker.test/", RetryPolicy(max_backoff=8.0))
+    assert sleeps == [8.0]
+
+
+def test_retries_transport_errors(sleeps):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200)
+
+    with create_client(httpx.MockTransport(handler)) as client:
+        response = request_with_retry(client, "GET", "https://broker.test/")
+    assert response.status_code == 200
+    assert len(calls) == 2
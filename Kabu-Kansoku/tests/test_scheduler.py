@@ -0,0 +1,45 @@
+"""AdaptiveSchedule's request budget per data source batch size."""
+
+from __future__ import annotations
+
+import pytest
+
+from core.dummy_data_source import DummyDataSource
+from core.scheduler import AdaptiveSchedule
+from core.sharded_data_source import ShardedDataSource
+from core.tachibana_data_source import TachibanaDataSource
+
+CODES = [str(1000 + i) for i in range(500)]
+
+
+def schedule(codes_per_request: int) -> AdaptiveSchedule:
+    scheduled = AdaptiveSchedule(max_requests_per_second=10.0, codes_per_request=codes_per_request)
+    scheduled.set_codes(CODES)
+    return scheduled
+
+
+def test_per_code_sources_get_one_code_per_request():
+    scheduled = schedule(DummyDataSource.codes_per_request)
+    assert len(scheduled.due(now=0.0)) == 10
+    # Half a second refills five requests
+    assert len(scheduled.due(now=0.5)) == 5
+    assert scheduled.throttled > 0
+
+
+def test_batching_sources_get_full_requests():
+    scheduled = schedule(TachibanaDataSource.codes_per_request)
+    assert len(scheduled.due(now=0.0)) == 500
+    assert scheduled.throttled == 0
+
+
+def test_budget_follows_the_data_source():
+    scheduled = schedule(1)
+    scheduled.set_codes_per_request(120)
+    assert len(scheduled.due(now=0.0)) == 500
+    with pytest.raises(ValueError):
+        scheduled.set_codes_per_request(0)
+
+
+def test_sharded_sources_batch_like_their_workers():
+    assert ShardedDataSource(TachibanaDataSource, 2).codes_per_request == 120
+    assert ShardedDataSource(DummyDataSource, 2).codes_per_request == 1
@@ -0,0 +1,108 @@
+"""SessionManager: reuse, expiry near the refresh margin and refresh backoff."""
+
+from __future__ import annotations
+
+import datetime
+
+import pytest
+
+from core.market_time import JST
+from core.session_manager import SessionManager, VirtualSession
+
+MIDNIGHT = datetime.datetime(2026, 10, 17, tzinfo=JST) + datetime.timedelta(days=1)
+
+
+class Clock:
+    def __init__(self, now: datetime.datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime.datetime:
+        return self.now
+
+
+def make_manager(clock: Clock, authenticate, **kwargs) -> SessionManager:
+    return SessionManager(authenticate, clock=clock, **kwargs)
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock(MIDNIGHT - datetime.timedelta(minutes=10))
+
+
+def test_session_inside_margin_is_reused_without_a_login_loop(clock):
+    # Every login expires at midnight, already inside the 15 minute margin
+    def authenticate() -> VirtualSession:
+        return VirtualSession(f"https://example/{manager.logins}", MIDNIGHT)
+
+    manager = make_manager(clock, authenticate)
+    try:
+        first = manager.get()
+        for _ in range(1000):
+            assert manager.get() is first
+        assert manager.logins == 1
+        assert manager._timer is None
+        assert manager.current() is first
+    finally:
+        manager.close()
+
+
+def test_expired_session_logs_in_again(clock):
+    manager = make_manager(
+        clock, lambda: VirtualSession("https://example/", clock.now + datetime.timedelta(hours=8))
+    )
+    try:
+        manager.get()
+        clock.now += datetime.timedelta(hours=9)
+        manager.get()
+        assert manager.logins == 2
+    finally:
+        manager.close()
+
+
+def test_session_outside_margin_schedules_one_refresh(clock):
+    manager = make_manager(
+        clock, lambda: VirtualSession("https://example/", clock.now + datetime.timedelta(hours=1))
+    )
+    try:
+        manager.get()
+        assert manager._timer is not None
+        assert manager._timer.interval == pytest.approx(45 * 60)
+    finally:
+        manager.close()
+
+
+def test_failed_background_refresh_backs_off_then_gives_up(clock):
+    def authenticate() -> VirtualSession:
+        raise ConnectionError("login server down")
+
+    manager = make_manager(clock, authenticate, retry_delay=10.0, max_retries=3)
+    try:
+        delays = []
+        for _ in range(3):
+            manager._refresh_in_background()
+            delays.append(manager._timer.interval)
+        assert delays == [10.0, 20.0, 40.0]
+        manager._refresh_in_background()
+        assert manager._timer is None
+    finally:
+        manager.close()
+
+
+def test_successful_login_resets_backoff(clock):
+    fail = [True]
+
+    def authenticate() -> VirtualSession:
+        if fail[0]:
+            raise ConnectionError("login server down")
+        return VirtualSession("https://example/", clock.now + datetime.timedelta(hours=8))
+
+    manager = make_manager(clock, authenticate, retry_delay=10.0)
+    try:
+        manager._refresh_in_background()
+        manager._refresh_in_background()
+        fail[0] = False
+        manager._refresh_in_background()
+        assert manager._failures == 0
+        assert manager.logins == 1
+    finally:
+        manager.close()
@@ -0,0 +1,66 @@
+"""Database.fetch_streaks: consecutive trading days per flag."""
+
+from __future__ import annotations
+
+import datetime
+from typing import List
+
+import pytest
+
+from core.models import DayResult
+from storage.db import Database
+
+# Trading days; the weekend in between is not one
+DAYS = [datetime.date(2026, 10, d) for d in (12, 13, 14, 15, 16, 19)]
+
+
+def result(code: str, date: datetime.date, hit_up: bool = False, close_up: bool = False) -> DayResult:
+    return DayResult(code, date, 1000.0, 1100.0, 900.0, 1100.0, 1000.0, 1050.0, hit_up, False, close_up, False)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "kabu.db"))
+    yield database
+    database.close()
+
+
+def hits(code: str, days: List[datetime.date]) -> List[DayResult]:
+    return [result(code, day, hit_up=True) for day in days]
+
+
+def test_streak_ends_at_first_unflagged_day(db):
+    db.save_daily_many(hits("7203", DAYS[:2]) + [result("7203", DAYS[2])] + hits("7203", DAYS[3:]))
+    streaks = db.fetch_streaks()
+    assert streaks["7203"].hit_up == 3
+    assert streaks["7203"].close_up == 0
+
+
+def test_weekends_do_not_break_a_streak(db):
+    db.save_daily_many(hits("7203", DAYS))
+    assert db.fetch_streaks()["7203"].hit_up == len(DAYS)
+
+
+def test_missing_trading_day_breaks_a_streak(db):
+    # 6758 has a result every day; 7203 has none on the 15th
+    db.save_daily_many(hits("6758", DAYS))
+    db.save_daily_many(hits("7203", DAYS[:3] + DAYS[4:]))
+    streaks = db.fetch_streaks()
+    assert streaks["7203"].hit_up == 2
+    assert streaks["6758"].hit_up == len(DAYS)
+
+
+def test_until_limits_the_days_considered(db):
+    db.save_daily_many(hits("7203", DAYS[:3]) + [result("7203", DAYS[3])])
+    assert db.fetch_streaks()["7203"].hit_up == 0
+    assert db.fetch_streaks(until=DAYS[2])["7203"].hit_up == 3
+
+
+def test_codes_filter_accepts_a_full_code_master(db):
+    db.save_daily_many(hits("7203", DAYS) + hits("6758", DAYS[-2:]))
+    codes = ["7203"] + [str(10000 + i) for i in range(40000)]
+    streaks = db.fetch_streaks(codes=codes)
+    assert list(streaks) == ["7203"]
+    # The filter of an earlier call does not stick
+    assert set(db.fetch_streaks()) == {"7203", "6758"}
+    assert db.fetch_streaks(codes=["6758"])["6758"].hit_up == 2
@@ -0,0 +1,143 @@
+"""Tachibana data sources against an in-process ``httpx.MockTransport``."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import json
+import urllib.parse
+from typing import List, Optional
+
+import httpx
+
+from core.http_transport import RetryPolicy
+from core.market_time import now_jst
+from core.session_manager import SessionStore, VirtualSession
+from core.tachibana_data_source import AsyncTachibanaDataSource, TachibanaDataSource
+
+
+class MemoryStore(SessionStore):
+    def __init__(self) -> None:
+        self.session: Optional[VirtualSession] = None
+
+    def load(self) -> Optional[VirtualSession]:
+        return self.session
+
+    def save(self, session: VirtualSession) -> None:
+        self.session = session
+
+    def clear(self) -> None:
+        self.session = None
+
+
+def market_prices(request: httpx.Request) -> dict:
+    """Answer a CLMMfdsGetMarketPrice request with a price for every code."""
+    payload = json.loads(urllib.parse.unquote(request.url.query.decode()))
+    codes = payload["sTargetIssueCode"].split(",")
+    return {
+        "aCLMMfdsMarketPrice": [
+            {"sIssueCode": code, "pDPP": "1000", "pDHP": "1010", "pDLP": "990", "pDV": "5", "pPRP": "995"}
+            for code in codes
+        ]
+    }
+
+
+def make_logins(source) -> List[str]:
+    """Replace the login with one handing out /v1, /v2, ...; return the log of URLs."""
+    urls: List[str] = []
+
+    def authenticate() -> VirtualSession:
+        urls.append(f"https://broker.test/v{len(urls) + 1}")
+        return VirtualSession(urls[-1], now_jst() + datetime.timedelta(hours=8))
+
+    source.sessions.authenticate = authenticate
+    return urls
+
+
+def test_get_quotes_sends_at_most_120_codes_per_request():
+    sizes: List[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = market_prices(request)
+        sizes.append(len(body["aCLMMfdsMarketPrice"]))
+        return httpx.Response(200, json=body)
+
+    source = TachibanaDataSource(httpx.MockTransport(handler), session_store=MemoryStore())
+    make_logins(source)
+    source.login()
+    codes = [str(1000 + i) for i in range(250)]
+    try:
+        batch = source.get_quotes(codes + codes[:10])
+    finally:
+        source.close()
+    assert sizes == [120, 120, 10]
+    assert batch.codes == codes
+    assert batch.base_price.tolist() == [995.0] * len(codes)
+
+
+def test_failed_chunk_is_reported_per_code():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if market_prices(request)["aCLMMfdsMarketPrice"][0]["sIssueCode"] == "1000":
+            return httpx.Response(400)
+        return httpx.Response(200, json=market_prices(request))
+
+    source = TachibanaDataSource(httpx.MockTransport(handler), session_store=MemoryStore())
+    make_logins(source)
+    source.login()
+    errors = {}
+    try:
+        batch = source.get_quotes([str(1000 + i) for i in range(130)], errors)
+    finally:
+        source.close()
+    assert len(batch) == 10
+    assert sorted(errors) == [str(1000 + i) for i in range(120)]
+
+
+def test_single_code_calls_use_the_batch_endpoint():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=market_prices(request))
+
+    source = TachibanaDataSource(httpx.MockTransport(handler), session_store=MemoryStore())
+    make_logins(source)
+    source.login()
+    try:
+        quote = source.get_quote("7203")
+        base_price = source.get_base_price("7203")
+    finally:
+        source.close()
+    assert quote.current_price == 1000.0
+    assert base_price == 995.0
+
+
+def test_concurrent_chunks_log_in_once_after_expiry():
+    renewed = asyncio.Event()
+    rejected = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        # Let every chunk send its request before any answer arrives
+        await asyncio.sleep(0.01)
+        # The first virtual URL has been revoked by the server. Only the
+        # first chunk hears so at once; the others only after a request
+        # with the new URL went through.
+        if request.url.path == "/v1":
+            rejected.append(request)
+            if len(rejected) > 1:
+                await renewed.wait()
+            return httpx.Response(401)
+        renewed.set()
+        return httpx.Response(200, json=market_prices(request))
+
+    async def run(source: AsyncTachibanaDataSource):
+        await source.login()
+        try:
+            return await source.get_quotes([str(1000 + i) for i in range(600)])
+        finally:
+            await source.aclose()
+
+    source = AsyncTachibanaDataSource(
+        httpx.MockTransport(handler), retry=RetryPolicy(attempts=1), session_store=MemoryStore()
+    )
+    urls = make_logins(source)
+    batch = asyncio.run(run(source))
+    assert len(batch) == 600
+    assert urls == ["https://broker.test/v1", "https://broker.test/v2"]